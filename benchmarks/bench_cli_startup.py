@@ -0,0 +1,56 @@
+"""Benchmark of the startup time of the CLI.
+
+Runs `dbt-opiner --help` and a no-op lint (a file that is not in any dbt project)
+in new processes, the way pre-commit runs the hook, and prints the wall clock time.
+The PyPI version check is disabled so the network doesn't add noise.
+
+Usage: python benchmarks/bench_cli_startup.py [n_runs]
+"""
+
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+_CLI = [sys.executable, "-c", "from dbt_opiner.cli import main; main()"]
+
+
+def _time_command(args: list[str], cwd: pathlib.Path, n_runs: int) -> list[float]:
+    env = dict(os.environ, DBT_OPINER_NO_VERSION_CHECK="1")
+    times = []
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        subprocess.run(
+            _CLI + args,
+            cwd=cwd,
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main(n_runs: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = pathlib.Path(tmp_dir)
+        subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+        (root / "README.md").write_text("Not a dbt project\n")
+
+        for name, args in [
+            ("--help", ["--help"]),
+            ("no-op lint", ["lint", "-f", "README.md"]),
+        ]:
+            times = _time_command(args, root, n_runs)
+            print(
+                f"{name:<12} min {min(times):.3f}s  "
+                f"median {statistics.median(times):.3f}s  ({n_runs} runs)"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,65 @@
+"""Benchmark of the deduplication of lint results.
+
+Builds synthetic lint results for models documented in yaml files (one sql and one
+yaml result per model and opinion) and times Linter._deduplicate_results, which
+should scale linearly with the number of results.
+
+Usage: python benchmarks/bench_deduplicate.py [max_results]
+"""
+
+import pathlib
+import sys
+import time
+
+from dbt_opiner import dbt
+from dbt_opiner import file_handlers
+from dbt_opiner import linter
+
+OPINION_CODES = ["O001", "O002", "O003", "O007", "P001"]
+
+
+def _make_linter(n_results: int) -> linter.Linter:
+    """Create a linter with n_results synthetic lint results, without loading any
+    dbt project or opinion."""
+    lint_results = []
+    n_models = max(1, n_results // (2 * len(OPINION_CODES)))
+    for i in range(n_models):
+        yaml_file = object.__new__(file_handlers.YamlFileHandler)
+        yaml_file.path = pathlib.Path(f"project/models/model_{i}.yml")
+        yaml_file.type = ".yaml"
+        sql_file = object.__new__(file_handlers.SqlFileHandler)
+        sql_file.path = pathlib.Path(f"project/models/model_{i}.sql")
+        sql_file.type = ".sql"
+        sql_file.dbt_node = dbt.DbtModel(
+            {"patch_path": f"project://models/model_{i}.yml"}  # type: ignore
+        )
+        for code in OPINION_CODES:
+            for file in (sql_file, yaml_file):
+                lint_results.append(
+                    linter.LintResult(
+                        file, code, False, linter.OpinionSeverity.MUST, "message"
+                    )
+                )
+
+    linter_inst = object.__new__(linter.Linter)
+    linter_inst._lint_results = lint_results[:n_results]
+    return linter_inst
+
+
+def main(max_results: int) -> None:
+    n_results = 1000
+    while n_results <= max_results:
+        linter_inst = _make_linter(n_results)
+        start = time.perf_counter()
+        deduplicated_results = linter_inst._deduplicate_results()
+        elapsed = time.perf_counter() - start
+        print(
+            f"{n_results} results -> {len(deduplicated_results)} deduplicated "
+            f"in {round(elapsed, 3)} seconds "
+            f"({round(elapsed / n_results * 1e6, 3)} µs per result)"
+        )
+        n_results *= 10
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
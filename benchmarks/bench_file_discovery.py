@@ -0,0 +1,76 @@
+"""Benchmark of the discovery of the files of a dbt project.
+
+Creates a project with a few hundred models and large target and dbt_packages
+directories, and compares the previous approach (rglob the whole project and then
+filter out the ignored directories resolving every path) with DbtProject._walk_files,
+which prunes the ignored directories.
+
+Usage: python benchmarks/bench_file_discovery.py [n_models] [n_ignored_files]
+"""
+
+import pathlib
+import sys
+import tempfile
+import time
+
+from dbt_opiner import dbt
+
+IGNORED_DIR_NAMES = ["target", "dbt_packages", ".venv"]
+
+
+def _create_project(root: pathlib.Path, n_models: int, n_ignored_files: int) -> None:
+    (root / "dbt_project.yml").write_text("name: bench\n")
+    for i in range(n_models):
+        model_dir = root / "models" / f"layer_{i % 10}"
+        model_dir.mkdir(parents=True, exist_ok=True)
+        (model_dir / f"model_{i}.sql").write_text("select 1 as id")
+        (model_dir / f"model_{i}.yml").write_text("version: 2\n")
+    for dir_name in ["target", "dbt_packages"]:
+        for i in range(n_ignored_files):
+            file_dir = root / dir_name / f"package_{i % 20}" / f"dir_{i % 200}"
+            file_dir.mkdir(parents=True, exist_ok=True)
+            (file_dir / f"file_{i}.sql").write_text("select 1")
+
+
+def _rglob_then_filter(root: pathlib.Path) -> list[pathlib.Path]:
+    files = []
+    for file in root.rglob("*"):
+        if any(
+            (root / dir_name).resolve() in file.resolve().parents
+            for dir_name in IGNORED_DIR_NAMES
+        ):
+            continue
+        if file.suffix in dbt.SUPPORTED_FILE_SUFFIXES:
+            files.append(file)
+    return files
+
+
+def _walk(root: pathlib.Path) -> list[pathlib.Path]:
+    ignored_dir_paths = {str(root / dir_name) for dir_name in IGNORED_DIR_NAMES}
+    return list(dbt.DbtProject._walk_files(root, ignored_dir_paths))
+
+
+def main(n_models: int, n_ignored_files: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = pathlib.Path(tmp_dir)
+        _create_project(root, n_models, n_ignored_files)
+        print(
+            f"{n_models * 2} project files, "
+            f"{n_ignored_files * 2} files in target and dbt_packages"
+        )
+        timings = {}
+        for name, discover in [("rglob + filter", _rglob_then_filter), ("walk", _walk)]:
+            start = time.perf_counter()
+            files = discover(root)
+            timings[name] = time.perf_counter() - start
+            print(f"{name}: {len(files)} files in {round(timings[name], 3)} seconds")
+        print(
+            f"walk is {round(timings['rglob + filter'] / timings['walk'], 1)}x faster"
+        )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20_000,
+    )
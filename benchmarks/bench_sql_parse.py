@@ -0,0 +1,72 @@
+"""Micro-benchmark of the parsing of the models sql code.
+
+Compares the previous approach (sqlglot.transpile to validate the sql and then
+sqlglot.parse_one) with DbtModel.sql_code_ast, which parses the code once.
+The models of the demo projects are used, with their jinja replaced by plain sql.
+
+Usage: python benchmarks/bench_sql_parse.py [repetitions]
+"""
+
+import pathlib
+import re
+import sys
+import time
+
+import sqlglot
+
+from dbt_opiner import dbt
+
+DEMO_PROJECTS_DIR = (
+    pathlib.Path(__file__).parent.parent / "tests" / "demo_multi_project"
+)
+
+
+def _render(sql: str) -> str:
+    """Replace the jinja calls of the demo models by plain sql."""
+    sql = re.sub(r"\{\{\s*source\('(\w+)',\s*'(\w+)'\)\s*\}\}", r"\1.\2", sql)
+    sql = re.sub(r"\{\{\s*ref\('(\w+)'\)\s*\}\}", r"\1", sql)
+    return re.sub(r"\{\{.*?\}\}", "1", sql)
+
+
+def _double_parse(sql: str) -> sqlglot.Expression:
+    sqlglot.transpile(sql, read="duckdb")
+    return sqlglot.parse_one(sql, dialect="duckdb")
+
+
+def _single_parse(sql: str) -> sqlglot.Expression:
+    ast = dbt.DbtModel({"compiled_code": sql}, "duckdb").sql_code_ast
+    assert ast is not None
+    return ast
+
+
+def main(repetitions: int) -> None:
+    models_sql = [
+        _render(path.read_text())
+        for path in sorted(DEMO_PROJECTS_DIR.glob("*/models/**/*.sql"))
+    ]
+    # Warm up sqlglot dialect and tokenizer caches
+    for sql in models_sql:
+        _double_parse(sql)
+        _single_parse(sql)
+
+    timings = {}
+    for name, parse in [
+        ("transpile + parse_one", _double_parse),
+        ("sql_code_ast", _single_parse),
+    ]:
+        start = time.perf_counter()
+        for _ in range(repetitions):
+            for sql in models_sql:
+                parse(sql)
+        timings[name] = time.perf_counter() - start
+        print(f"{name}: {round(timings[name], 3)} seconds")
+
+    print(
+        f"{len(models_sql)} models x {repetitions} repetitions. "
+        f"sql_code_ast takes {round(timings['sql_code_ast'] / timings['transpile + parse_one'] * 100, 1)}% "
+        "of the time of transpile + parse_one"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,164 @@
+import csv
+import io
+from collections import OrderedDict
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Optional
+
+_STATISTICS_COLUMNS = ("total_evaluated", "passed", "failed", "percentage_passed")
+
+
+@dataclass
+class AuditTable:
+    """Dataclass to hold a table of the audit.
+
+    Attributes:
+        columns: The names of the columns.
+        rows: The rows of the table.
+    """
+
+    columns: tuple[str, ...]
+    rows: list[tuple[Any, ...]] = field(default_factory=list)
+
+    def to_markdown(self) -> str:
+        """Render the table as a markdown table."""
+        # tabulate is only needed to render markdown, so it's imported here
+        import tabulate
+
+        markdown_str: str = tabulate.tabulate(
+            self.rows, headers=self.columns, tablefmt="pipe"
+        )
+        return markdown_str
+
+    def to_csv(self) -> str:
+        """Render the table as csv. Missing values are written as empty strings."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(self.columns)
+        writer.writerows(self.rows)
+        return buffer.getvalue().strip()
+
+    def render(self, format_type: str) -> str:
+        """Render the table in the given format.
+
+        Args:
+            format_type: md or csv.
+
+        Returns:
+            The rendered table.
+        """
+        if format_type == "md":
+            return self.to_markdown()
+        elif format_type == "csv":
+            return self.to_csv()
+        else:
+            raise ValueError(f"Unsupported format: {format_type}")
+
+
+class AuditAggregator:
+    """Aggregate the lint results of an audit in a single pass.
+
+    The statistics are kept as counters of evaluated and passed results per group,
+    so their memory doesn't grow with the number of results. Results without tags
+    are not counted in the statistics by tag, and a tag repeated in a result is
+    counted once per occurrence.
+
+    Methods:
+        add: Add a lint result.
+        get_tables: Get the general statistics, the statistics by tag and the
+            detailed results tables.
+    """
+
+    def __init__(self, keep_detailed: bool = True) -> None:
+        """
+        Args:
+            keep_detailed: If False, the results are only counted and the detailed
+                results table is empty.
+        """
+        self._keep_detailed = keep_detailed
+        # [total evaluated, passed] by (dbt project name, severity)
+        self._general: dict[tuple[str, str], list[int]] = {}
+        # [total evaluated, passed] by (dbt project name, severity, tag)
+        self._by_tag: dict[tuple[str, str, str], list[int]] = {}
+        self._detailed: list[tuple[Any, ...]] = []
+
+    def add(
+        self,
+        dbt_project_name: str,
+        file_name: str,
+        opinion_code: str,
+        severity: str,
+        tags: Optional[list[str]],
+        passed: bool,
+    ) -> None:
+        """Add a lint result.
+
+        Args:
+            dbt_project_name: The name of the dbt project of the linted file.
+            file_name: The path to the linted file.
+            opinion_code: The code of the opinion.
+            severity: The severity of the opinion.
+            tags: The tags of the opinion.
+            passed: Whether the opinion passed.
+        """
+        counts = self._general.setdefault((dbt_project_name, severity), [0, 0])
+        counts[0] += 1
+        counts[1] += passed
+        for tag in tags or []:
+            counts = self._by_tag.setdefault((dbt_project_name, severity, tag), [0, 0])
+            counts[0] += 1
+            counts[1] += passed
+        if self._keep_detailed:
+            self._detailed.append(
+                (dbt_project_name, file_name, opinion_code, severity, tags, passed)
+            )
+
+    @staticmethod
+    def _statistics_rows(
+        counters: dict[Any, list[int]],
+    ) -> list[tuple[Any, ...]]:
+        return [
+            (*key, total, passed, total - passed, passed / total * 100)
+            for key, (total, passed) in sorted(counters.items())
+        ]
+
+    def get_tables(self) -> dict[str, AuditTable]:
+        """Get the tables of the audit.
+
+        Returns:
+            The general statistics and the statistics by tag sorted by their groups,
+            and the detailed results in the order they were added.
+        """
+        return OrderedDict(
+            [
+                (
+                    "general_statistics",
+                    AuditTable(
+                        ("dbt_project_name", "severity", *_STATISTICS_COLUMNS),
+                        self._statistics_rows(self._general),
+                    ),
+                ),
+                (
+                    "statistics_by_tag",
+                    AuditTable(
+                        ("dbt_project_name", "severity", "tags", *_STATISTICS_COLUMNS),
+                        self._statistics_rows(self._by_tag),
+                    ),
+                ),
+                (
+                    "detailed_results",
+                    AuditTable(
+                        (
+                            "dbt_project_name",
+                            "file_name",
+                            "opinion_code",
+                            "severity",
+                            "tags",
+                            "passed",
+                        ),
+                        self._detailed,
+                    ),
+                ),
+            ]
+        )
@@ -0,0 +1,503 @@
+import hashlib
+import inspect
+import json
+import os
+import pathlib
+import pickle
+import sqlite3
+import tempfile
+import time
+from importlib import metadata
+from typing import Any
+from typing import Optional
+
+from loguru import logger
+
+from dbt_opiner import package
+
+CACHE_DIR_NAME = ".dbt_opiner_cache"
+_MANIFEST_SNAPSHOT_FILE_NAME = "manifest.pickle"
+
+
+def get_user_cache_dir() -> pathlib.Path:
+    """Returns the directory for caches shared by all the projects of the user."""
+    cache_home = os.getenv("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return pathlib.Path(cache_home) / "dbt-opiner"
+
+
+def get_cache_version() -> str:
+    """Returns the dbt-opiner version used to invalidate caches between releases."""
+    try:
+        return package.get_package_version()
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def file_sha256(file_path: pathlib.Path) -> str:
+    """Returns the sha256 hex digest of a file, reading it in chunks."""
+    digest = hashlib.sha256()
+    with file_path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _manifest_snapshot_path(manifest_path: pathlib.Path) -> pathlib.Path:
+    return manifest_path.parent / CACHE_DIR_NAME / _MANIFEST_SNAPSHOT_FILE_NAME
+
+
+def load_manifest_snapshot(
+    manifest_path: pathlib.Path, sections: Optional[list[str]] = None
+) -> Optional[dict[str, Any]]:
+    """Load the decoded manifest from its binary snapshot if it's still valid.
+
+    The snapshot is valid if it was written by the same dbt-opiner version, it
+    contains the requested sections, and the manifest has the same size and either
+    the same modification time or the same hash.
+
+    Args:
+        manifest_path: The path to the manifest.json file.
+        sections: The manifest sections that must be in the snapshot.
+            If None, the snapshot must contain the whole manifest.
+
+    Returns:
+        The manifest dictionary, or None if there is no valid snapshot.
+    """
+    snapshot_path = _manifest_snapshot_path(manifest_path)
+    if not snapshot_path.exists():
+        logger.debug(f"Manifest cache miss: no snapshot found at {snapshot_path}")
+        return None
+
+    start = time.perf_counter()
+    manifest_stat = manifest_path.stat()
+    try:
+        with snapshot_path.open("rb") as f:
+            # The header is pickled separately so the (large) payload is only
+            # decoded if the snapshot is valid.
+            header = pickle.load(f)
+            if header.get("dbt_opiner_version") != get_cache_version():
+                logger.debug("Manifest cache miss: dbt-opiner version changed")
+                return None
+            snapshot_sections = header.get("sections")
+            if snapshot_sections is not None and (
+                sections is None or not set(sections) <= set(snapshot_sections)
+            ):
+                logger.debug("Manifest cache miss: snapshot is missing sections")
+                return None
+            if header.get("size") != manifest_stat.st_size:
+                logger.debug("Manifest cache miss: manifest size changed")
+                return None
+            if header.get("mtime_ns") != manifest_stat.st_mtime_ns and header.get(
+                "sha256"
+            ) != file_sha256(manifest_path):
+                logger.debug("Manifest cache miss: manifest content changed")
+                return None
+            manifest_dict: dict[str, Any] = pickle.load(f)
+    except Exception as e:
+        logger.debug(f"Manifest cache miss: could not read snapshot ({e})")
+        return None
+
+    logger.debug(
+        f"Manifest cache hit: loaded {snapshot_path} "
+        f"({snapshot_path.stat().st_size} bytes) "
+        f"in {round(time.perf_counter() - start, 3)} seconds"
+    )
+    return manifest_dict
+
+
+def save_manifest_snapshot(
+    manifest_path: pathlib.Path,
+    manifest_dict: dict[str, Any],
+    sections: Optional[list[str]] = None,
+) -> None:
+    """Write the decoded manifest to a binary snapshot next to the manifest.
+
+    Failing to write the snapshot is not an error, the next run will just miss the cache.
+
+    Args:
+        manifest_path: The path to the manifest.json file.
+        manifest_dict: The decoded manifest.
+        sections: The manifest sections in manifest_dict. None if it's the whole manifest.
+    """
+    snapshot_path = _manifest_snapshot_path(manifest_path)
+    start = time.perf_counter()
+    manifest_stat = manifest_path.stat()
+    header = {
+        "dbt_opiner_version": get_cache_version(),
+        "size": manifest_stat.st_size,
+        "mtime_ns": manifest_stat.st_mtime_ns,
+        "sha256": file_sha256(manifest_path),
+        "sections": sections,
+    }
+    temp_path = None
+    try:
+        snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file and rename it so concurrent runs
+        # never read a partially written snapshot.
+        fd, temp_path = tempfile.mkstemp(dir=snapshot_path.parent)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(manifest_dict, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, snapshot_path)
+    except Exception as e:
+        logger.debug(f"Could not write manifest snapshot to {snapshot_path}: {e}")
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+        return
+
+    logger.debug(
+        f"Manifest snapshot written to {snapshot_path} "
+        f"({snapshot_path.stat().st_size} bytes) "
+        f"in {round(time.perf_counter() - start, 3)} seconds"
+    )
+
+
+class _SqliteCache:
+    """Persistent key value cache stored in a sqlite database. The least recently
+    used entries are evicted when the cache exceeds max_size_bytes.
+
+    Subclasses set the table name and the name used in the logs, and build the keys.
+    """
+
+    _table: str
+    _name: str
+
+    def __init__(self, cache_path: pathlib.Path, max_size_bytes: int) -> None:
+        """
+        Args:
+            cache_path: The path to the sqlite database file.
+            max_size_bytes: The maximum size of the cached entries.
+        """
+        self._cache_path = cache_path
+        self._max_size_bytes = max_size_bytes
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._connect()
+        table_columns = [
+            row[1]
+            for row in self._connection.execute(f"PRAGMA table_info({self._table})")
+        ]
+        if table_columns and "value" not in table_columns:
+            # Table written by an older version, entries are not reused
+            self._connection.execute(f"DROP TABLE {self._table}")
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self._table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {self._table}_last_used "
+            f"ON {self._table} (last_used)"
+        )
+        self._size_bytes: int = self._connection.execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM {self._table}"
+        ).fetchone()[0]
+        self._version = get_cache_version()
+        logger.debug(f"{self._name} cache at {cache_path} ({self._size_bytes} bytes)")
+
+    def _connect(self) -> None:
+        # sqlite connections can't be shared with forked processes,
+        # so each process opens its own connection.
+        self._pid = os.getpid()
+        self._connection = sqlite3.connect(
+            self._cache_path, timeout=30, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+
+    def _execute(self, sql: str, parameters: tuple[Any, ...] = ()) -> sqlite3.Cursor:
+        if self._pid != os.getpid():
+            self._connect()
+        return self._connection.execute(sql, parameters)
+
+    def _get(self, key: str) -> Optional[str]:
+        """Get a cached value and mark it as recently used.
+
+        Returns:
+            The value, or None if it's not cached or the cache can't be read.
+        """
+        try:
+            row = self._execute(
+                f"SELECT value FROM {self._table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._execute(
+                f"UPDATE {self._table} SET last_used = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        except sqlite3.Error as e:
+            logger.debug(f"Could not read the {self._name} cache: {e}")
+            return None
+        value: str = row[0]
+        return value
+
+    def _set(self, key: str, value: str) -> None:
+        """Cache a value and evict the least recently used entries if the cache is
+        too big."""
+        size = len(key) + len(value)
+        try:
+            # The size of the replaced entry is read in the same transaction
+            self._execute("BEGIN IMMEDIATE")
+            try:
+                row = self._execute(
+                    f"SELECT size FROM {self._table} WHERE key = ?", (key,)
+                ).fetchone()
+                self._execute(
+                    f"INSERT OR REPLACE INTO {self._table} VALUES (?, ?, ?, ?)",
+                    (key, value, size, time.time()),
+                )
+                self._execute("COMMIT")
+            except sqlite3.Error:
+                self._execute("ROLLBACK")
+                raise
+            self._size_bytes += size - (row[0] if row else 0)
+            if self._size_bytes > self._max_size_bytes:
+                self._evict()
+        except sqlite3.Error as e:
+            logger.debug(f"Could not write to the {self._name} cache: {e}")
+
+    def _evict(self) -> None:
+        """Delete the least recently used entries until the cache is at 90% of
+        its maximum size."""
+        target_size = self._max_size_bytes * 0.9
+        self._size_bytes = self._execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM {self._table}"
+        ).fetchone()[0]
+        evicted = 0
+        rows = self._execute(
+            f"SELECT key, size FROM {self._table} ORDER BY last_used"
+        ).fetchall()
+        self._execute("BEGIN IMMEDIATE")
+        try:
+            for key, size in rows:
+                if self._size_bytes <= target_size:
+                    break
+                self._execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+                self._size_bytes -= size
+                evicted += 1
+            self._execute("COMMIT")
+        except sqlite3.Error:
+            self._execute("ROLLBACK")
+            raise
+        logger.debug(f"Evicted {evicted} entries from the {self._name} cache")
+
+
+class SqlAstCache(_SqliteCache):
+    """Persistent cache of the columns extracted from the compiled sql code of models.
+
+    Entries are keyed by a hash of the compiled code, the sql dialect, the sqlglot
+    version and the dbt-opiner version, so models whose compiled code didn't change
+    between runs are not parsed again. The cache is stored in a sqlite database and
+    the least recently used entries are evicted when it exceeds max_size_bytes.
+
+    Methods:
+        get_columns: Get the cached columns of a compiled sql code.
+        set_columns: Cache the columns of a compiled sql code.
+    """
+
+    _table = "sql_ast"
+    _name = "sql AST"
+
+    def __init__(self, cache_path: pathlib.Path, max_size_bytes: int) -> None:
+        """
+        Args:
+            cache_path: The path to the sqlite database file.
+            max_size_bytes: The maximum size of the cached entries.
+        """
+        super().__init__(cache_path, max_size_bytes)
+        # Read from the package metadata so cache hits don't import sqlglot
+        self._sqlglot_version = metadata.version("sqlglot")
+
+    def _key(self, compiled_code: str, dialect: Optional[str]) -> str:
+        return hashlib.sha256(
+            "\0".join(
+                [self._version, self._sqlglot_version, dialect or "", compiled_code]
+            ).encode()
+        ).hexdigest()
+
+    def get_columns(
+        self, compiled_code: str, dialect: Optional[str]
+    ) -> Optional[list[str]]:
+        """Get the cached columns of a compiled sql code.
+
+        Args:
+            compiled_code: The compiled sql code of the model.
+            dialect: The sql dialect used to parse the code.
+
+        Returns:
+            The list of columns, or None if they are not cached.
+        """
+        value = self._get(self._key(compiled_code, dialect))
+        if value is None:
+            return None
+        columns: list[str] = json.loads(value)
+        return columns
+
+    def set_columns(
+        self, compiled_code: str, dialect: Optional[str], columns: list[str]
+    ) -> None:
+        """Cache the columns of a compiled sql code and evict the least recently
+        used entries if the cache is too big.
+
+        Args:
+            compiled_code: The compiled sql code of the model.
+            dialect: The sql dialect used to parse the code.
+            columns: The columns extracted from the sql code.
+        """
+        self._set(self._key(compiled_code, dialect), json.dumps(columns))
+
+
+class LintResultCache(_SqliteCache):
+    """Persistent cache of the results of checking an opinion on a file.
+
+    Entries are keyed by a hash of the file (its path, content, the manifest
+    nodes linked to it, the parents they depend on and the dbt project files),
+    the opinion code and a hash of the opinion source file,
+    the configuration and the dbt-opiner version. Results of files, nodes,
+    opinions and configurations that didn't change between runs are reused
+    instead of checking the opinions again.
+
+    Methods:
+        get_file_key: Get the hash of a file and its linked nodes.
+        get_results: Get the cached results of an opinion check on a file.
+        set_results: Cache the results of an opinion check on a file.
+    """
+
+    _table = "lint_results"
+    _name = "lint results"
+
+    def __init__(
+        self,
+        cache_path: pathlib.Path,
+        max_size_bytes: int,
+        config: dict[str, Any],
+    ) -> None:
+        """
+        Args:
+            cache_path: The path to the sqlite database file.
+            max_size_bytes: The maximum size of the cached entries.
+            config: The dbt-opiner configuration the opinions are checked with.
+        """
+        super().__init__(cache_path, max_size_bytes)
+        self._config_hash = hashlib.sha256(
+            json.dumps(config, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        self._opinion_source_hashes: dict[type, Optional[str]] = {}
+        self._project_file_hashes: dict[pathlib.Path, Optional[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_file_key(
+        self,
+        file_path: pathlib.Path,
+        content: str,
+        nodes: list[dict[str, Any]],
+        parent_nodes: Optional[list[dict[str, Any]]] = None,
+        project_files: Optional[list[pathlib.Path]] = None,
+    ) -> str:
+        """Get the hash of a file and the other inputs the opinions can read
+        when they check it.
+
+        Args:
+            file_path: The path to the file.
+            content: The content of the file.
+            nodes: The manifest nodes linked to the file.
+            parent_nodes: The fields of the manifest nodes the linked nodes
+                depend on (e.g. their schema and alias).
+            project_files: The dbt project files the opinions can read
+                (e.g. dbt_project.yml and profiles.yml).
+
+        Returns:
+            The hex digest identifying the file in the cache keys.
+        """
+        digest = hashlib.sha256()
+        digest.update(str(file_path).encode())
+        digest.update(b"\0")
+        digest.update(content.encode())
+        digest.update(b"\0")
+        digest.update(json.dumps(nodes, sort_keys=True, default=str).encode())
+        digest.update(b"\0")
+        digest.update(json.dumps(parent_nodes or [], sort_keys=True).encode())
+        for project_file in project_files or []:
+            digest.update(b"\0")
+            digest.update(str(self._get_project_file_hash(project_file)).encode())
+        return digest.hexdigest()
+
+    def _get_project_file_hash(self, file_path: pathlib.Path) -> Optional[str]:
+        """Returns the hash of a dbt project file, or None if it doesn't exist.
+        Hashes are computed once per run, since the files are shared by all the
+        files of the dbt project."""
+        if file_path not in self._project_file_hashes:
+            try:
+                self._project_file_hashes[file_path] = file_sha256(file_path)
+            except OSError:
+                self._project_file_hashes[file_path] = None
+        return self._project_file_hashes[file_path]
+
+    def _get_opinion_source_hash(self, opinion: Any) -> Optional[str]:
+        """Returns the hash of the source file of the opinion class, or None if
+        it can't be read (the opinion is not cached then)."""
+        opinion_class = opinion.__class__
+        if opinion_class not in self._opinion_source_hashes:
+            try:
+                source_file = inspect.getsourcefile(opinion_class)
+                assert source_file is not None
+                self._opinion_source_hashes[opinion_class] = file_sha256(
+                    pathlib.Path(source_file)
+                )
+            except Exception as e:
+                logger.debug(f"Can't cache the results of {opinion.code}: {e}")
+                self._opinion_source_hashes[opinion_class] = None
+        return self._opinion_source_hashes[opinion_class]
+
+    def _key(self, file_key: str, opinion: Any) -> Optional[str]:
+        opinion_source_hash = self._get_opinion_source_hash(opinion)
+        if opinion_source_hash is None:
+            return None
+        return hashlib.sha256(
+            "\0".join(
+                [
+                    self._version,
+                    self._config_hash,
+                    opinion.code,
+                    opinion_source_hash,
+                    file_key,
+                ]
+            ).encode()
+        ).hexdigest()
+
+    def get_results(self, file_key: str, opinion: Any) -> Optional[list[list[Any]]]:
+        """Get the cached results of an opinion check on a file.
+
+        Args:
+            file_key: The hash of the file from get_file_key.
+            opinion: The opinion checked.
+
+        Returns:
+            The fields of the lint results (all but the file), an empty list if the
+            check had no results, or None if it's not cached.
+        """
+        key = self._key(file_key, opinion)
+        value = self._get(key) if key is not None else None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        results: list[list[Any]] = json.loads(value)
+        return results
+
+    def set_results(
+        self, file_key: str, opinion: Any, results: list[list[Any]]
+    ) -> None:
+        """Cache the results of an opinion check on a file.
+
+        Args:
+            file_key: The hash of the file from get_file_key.
+            opinion: The opinion checked.
+            results: The fields of the lint results (all but the file).
+        """
+        key = self._key(file_key, opinion)
+        if key is not None:
+            self._set(key, json.dumps(results))
@@ -7,16 +7,11 @@ from typing import Iterable
 from typing import Optional
 
 import click
-import pyfiglet
 from loguru import logger
 
 from dbt_opiner import entrypoint
 from dbt_opiner import package
 
-fig = pyfiglet.Figlet(font="big")
-click.echo(fig.renderText("dbt  opiner"))
-package.recommend_version_upgrade()
-
 
 def common_options(opt: Callable[..., Any]) -> Callable[..., Any]:
     opt = click.option(
@@ -138,6 +133,22 @@ def main() -> None:
     pass
 
 
+def _print_banner() -> None:
+    # pyfiglet loads the font on import, so it's only imported to print the banner
+    import pyfiglet
+
+    fig = pyfiglet.Figlet(font="big")
+    click.echo(fig.renderText("dbt  opiner"))
+
+
+def _startup() -> None:
+    """Print the banner and recommend upgrading dbt-opiner.
+    Called by the commands instead of at import time, so --help and --version
+    don't pay for it."""
+    _print_banner()
+    package.recommend_version_upgrade()
+
+
 @main.command(help="Lint files")
 @common_options
 @click.option("-a", "--all-files", is_flag=True, help="Process all files")
@@ -151,6 +162,23 @@ def main() -> None:
             Can also be directory paths.
             Multiple values can be provided separated by space e.g.: -f file_1.sql file_2.sql""",
 )
+@click.option(
+    "--changed-since",
+    type=str,
+    help="""Process the files changed since a git ref (e.g. origin/main).
+            Compares the merge base of the ref with the working tree.""",
+)
+@click.option(
+    "--state",
+    type=str,
+    help="""Process the files of the nodes that are new or modified compared to
+            a previous manifest.json file (e.g. from production).""",
+)
+@click.option(
+    "--with-children",
+    is_flag=True,
+    help="Also process the models downstream of the changed files",
+)
 @click.option("--target", type=str, help="DBT Target to compile manifest")
 @click.option(
     "--force-compile",
@@ -162,24 +190,109 @@ def main() -> None:
     is_flag=True,
     help="Ignore all no-qa configurations",
 )
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Don't read or write the caches enabled in the configuration",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    help="Directory of the lint results cache. It enables the cache, "
+    "e.g. to persist it between CI jobs",
+)
+@click.option(
+    "--timings",
+    "show_timings",
+    is_flag=True,
+    help="Log the wall clock and CPU time of each phase, per dbt project",
+)
+@click.option(
+    "--timings-file",
+    type=click.Path(dir_okay=False),
+    help="If specified, a JSON file to write the time of each phase to",
+)
+@click.option(
+    "--profile-opinions",
+    is_flag=True,
+    help="Log the number of checks, time and results of each opinion",
+)
+@click.option(
+    "--profile-opinions-file",
+    type=click.Path(dir_okay=False),
+    help="If specified, a JSON file to write the profile of the opinions to",
+)
+@click.option(
+    "--discovery",
+    type=click.Choice(["walk", "git", "git-untracked"], case_sensitive=False),
+    default="walk",
+    help="""How to find the files when processing all files.
+    walk: walk the directories of the dbt projects.
+    git: list the files tracked by git.
+    git-untracked: list the files tracked by git and the untracked files
+                   not ignored by .gitignore.""",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of processes used to parse the models sql code and lint the files",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="""Report the results as they are produced instead of sorting them at
+    the end. Only the counters of the results are kept in memory""",
+)
+@click.option(
+    "--stream-sort",
+    is_flag=True,
+    help="""Like --stream, but sort the results by severity and opinion code with
+    an external merge sort in temporary files before reporting them""",
+)
 @click.option(
     "-o",
     "--output-file",
     type=str,
     help="If specified, a file to capture the lint results",
 )
+@click.option(
+    "--output-format",
+    type=click.Choice(["md", "ndjson"], case_sensitive=False),
+    default="md",
+    help="""Format of the output file.
+    md: markdown list of the failed opinions.
+    ndjson: a JSON object per line for every result.""",
+)
 def lint(
     log_level: str,
     files: list[str],
     all_files: bool,
+    changed_since: str,
+    state: str,
+    with_children: bool,
     target: str,
     force_compile: bool,
     no_ignore: bool,
+    no_cache: bool,
+    cache_dir: str,
+    show_timings: bool,
+    timings_file: str,
+    profile_opinions: bool,
+    profile_opinions_file: str,
+    jobs: int,
+    discovery: str,
+    stream: bool,
+    stream_sort: bool,
     output_file: str,
+    output_format: str,
 ) -> None:
-    if not files and not all_files:
+    _startup()
+    if sum([bool(files), all_files, changed_since is not None, bool(state)]) != 1:
         raise click.BadParameter(
-            "Either --files or --all_files options must be provided"
+            "Either --files, --all_files, --changed-since or --state options "
+            "must be provided"
         )
 
     # Try to set a target from an environment variable
@@ -192,7 +305,28 @@ def lint(
     logger.add(sys.stdout, level=log_level.upper())
 
     # Run linter
-    entrypoint.lint(files, all_files, target, force_compile, no_ignore, output_file)
+    entrypoint.lint(
+        files,
+        all_files,
+        target,
+        force_compile,
+        no_ignore,
+        output_file,
+        no_cache=no_cache,
+        cache_dir=cache_dir,
+        show_timings=show_timings,
+        timings_file=timings_file,
+        profile_opinions=profile_opinions,
+        profile_opinions_file=profile_opinions_file,
+        jobs=jobs,
+        discovery=discovery,
+        output_format=output_format,
+        stream=stream,
+        stream_sort=stream_sort,
+        changed_since=changed_since,
+        with_children=with_children,
+        state=state,
+    )
 
 
 @main.command(help="Audit dbt project(s)")
@@ -233,6 +367,67 @@ def lint(
     is_flag=True,
     help="Ignore all no-qa configurations",
 )
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Don't read or write the caches enabled in the configuration",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    help="Directory of the lint results cache. It enables the cache, "
+    "e.g. to persist it between CI jobs",
+)
+@click.option(
+    "--timings",
+    "show_timings",
+    is_flag=True,
+    help="Log the wall clock and CPU time of each phase, per dbt project",
+)
+@click.option(
+    "--timings-file",
+    type=click.Path(dir_okay=False),
+    help="If specified, a JSON file to write the time of each phase to",
+)
+@click.option(
+    "--profile-opinions",
+    is_flag=True,
+    help="Log the number of checks, time and results of each opinion",
+)
+@click.option(
+    "--profile-opinions-file",
+    type=click.Path(dir_okay=False),
+    help="If specified, a JSON file to write the profile of the opinions to",
+)
+@click.option(
+    "--discovery",
+    type=click.Choice(["walk", "git", "git-untracked"], case_sensitive=False),
+    default="walk",
+    help="""How to find the files when processing all files.
+    walk: walk the directories of the dbt projects.
+    git: list the files tracked by git.
+    git-untracked: list the files tracked by git and the untracked files
+                   not ignored by .gitignore.""",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of processes used to parse the models sql code and lint the files",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="""Report the results as they are produced instead of sorting them at
+    the end. Only the counters of the results are kept in memory""",
+)
+@click.option(
+    "--stream-sort",
+    is_flag=True,
+    help="""Like --stream, but sort the results by severity and opinion code with
+    an external merge sort in temporary files before reporting them""",
+)
 @click.option(
     "-o",
     "--output-file",
@@ -247,8 +442,19 @@ def audit(
     target: str,
     force_compile: bool,
     no_ignore: bool,
+    no_cache: bool,
+    cache_dir: str,
+    show_timings: bool,
+    timings_file: str,
+    profile_opinions: bool,
+    profile_opinions_file: str,
+    jobs: int,
+    discovery: str,
+    stream: bool,
+    stream_sort: bool,
     output_file: str,
 ) -> None:
+    _startup()
     # Try to set a target from an environment variable
     # This is useful when things should run in CI
     if target is None:
@@ -259,5 +465,21 @@ def audit(
     logger.add(sys.stdout, level=log_level.upper())
 
     entrypoint.audit(
-        type, format, dbt_project_dir, target, force_compile, no_ignore, output_file
+        type,
+        format,
+        dbt_project_dir,
+        target,
+        force_compile,
+        no_ignore,
+        output_file,
+        no_cache=no_cache,
+        cache_dir=cache_dir,
+        show_timings=show_timings,
+        timings_file=timings_file,
+        profile_opinions=profile_opinions,
+        profile_opinions_file=profile_opinions_file,
+        jobs=jobs,
+        discovery=discovery,
+        stream=stream,
+        stream_sort=stream_sort,
     )
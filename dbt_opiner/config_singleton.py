@@ -51,6 +51,16 @@ class ConfigSingleton:
             },
             True,
         ),
+        "cache": (
+            {
+                "manifest": (bool, True),
+                "sql_ast": (bool, True),
+                "sql_ast_max_size_mb": (int, True),
+                "lint_results": (bool, True),
+                "lint_results_max_size_mb": (int, True),
+            },
+            True,
+        ),
         "files": (
             {
                 "sql": (str, True),
@@ -1,26 +1,46 @@
+import concurrent.futures
+import itertools
 import json
+import multiprocessing
 import os
 import pathlib
+import posixpath
 import re
+import stat
 import subprocess
+import sys
+import time
+from collections import Counter
 from collections import defaultdict
+from collections import deque
+from typing import TYPE_CHECKING
 from typing import Any
 from typing import ItemsView
+from typing import Iterable
+from typing import Iterator
 from typing import KeysView
 from typing import Optional
 from typing import TypedDict
 from typing import ValuesView
 
-import sqlglot
 import yaml
 from loguru import logger
-from sqlglot.optimizer import qualify
-from sqlglot.optimizer import scope
 
+from dbt_opiner import cache
 from dbt_opiner import config_singleton
 from dbt_opiner import file_handlers
+from dbt_opiner import manifest_reader
+from dbt_opiner import timings
+
+if TYPE_CHECKING:
+    # sqlglot is slow to import, so it's only imported when a model AST is parsed
+    import sqlglot  # pragma: no cover
 
 MATCH_ALL = r".*"
+SUPPORTED_FILE_SUFFIXES = {".sql", ".yml", ".yaml", ".md"}
+DISCOVERY_MODES = ["walk", "git", "git-untracked"]
+# Keys of the manifest nodes compared to find the modified nodes in state mode
+STATE_COMPARED_KEYS = ["checksum", "config", "description", "columns"]
 
 
 class DbtProject:
@@ -35,6 +55,7 @@ class DbtProject:
         dbt_profile: The configuration of the dbt profile.
         dbt_manifest: The dbt manifest object.
         files: A dictionary with the files in the dbt project.
+        no_qa_index: The index of the noqa directives of the files in the dbt project.
 
     """
 
@@ -45,6 +66,9 @@ class DbtProject:
         all_files: bool = False,
         target: Optional[str] = None,
         force_compile: bool = False,
+        no_cache: bool = False,
+        manifest_sections: Optional[list[str]] = None,
+        project_files: Optional[list[pathlib.Path]] = None,
     ) -> None:
         """
         Args:
@@ -53,9 +77,16 @@ class DbtProject:
             all_files: A flag to load all files in the dbt project.
             target: The target to run the dbt command.
             force_compile: A flag to force compile the dbt manifest file
+            no_cache: A flag to disable the caches enabled in the configuration.
+            manifest_sections: The manifest sections required by the opinions.
+                If None, all the manifest is loaded.
+            project_files: All the files of the dbt project if they are already
+                discovered (e.g. listed by git). Used with all_files instead of
+                walking the dbt project directory.
         """
 
         self._target = target
+        self._no_cache = no_cache
 
         # Set config
         self._config = config_singleton.ConfigSingleton().get_config()
@@ -79,25 +110,54 @@ class DbtProject:
             self.dbt_profile = self._load_yaml_file(self.dbt_profile_path)
 
         # Load manifest
-        self._load_manifest(force_compile)
+        if manifest_sections is not None:
+            manifest_sections = self._get_manifest_sections(
+                manifest_sections, files, all_files
+            )
+        self._load_manifest(force_compile, manifest_sections)
 
         # TODO: Load catalog
 
         # Load files
+        self.no_qa_index = file_handlers.NoQaIndex()
         self.files: dict[str, list[file_handlers.FileHandler]] = dict(
             sql=[], yaml=[], markdown=[]
         )
-        if all_files:
-            self._init_all_files()
-        else:
-            self._init_files(files)
+        with timings.phase("load files", self.name):
+            if all_files:
+                self._init_all_files(project_files)
+            else:
+                self._init_files(files)
 
-    def _init_all_files(self) -> None:
+    def _init_all_files(
+        self, project_files: Optional[list[pathlib.Path]] = None
+    ) -> None:
         """Create an object for every sql, yaml, and markdown file in the dbt project
         and add it to self.files dictionary.
+
+        Args:
+            project_files: The already discovered files of the dbt project.
+                If None, the dbt project directory is walked.
         """
-        files = list((self.dbt_project_file_path.parent).rglob("*"))
-        self._init_files(files)
+        ignored_dir_paths = self._get_ignored_dir_paths(
+            self.dbt_project_dir_path, self.dbt_project_config
+        )
+        if project_files is None:
+            project_files = list(
+                self._walk_files(self.dbt_project_dir_path, ignored_dir_paths)
+            )
+        else:
+            # Paths are compared as strings to avoid a syscall per file
+            ignored_dir_prefixes = tuple(
+                dir_path + os.sep for dir_path in ignored_dir_paths
+            )
+            project_files = [
+                file
+                for file in project_files
+                if not os.path.normpath(file).startswith(ignored_dir_prefixes)
+            ]
+        for file in project_files:
+            self._init_file(file)
 
     def _init_files(self, files: list[pathlib.Path]) -> None:
         """Initialize only the list of files pased. Useful for git diff files loading.
@@ -105,64 +165,178 @@ class DbtProject:
         Args:
             files: A list of files to load.
         """
+        # The dbt project directory is resolved once, and the files are compared
+        # as strings with the ignored directories, as given and resolved
+        ignored_dir_paths = self._get_ignored_dir_paths(
+            self.dbt_project_dir_path, self.dbt_project_config
+        ) | self._get_ignored_dir_paths(
+            self.dbt_project_dir_path.resolve(), self.dbt_project_config
+        )
+        ignored_dir_prefixes = tuple(
+            os.path.abspath(dir_path) + os.sep for dir_path in ignored_dir_paths
+        )
         for file in files:
-            # Ignore files inside target directory
-            if (
-                (
-                    self.dbt_project_file_path.parent
-                    / self.dbt_project_config.get("target-path", "target")
-                ).resolve()
-                in file.resolve().parents
-                # Ignore files inside dbt deps directory
-                or (
-                    self.dbt_project_file_path.parent
-                    / self.dbt_project_config.get(
-                        "packages-install-path", "dbt_packages"
-                    )
-                ).resolve()
-                in file.resolve().parents
-                # Ignore files inside .venv directory
-                or (self.dbt_project_file_path.parent / ".venv").resolve()
-                in file.resolve().parents
-            ):
+            # Ignore files inside target, dbt deps, logs and .venv directories
+            if os.path.abspath(file).startswith(ignored_dir_prefixes):
                 continue
+            self._init_file(file)
+
+    def _init_file(self, file: pathlib.Path) -> None:
+        """Create the file handler of a file and add it to self.files dictionary."""
+        if file.suffix == ".sql":
+            if re.match(self._config.get("files", {}).get("sql", MATCH_ALL), str(file)):
+                sql_file = file_handlers.SqlFileHandler(
+                    file_path=file, parent_dbt_project=self
+                )
+                self.files["sql"].append(sql_file)
 
-            if file.suffix == ".sql":
-                if re.match(
-                    self._config.get("files", {}).get("sql", MATCH_ALL), str(file)
-                ):
-                    sql_file = file_handlers.SqlFileHandler(
-                        file_path=file, parent_dbt_project=self
-                    )
-                    self.files["sql"].append(sql_file)
+        elif file.suffix in [".yml", ".yaml"]:
+            try:
+                file_pattern = self._config.get("files", {})["yaml"]
+            except KeyError:
+                file_pattern = self._config.get("files", {}).get("yml", MATCH_ALL)
+            if re.match(file_pattern, str(file)):
+                yaml_file = file_handlers.YamlFileHandler(
+                    file_path=file, parent_dbt_project=self
+                )
+                self.files["yaml"].append(yaml_file)
 
-            elif file.suffix in [".yml", ".yaml"]:
-                try:
-                    file_pattern = self._config.get("files", {})["yaml"]
-                except KeyError:
-                    file_pattern = self._config.get("files", {}).get("yml", MATCH_ALL)
-                if re.match(file_pattern, str(file)):
-                    yaml_file = file_handlers.YamlFileHandler(
+        elif file.suffix == ".md":
+            file_pattern = self._config.get("files", {}).get("md", MATCH_ALL)
+            if re.match(file_pattern, str(file)):
+                self.files["markdown"].append(
+                    file_handlers.MarkdownFileHandler(
                         file_path=file, parent_dbt_project=self
                     )
-                    self.files["yaml"].append(yaml_file)
-
-            elif file.suffix == ".md":
-                file_pattern = self._config.get("files", {}).get("md", MATCH_ALL)
-                if re.match(file_pattern, str(file)):
-                    self.files["markdown"].append(
-                        file_handlers.MarkdownFileHandler(
-                            file_path=file, parent_dbt_project=self
-                        )
-                    )
-            else:
-                logger.debug(f"{file.suffix} is not supported. Skipping.")
+                )
+        else:
+            logger.debug(f"{file.suffix} is not supported. Skipping.")
 
-    def _load_manifest(self, force_compile: bool = False) -> None:
-        """Load the dbt manifest file.
+    def add_nodes_files(self, nodes: Iterable["DbtBaseNode"]) -> int:
+        """Load the files of some nodes of the dbt project: the file where each node
+        is defined and its docs yaml file. Nodes of other packages, files that are
+        already loaded and files that don't exist are skipped.
+
+        Args:
+            nodes: The nodes whose files are loaded.
+
+        Returns:
+            The number of files added.
+        """
+        loaded_files = {
+            os.path.normpath(file.path)
+            for files_list in self.files.values()
+            for file in files_list
+        }
+        new_files = []
+        for node in nodes:
+            if node.get("package_name") != self.name:
+                continue
+            node_file_paths = [node.original_file_path]
+            if node.docs_yml_file_path:
+                node_file_paths.append(
+                    DbtManifest._normalize_path(node.get("patch_path"))
+                )
+            for node_file_path in node_file_paths:
+                file_path = self.dbt_project_dir_path / node_file_path
+                if os.path.normpath(file_path) in loaded_files:
+                    continue
+                loaded_files.add(os.path.normpath(file_path))
+                if not file_path.exists():
+                    logger.debug(f"{file_path} of node {node.get('name')} not found")
+                    continue
+                new_files.append(file_path)
+
+        n_files = sum(len(files_list) for files_list in self.files.values())
+        self._init_files(new_files)
+        return sum(len(files_list) for files_list in self.files.values()) - n_files
+
+    @staticmethod
+    def _get_ignored_dir_paths(
+        dbt_project_dir_path: pathlib.Path, dbt_project_config: dict[str, Any]
+    ) -> set[str]:
+        """Returns the normalized paths of the directories with files that are not
+        part of the project code (target, dbt deps, logs, .venv and .git).
+
+        Args:
+            dbt_project_dir_path: The path to the dbt project directory.
+            dbt_project_config: The content of the dbt_project.yml file.
+        """
+        return {
+            os.path.normpath(dbt_project_dir_path / dir_name)
+            for dir_name in (
+                dbt_project_config.get("target-path", "target"),
+                dbt_project_config.get("packages-install-path", "dbt_packages"),
+                dbt_project_config.get("log-path", "logs"),
+                ".venv",
+                ".git",
+            )
+        }
+
+    @staticmethod
+    def _walk_files(
+        dir_path: pathlib.Path, ignored_dir_paths: set[str]
+    ) -> Iterator[pathlib.Path]:
+        """Yield the supported files in a directory tree, sorted by path.
+
+        Ignored directories are pruned instead of walked, and the paths are built
+        from the directory path without resolving them.
+
+        Args:
+            dir_path: The directory to walk.
+            ignored_dir_paths: Normalized paths of the directories to prune.
+        """
+        dirs_to_walk = [os.path.normpath(dir_path)]
+        while dirs_to_walk:
+            current_dir = dirs_to_walk.pop()
+            try:
+                with os.scandir(current_dir) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError as e:
+                logger.debug(f"Can't read directory {current_dir}: {e}")
+                continue
+            sub_dirs = []
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if os.path.normpath(entry.path) not in ignored_dir_paths:
+                        sub_dirs.append(entry.path)
+                elif os.path.splitext(entry.name)[1] in SUPPORTED_FILE_SUFFIXES:
+                    yield pathlib.Path(entry.path)
+            # Walk sub directories in order after the files of the current one
+            dirs_to_walk.extend(reversed(sub_dirs))
+
+    @staticmethod
+    def _get_manifest_sections(
+        required_sections: list[str], files: list[pathlib.Path], all_files: bool
+    ) -> list[str]:
+        """Add the manifest sections the file handlers need to the ones the
+        opinions require.
+
+        Args:
+            required_sections: The manifest sections required by the opinions.
+            files: The files to load.
+            all_files: A flag to load all files in the dbt project.
+
+        Returns:
+            A sorted list of manifest sections.
+        """
+        sections = set(required_sections)
+        # Sql and yaml files are linked to their nodes
+        sections.add("nodes")
+        # Sql files can also be macros
+        if all_files or any(file.suffix == ".sql" for file in files):
+            sections.add("macros")
+        return sorted(sections)
+
+    def _load_manifest(
+        self, force_compile: bool = False, sections: Optional[list[str]] = None
+    ) -> None:
+        """Load the dbt manifest file. Compiling the manifest and loading it are
+        timed as separate phases.
 
         Args:
             force_compile: If True, compile the manifest file even if it exists.
+            sections: The manifest sections to load. If None, load all of them.
         """
         manifest_path = self.dbt_project_file_path.parent / "target" / "manifest.json"
 
@@ -175,11 +349,28 @@ class DbtProject:
                 else f"{manifest_path} does not exist. Compiling"
             )
             logger.debug(action)
-            compile_dbt_manifest(
-                self.dbt_project_file_path, self.dbt_profile_path, self._target
-            )
+            with timings.phase("compile manifest", self.name):
+                compile_dbt_manifest(
+                    self.dbt_project_file_path, self.dbt_profile_path, self._target
+                )
 
-        self.dbt_manifest = DbtManifest(str(manifest_path))
+        cache_config = self._config.get("cache", {})
+        use_cache = not self._no_cache and cache_config.get("manifest", False)
+        sql_ast_cache = None
+        if not self._no_cache and cache_config.get("sql_ast", False):
+            sql_ast_cache = cache.SqlAstCache(
+                cache.get_user_cache_dir() / "sql_ast.sqlite3",
+                max_size_bytes=cache_config.get("sql_ast_max_size_mb", 100)
+                * 1024
+                * 1024,
+            )
+        with timings.phase("load manifest", self.name):
+            self.dbt_manifest = DbtManifest(
+                str(manifest_path),
+                use_cache=use_cache,
+                sections=sections,
+                sql_ast_cache=sql_ast_cache,
+            )
 
     @staticmethod
     def _load_yaml_file(file_path: pathlib.Path) -> dict[str, Any]:
@@ -203,21 +394,49 @@ class DbtManifest:
     Attributes:
         manifest_dict: The dictionary representation of the manifest file.
         nodes: A dictionary of dbt nodes (models, tests, seeds..) in the manifest.
+            Each node is wrapped once with the class of its resource type.
         model_nodes: A dictionary of dbt model nodes in the manifest.
+        test_nodes: A dictionary of dbt test nodes in the manifest.
+        seed_nodes: A dictionary of dbt seed nodes in the manifest.
+        snapshot_nodes: A dictionary of dbt snapshot nodes in the manifest.
         macros: A dictionary of dbt macros in the manifest.
         sources: A dictionary of dbt sources in the manifest.
         exposures: A dictionary of dbt exposures in the manifest.
+
+    Methods:
+        get_nodes_by_file_path: Get the nodes defined in a file.
+        get_macros_by_file_path: Get the macros defined in a file.
+        get_nodes_by_patch_path: Get the nodes documented in a yaml file.
+        get_downstream_nodes: Get the nodes that depend on some nodes.
+        get_modified_nodes: Get the nodes that changed compared to a previous manifest.
     """
 
-    def __init__(self, manifest_path: str) -> None:
+    def __init__(
+        self,
+        manifest_path: str,
+        use_cache: bool = False,
+        sections: Optional[list[str]] = None,
+        sql_ast_cache: Optional[cache.SqlAstCache] = None,
+    ) -> None:
         """
         Args:
             manifest_path: The path to the dbt manifest file
+            use_cache: If True, load the manifest from a binary snapshot when it's
+                still valid, and write the snapshot otherwise.
+            sections: The top level sections of the manifest to load
+                (e.g. ["nodes", "macros"]). If None, load all of them.
+            sql_ast_cache: Persistent cache of the columns extracted from the
+                models sql code.
         """
+        self._sql_ast_cache = sql_ast_cache
         self._manifest_path = manifest_path
-        with open(self._manifest_path, "r") as f:
-            self.manifest_dict = json.load(f)
-            f.close()
+        self._sections = sections
+        self._resolved_dirs: dict[pathlib.Path, str] = {}
+        self.manifest_dict = self._load_manifest_dict(use_cache)
+        logger.debug(
+            f"Loaded manifest sections from {manifest_path}: "
+            f"{', '.join(self.manifest_dict.keys())}"
+        )
         dialect = config_singleton.ConfigSingleton().get_config().get("sqlglot_dialect")
         # For now only a few elements of the manifest are defined as Attributes
         # If more are required they can be added or the manifest_dict can be used instead.
@@ -227,27 +446,90 @@ class DbtManifest:
         self.nodes: dict[
             str, DbtBaseNode
         ] = {}  # nodes in manifest contains models, tests, seeds..
-        self.model_nodes: dict[str, DbtModel] = {}  # only keep model nodes
+        # Typed views of nodes. They hold the same objects as nodes, so
+        # lazily computed properties (e.g. sql_code_ast) are shared.
+        self.model_nodes: dict[str, DbtModel] = {}
+        self.test_nodes: dict[str, DbtTest] = {}
+        self.seed_nodes: dict[str, DbtSeed] = {}
+        self.snapshot_nodes: dict[str, DbtSnapshot] = {}
         self.macros: dict[str, DbtMacro] = {}
         self.sources: dict[str, DbtSource] = {}
         self.exposures: dict[str, DbtBaseNode] = {}
 
-        self._get_nodes()
-        self._get_model_nodes(dialect)
+        self._get_nodes(dialect)
         self._get_macros()
         self._get_sources()
         self._get_exposures()
 
-    def _get_nodes(self) -> None:
-        for key, value in self.manifest_dict.get("nodes", {}).items():
-            # Note: also e.g. seeds and tests are included in the nodes dict
-            self.nodes[key] = DbtBaseNode(value)
+        # Path indexes used by the file handlers to find the nodes of a file.
+        # Keys are paths relative to the dbt project directory.
+        self._nodes_by_file_path: dict[str, dict[str, list[DbtBaseNode]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+        self._macros_by_file_path: dict[str, list[DbtBaseNode]] = defaultdict(list)
+        self._nodes_by_patch_path: dict[str, list[DbtBaseNode]] = defaultdict(list)
+        self._build_path_indexes()
+        # Unique ids of the nodes and macros that depend on each node or macro.
+        # Built when first needed.
+        self._children_map: Optional[dict[str, list[str]]] = None
+
+    def _load_manifest_dict(self, use_cache: bool) -> dict[str, Any]:
+        """Load the manifest file, from its binary snapshot if use_cache is True.
+
+        Args:
+            use_cache: If True, try the snapshot first and write it on a miss.
 
-    def _get_model_nodes(self, dialect: Optional[str]) -> None:
+        Returns:
+            The dictionary representation of the manifest file.
+        """
+        manifest_path = pathlib.Path(self._manifest_path)
+        if use_cache:
+            snapshot = cache.load_manifest_snapshot(manifest_path, self._sections)
+            if snapshot is not None:
+                if self._sections is not None:
+                    # The snapshot can have more sections than the ones requested
+                    snapshot = {
+                        key: value
+                        for key, value in snapshot.items()
+                        if key in self._sections or key == "metadata"
+                    }
+                return snapshot
+
+        manifest_dict: dict[str, Any]
+        if self._sections is None:
+            with open(manifest_path, "r") as f:
+                manifest_dict = json.load(f)
+        else:
+            manifest_dict = manifest_reader.read_manifest_sections(
+                manifest_path, self._sections
+            )
+
+        if use_cache:
+            cache.save_manifest_snapshot(manifest_path, manifest_dict, self._sections)
+        return manifest_dict
+
+    def _get_nodes(self, dialect: Optional[str]) -> None:
         for key, value in self.manifest_dict.get("nodes", {}).items():
+            # Note: also e.g. seeds and tests are included in the nodes dict
             resource_type = value.get("resource_type")
             if resource_type == "model":
-                self.model_nodes[key] = DbtModel(value, dialect)
+                model = DbtModel(value, dialect, self._sql_ast_cache)
+                self.model_nodes[key] = model
+                self.nodes[key] = model
+            elif resource_type == "test":
+                test = DbtTest(value)
+                self.test_nodes[key] = test
+                self.nodes[key] = test
+            elif resource_type == "seed":
+                seed = DbtSeed(value)
+                self.seed_nodes[key] = seed
+                self.nodes[key] = seed
+            elif resource_type == "snapshot":
+                snapshot = DbtSnapshot(value)
+                self.snapshot_nodes[key] = snapshot
+                self.nodes[key] = snapshot
+            else:
+                self.nodes[key] = DbtBaseNode(value)
 
     def _get_macros(self) -> None:
         for key, value in self.manifest_dict.get("macros", {}).items():
@@ -261,6 +543,209 @@ class DbtManifest:
         for key, value in self.manifest_dict.get("exposures", {}).items():
             self.exposures[key] = DbtBaseNode(value)
 
+    def _build_path_indexes(self) -> None:
+        """Index nodes by original_file_path (per resource type) and by patch_path,
+        and macros by original_file_path, so lookups by file don't scan the manifest.
+        """
+        for node in self.nodes.values():
+            self._nodes_by_file_path[node.type][
+                self._normalize_path(node.original_file_path)
+            ].append(node)
+            if node.docs_yml_file_path:
+                self._nodes_by_patch_path[
+                    self._normalize_path(node.get("patch_path"))
+                ].append(node)
+
+        for macro in self.macros.values():
+            self._macros_by_file_path[
+                self._normalize_path(macro.original_file_path)
+            ].append(macro)
+
+    def get_nodes_by_file_path(
+        self,
+        file_path: pathlib.Path,
+        dbt_project_dir_path: pathlib.Path,
+        resource_type: Optional[str] = None,
+    ) -> list["DbtBaseNode"]:
+        """Get the nodes whose original_file_path is the given file.
+
+        Args:
+            file_path: The path to the file.
+            dbt_project_dir_path: The path to the dbt project directory of the file.
+            resource_type: If provided, only return nodes of this resource type.
+
+        Returns:
+            A list of nodes defined in the file.
+        """
+        relative_path = self._relative_path(file_path, dbt_project_dir_path)
+        if relative_path is None:
+            return []
+        if resource_type is not None:
+            return list(
+                self._nodes_by_file_path.get(resource_type, {}).get(relative_path, [])
+            )
+        return [
+            node
+            for nodes_by_path in self._nodes_by_file_path.values()
+            for node in nodes_by_path.get(relative_path, [])
+        ]
+
+    def get_macros_by_file_path(
+        self, file_path: pathlib.Path, dbt_project_dir_path: pathlib.Path
+    ) -> list["DbtBaseNode"]:
+        """Get the macros whose original_file_path is the given file.
+
+        Args:
+            file_path: The path to the file.
+            dbt_project_dir_path: The path to the dbt project directory of the file.
+
+        Returns:
+            A list of macros defined in the file.
+        """
+        relative_path = self._relative_path(file_path, dbt_project_dir_path)
+        if relative_path is None:
+            return []
+        return list(self._macros_by_file_path.get(relative_path, []))
+
+    def get_nodes_by_patch_path(
+        self,
+        file_path: pathlib.Path,
+        dbt_project_dir_path: pathlib.Path,
+        package_name: Optional[str] = None,
+    ) -> list["DbtBaseNode"]:
+        """Get the nodes whose patch_path (docs yaml file) is the given file.
+
+        Args:
+            file_path: The path to the yaml file.
+            dbt_project_dir_path: The path to the dbt project directory of the file.
+            package_name: If provided, skip the nodes of other packages. The patch
+                paths are relative to the package, so installed packages can have
+                docs yaml files with the same path as the project.
+
+        Returns:
+            A list of nodes documented in the file.
+        """
+        relative_path = self._relative_path(file_path, dbt_project_dir_path)
+        if relative_path is None:
+            return []
+        return [
+            node
+            for node in self._nodes_by_patch_path.get(relative_path, [])
+            if package_name is None
+            or node.get("package_name", package_name) == package_name
+        ]
+
+    def get_downstream_nodes(
+        self, nodes: Iterable["DbtBaseNode"], resource_type: Optional[str] = None
+    ) -> list["DbtBaseNode"]:
+        """Get the nodes that depend directly or indirectly on the given nodes,
+        following the depends_on of the nodes and macros. The given nodes can be
+        macros too, e.g. to get the models that use a changed macro.
+
+        Args:
+            nodes: The nodes to start from. They are not included in the result.
+            resource_type: If provided, only return nodes of this resource type.
+                Nodes of other types are still followed.
+
+        Returns:
+            A list of downstream nodes, in breadth first order.
+        """
+        if self._children_map is None:
+            self._children_map = defaultdict(list)
+            for unique_id, node in itertools.chain(
+                self.nodes.items(), self.macros.items()
+            ):
+                depends_on = node.get("depends_on", {})
+                for parent_id in depends_on.get("nodes", []) + depends_on.get(
+                    "macros", []
+                ):
+                    self._children_map[parent_id].append(unique_id)
+
+        node_ids = {id(node) for node in nodes}
+        visited = {
+            unique_id
+            for unique_id, node in itertools.chain(
+                self.nodes.items(), self.macros.items()
+            )
+            if id(node) in node_ids
+        }
+        queue = deque(visited)
+        downstream_nodes = []
+        while queue:
+            for child_id in self._children_map.get(queue.popleft(), []):
+                if child_id in visited:
+                    continue
+                visited.add(child_id)
+                queue.append(child_id)
+                child = self.nodes.get(child_id) or self.macros[child_id]
+                if resource_type is None or child.type == resource_type:
+                    downstream_nodes.append(child)
+        return downstream_nodes
+
+    def get_modified_nodes(
+        self, state_nodes: dict[str, dict[str, Any]]
+    ) -> list["DbtBaseNode"]:
+        """Get the nodes that are new or modified compared to the nodes of a previous
+        manifest (e.g. the production one), similar to dbt state:modified.
+
+        A node is modified if its checksum (the content of its file), config,
+        description or columns (including their docs) changed.
+
+        Args:
+            state_nodes: The nodes section of the previous manifest.
+
+        Returns:
+            A list of new or modified nodes.
+        """
+        modified_nodes = []
+        for unique_id, node in self.nodes.items():
+            state_node = state_nodes.get(unique_id)
+            if state_node is None or any(
+                node.get(key) != state_node.get(key) for key in STATE_COMPARED_KEYS
+            ):
+                modified_nodes.append(node)
+        return modified_nodes
+
+    @staticmethod
+    def _normalize_path(path: str) -> str:
+        """Normalize a path from the manifest to a posix path relative to the
+        dbt project directory. patch_path values are prefixed with the package name
+        (e.g. `my_project://models/_models.yml`), so the prefix is removed.
+        """
+        if "://" in path:
+            path = path.split("://", 1)[1]
+        return pathlib.PurePosixPath(path.replace("\\", "/")).as_posix()
+
+    def _relative_path(
+        self, file_path: pathlib.Path, dbt_project_dir_path: pathlib.Path
+    ) -> Optional[str]:
+        """Returns the posix path of a file relative to the dbt project directory,
+        or None if the file is not inside it.
+
+        The file path is compared as a string with the dbt project directory,
+        which is resolved only once. The file path is only resolved if it's not
+        inside the directory as given (e.g. a symlink).
+        """
+        dir_paths = (
+            os.path.abspath(dbt_project_dir_path),
+            self._resolve_dir(dbt_project_dir_path),
+        )
+        normalized_file_path = os.path.abspath(file_path)
+        for dir_path in dir_paths:
+            if normalized_file_path.startswith(dir_path + os.sep):
+                return pathlib.Path(
+                    normalized_file_path[len(dir_path) + 1 :]
+                ).as_posix()
+        resolved_file_path = str(file_path.resolve())
+        if resolved_file_path.startswith(dir_paths[1] + os.sep):
+            return pathlib.Path(resolved_file_path[len(dir_paths[1]) + 1 :]).as_posix()
+        return None
+
+    def _resolve_dir(self, path: pathlib.Path) -> str:
+        if path not in self._resolved_dirs:
+            self._resolved_dirs[path] = str(path.resolve())
+        return self._resolved_dirs[path]
+
 
 class DbtCatalog:
     """Class to represent a dbt catalog file."""
@@ -373,13 +858,38 @@ class DbtModel(DbtBaseNode):
         unique_key: The unique key of the node.
         depends_on: The list of dependencies of the node (macros and nodes).
         sql_code_ast: The sqlglot Abstract Syntax Tree (AST) of the compiled code.
+        qualified_sql_code_ast: The qualified sqlglot AST of the compiled code.
         ast_extracted_columns: The columns extracted from the sql code AST.
+        ast_star_columns: The unresolved `select *` in the extracted columns.
+
+    The AST, the qualified AST and the extracted columns are computed once per node.
+    If a sql_ast_cache is given, the extracted columns are also persisted between runs.
+    Hits and misses of these caches for all the models are counted in cache_stats.
+    The columns of many models can be extracted in parallel with DbtModel.preparse.
     """
 
-    def __init__(self, node: DbtNodeType, sql_dialect: Optional[str] = None) -> None:
+    cache_stats: Counter[str] = Counter()
+
+    def __init__(
+        self,
+        node: DbtNodeType,
+        sql_dialect: Optional[str] = None,
+        sql_ast_cache: Optional[cache.SqlAstCache] = None,
+    ) -> None:
+        """
+        Args:
+            node: The dictionary representation of the dbt node.
+            sql_dialect: The sqlglot dialect of the compiled code.
+            sql_ast_cache: Persistent cache of the columns extracted from the sql code.
+        """
         super().__init__(node)
         self._sql_code_ast = None
+        self._sql_code_ast_parsed = False
         self._sql_dialect = sql_dialect
+        self._sql_ast_cache = sql_ast_cache
+        self._qualified_sql_code_ast: Optional["sqlglot.expressions.Expression"] = None
+        self._ast_extracted_columns: Optional[list[str]] = None
+        self._ast_star_columns: Optional[list[str]] = None
 
     @property
     def compiled_code(self) -> str:
@@ -398,35 +908,111 @@ class DbtModel(DbtBaseNode):
         return self._node.get("depends_on", {})
 
     @property
-    def sql_code_ast(self) -> Optional[sqlglot.expressions.Select]:
+    def sql_code_ast(self) -> Optional["sqlglot.expressions.Select"]:
         """Returns the sqlglot Abstract Syntax Tree for the compiled sql code.
         See more about AST at: https://github.com/tobymao/sqlglot/blob/main/posts/ast_primer.md
         """
-        if self._sql_code_ast is None and self.compiled_code:
+        if not self._sql_code_ast_parsed and self.compiled_code:
+            self._count_cache("sql_code_ast", hit=False)
+            # Parse only once, even if the code is malformed
+            self._sql_code_ast_parsed = True
+            import sqlglot
+
             try:
-                sqlglot.transpile(self.compiled_code, read=self._sql_dialect)
-            except sqlglot.errors.ParseError as e:
-                logger.error(f"Malformed SQL code:\n{e}")
-            else:
                 self._sql_code_ast = sqlglot.parse_one(  # type: ignore
                     self.compiled_code, dialect=self._sql_dialect
                 )
+            except sqlglot.errors.ParseError as e:
+                logger.error(f"Malformed SQL code:\n{e}")
+        elif self._sql_code_ast_parsed:
+            self._count_cache("sql_code_ast", hit=True)
 
         return self._sql_code_ast
 
+    @property
+    def qualified_sql_code_ast(self) -> Optional["sqlglot.expressions.Expression"]:
+        """Returns the sql code AST qualified with sqlglot's qualify optimizer.
+        Note that qualify modifies the sql code AST in place.
+        """
+        if self._qualified_sql_code_ast is not None:
+            self._count_cache("qualified_sql_code_ast", hit=True)
+            return self._qualified_sql_code_ast
+
+        if self.sql_code_ast:
+            self._count_cache("qualified_sql_code_ast", hit=False)
+            from sqlglot.optimizer import qualify
+
+            self._qualified_sql_code_ast = qualify.qualify(self.sql_code_ast)
+        return self._qualified_sql_code_ast
+
     @property
     def ast_extracted_columns(self) -> list[str]:
         """Returns the columns extracted from the sql code ast."""
+        if self._ast_extracted_columns is not None:
+            self._count_cache("ast_extracted_columns", hit=True)
+            return self._ast_extracted_columns
+
+        self._count_cache("ast_extracted_columns", hit=False)
+        if self._load_persisted_columns():
+            return self._ast_extracted_columns  # type: ignore
+
         if self.sql_code_ast:
-            return self._extract_columns_from_ast()
-        return []
+            self._set_extracted_columns(self._extract_columns_from_ast())
+        else:
+            self._ast_extracted_columns = []
+        return self._ast_extracted_columns  # type: ignore
+
+    def _load_persisted_columns(self) -> bool:
+        """Load the extracted columns from the sql_ast_cache.
+
+        Returns:
+            True if the columns were found in the cache.
+        """
+        if not (self._sql_ast_cache and self.compiled_code):
+            return False
+        cached_columns = self._sql_ast_cache.get_columns(
+            self.compiled_code, self._sql_dialect
+        )
+        self._count_cache("sql_ast_cache", hit=cached_columns is not None)
+        if cached_columns is None:
+            return False
+        self._ast_extracted_columns = cached_columns
+        return True
+
+    def _set_extracted_columns(self, columns: list[str]) -> None:
+        self._ast_extracted_columns = columns
+        if self._sql_ast_cache:
+            self._sql_ast_cache.set_columns(
+                self.compiled_code, self._sql_dialect, columns
+            )
+
+    @property
+    def ast_star_columns(self) -> list[str]:
+        """Returns the `select *` that couldn't be resolved to columns
+        (e.g. `* from dim_customers`).
+        """
+        if self._ast_star_columns is None:
+            self._ast_star_columns = [
+                column for column in self.ast_extracted_columns if "*" in column
+            ]
+        return self._ast_star_columns
 
     def _extract_columns_from_ast(self) -> list[str]:
+        import sqlglot
+        from sqlglot.optimizer import qualify
+        from sqlglot.optimizer import scope
+
         columns = []
-        for column in qualify.qualify(self.sql_code_ast).selects:  # type: ignore
+        # Stars selected in the same select statement share the same scope
+        star_scopes: dict[int, Optional[scope.Scope]] = {}
+        for column in self.qualified_sql_code_ast.selects:  # type: ignore
             # If there's a select * in the final CTE
             if column.is_star:
-                root = scope.build_scope(qualify.qualify(column.parent))
+                if id(column.parent) not in star_scopes:
+                    star_scopes[id(column.parent)] = scope.build_scope(
+                        qualify.qualify(column.parent)
+                    )
+                root = star_scopes[id(column.parent)]
                 try:
                     # If the column is a `select *` from a directly referenced table
                     if root:
@@ -440,6 +1026,94 @@ class DbtModel(DbtBaseNode):
                 columns.append(column.alias)
         return columns
 
+    @classmethod
+    def preparse(cls, models: Iterable["DbtModel"], jobs: int) -> None:
+        """Extract the columns of the models in a pool of processes.
+
+        Parsing the sql code with sqlglot is CPU bound, so the compiled code of the
+        models whose columns are not cached yet is parsed in jobs processes.
+        The extracted columns (not the ASTs, which are expensive to pickle) are sent
+        back and seeded in the models, so opinions don't parse the code again.
+        The hits and misses of the models caches in the workers are added to
+        cache_stats.
+
+        Args:
+            models: The models to preparse.
+            jobs: The number of processes. Models are not preparsed if it's 1 or
+                less, or if processes can't be forked in this platform.
+        """
+        if jobs <= 1:
+            return
+        if "fork" not in multiprocessing.get_all_start_methods():
+            logger.debug("Processes can't be forked. Models are not preparsed.")
+            return
+
+        pending: dict[tuple[str, Optional[str]], list[DbtModel]] = defaultdict(list)
+        for model in models:
+            if (
+                model._ast_extracted_columns is None
+                and model.compiled_code
+                and not model._load_persisted_columns()
+            ):
+                pending[(model.compiled_code, model._sql_dialect)].append(model)
+        if len(pending) < 2:
+            return
+
+        start = time.perf_counter()
+        jobs = min(jobs, len(pending))
+        codes, dialects = zip(*pending)
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            for key, (columns, cache_stats) in zip(
+                pending,
+                executor.map(
+                    _extract_columns,
+                    codes,
+                    dialects,
+                    chunksize=max(1, len(pending) // (jobs * 4)),
+                ),
+            ):
+                for model in pending[key]:
+                    model._set_extracted_columns(columns)
+                cls.cache_stats.update(cache_stats)
+        logger.debug(
+            f"Preparsed {len(pending)} models in {jobs} processes "
+            f"in {round(time.perf_counter() - start, 3)} seconds"
+        )
+
+    @classmethod
+    def _count_cache(cls, name: str, hit: bool) -> None:
+        cls.cache_stats[f"{name}.{'hits' if hit else 'misses'}"] += 1
+
+    @classmethod
+    def get_cache_stats_summary(cls) -> str:
+        """Returns a summary of the hits and misses of the models caches."""
+        names = sorted({key.rsplit(".", 1)[0] for key in cls.cache_stats})
+        lines = []
+        for name in names:
+            hits = cls.cache_stats[f"{name}.hits"]
+            misses = cls.cache_stats[f"{name}.misses"]
+            lines.append(
+                f"{name}: {hits} hits, {misses} misses "
+                f"({round(hits / (hits + misses) * 100, 1)}% hit rate)"
+            )
+        return "\n".join(lines)
+
+
+def _extract_columns(
+    compiled_code: str, sql_dialect: Optional[str]
+) -> tuple[list[str], Counter[str]]:
+    """Extract the columns of a compiled sql code in a preparse worker process.
+    Returns the columns and the hits and misses of the models caches in the worker,
+    which are added to DbtModel.cache_stats by the parent process."""
+    cache_stats = Counter(DbtModel.cache_stats)
+    columns = DbtModel(
+        {"compiled_code": compiled_code},  # type: ignore
+        sql_dialect,
+    ).ast_extracted_columns
+    return columns, DbtModel.cache_stats - cache_stats
+
 
 class DbtSource(DbtBaseNode):
     """Class to represent a dbt source in the manifest file.
@@ -455,6 +1129,24 @@ class DbtSource(DbtBaseNode):
         return self._node.get("database", "")
 
 
+class DbtTest(DbtBaseNode):
+    """Represents a dbt test (singular or generic test applied to a node)."""
+
+    pass
+
+
+class DbtSeed(DbtBaseNode):
+    """Represents a dbt seed."""
+
+    pass
+
+
+class DbtSnapshot(DbtBaseNode):
+    """Represents a dbt snapshot."""
+
+    pass
+
+
 class DbtMacro(DbtBaseNode):
     """Represents a dbt macro."""
 
@@ -469,14 +1161,42 @@ class DbtProjectLoader:
       initialize_dbt_projects: Initialize dbt projects with all files or only the changed ones.
     """
 
-    def __init__(self, target: Optional[str] = None, force_compile: bool = False):
+    def __init__(
+        self,
+        target: Optional[str] = None,
+        force_compile: bool = False,
+        no_cache: bool = False,
+        manifest_sections: Optional[list[str]] = None,
+        discovery: str = "walk",
+    ):
         """
         Args:
           target: The target to run dbt commands.
           force_compile: A flag to force compile the dbt manifest file.
+          no_cache: A flag to disable the caches enabled in the configuration.
+          manifest_sections: The manifest sections required by the opinions.
+            If None, all the manifest is loaded.
+          discovery: How to find the files when processing all files:
+            walk: walk the directories of the dbt projects.
+            git: list the files tracked by git.
+            git-untracked: list the files tracked by git and the untracked
+              files that are not ignored by .gitignore.
         """
+        if discovery not in DISCOVERY_MODES:
+            raise ValueError(
+                f"Unknown discovery mode {discovery}. "
+                f"Use one of: {', '.join(DISCOVERY_MODES)}"
+            )
         self._target = target
         self._force_compile = force_compile
+        self._no_cache = no_cache
+        self._manifest_sections = manifest_sections
+        self._discovery = discovery
+        # Memos shared by the lookups of all the files, so each directory is
+        # resolved and checked for .git and dbt_project.yml at most once per run
+        self._resolved_dirs: dict[pathlib.Path, pathlib.Path] = {}
+        self._git_roots: dict[pathlib.Path, Optional[pathlib.Path]] = {}
+        self._dbt_project_ymls: dict[pathlib.Path, Optional[pathlib.Path]] = {}
 
     def _get_dbt_projects_all_files(self) -> list[DbtProject]:
         """
@@ -485,6 +1205,22 @@ class DbtProjectLoader:
         Returns:
           A list of dbt projects with all its files loaded.
         """
+        if self._discovery != "walk":
+            files_by_dbt_project = self._get_git_files_by_dbt_project()
+            if files_by_dbt_project is not None:
+                return [
+                    DbtProject(
+                        dbt_project_file_path=dbt_project_file_path,
+                        target=self._target,
+                        force_compile=self._force_compile,
+                        no_cache=self._no_cache,
+                        manifest_sections=self._manifest_sections,
+                        all_files=True,
+                        project_files=files,
+                    )
+                    for dbt_project_file_path, files in files_by_dbt_project.items()
+                ]
+
         dbt_projects_file_paths = self._find_all_dbt_project_ymls()
         dbt_projects = []
         if dbt_projects_file_paths:
@@ -493,6 +1229,8 @@ class DbtProjectLoader:
                     dbt_project_file_path=dbt_project_file_path,
                     target=self._target,
                     force_compile=self._force_compile,
+                    no_cache=self._no_cache,
+                    manifest_sections=self._manifest_sections,
                     all_files=True,
                 )
                 for dbt_project_file_path in dbt_projects_file_paths
@@ -512,10 +1250,10 @@ class DbtProjectLoader:
 
         for file in changed_files:
             try:
-                assert file.exists()
-            except AssertionError:
+                is_dir = stat.S_ISDIR(file.stat().st_mode)
+            except OSError:
                 raise FileNotFoundError(f"{file} does not exist")
-            dbt_project_file_path = self._find_dbt_project_yml(file)
+            dbt_project_file_path = self._find_dbt_project_yml(file, is_dir)
             if dbt_project_file_path:
                 file_to_project_map[dbt_project_file_path].append(file)
 
@@ -527,28 +1265,61 @@ class DbtProjectLoader:
                 all_files=False,
                 target=self._target,
                 force_compile=self._force_compile,
+                no_cache=self._no_cache,
+                manifest_sections=self._manifest_sections,
             )
             dbt_projects.append(dbt_project)
         return dbt_projects
 
     def initialize_dbt_projects(
-        self, changed_files: list[str] = [], all_files: bool = False
+        self,
+        changed_files: list[str] = [],
+        all_files: bool = False,
+        changed_since: Optional[str] = None,
+        with_children: bool = False,
+        state: Optional[str] = None,
     ) -> list[DbtProject]:
         """Initialize dbt projects with all files or only the changed ones.
 
         Args:
             changed_files: A list of changed files to process.
             all_files: A flag to process all files in the repository.
+            changed_since: A git ref. If provided, process the files changed
+                since the merge base of the ref and the working tree.
+            with_children: A flag to also process the models downstream of the
+                changed files (and their docs yaml files).
+            state: A path to a previous manifest.json file (e.g. production).
+                If provided, process the files of the nodes that are new or
+                modified compared to it.
 
         Returns:
             A list of dbt projects with the specified files loaded.
         """
-        if all_files and changed_files:
+        n_modes = sum(
+            [all_files, bool(changed_files), changed_since is not None, bool(state)]
+        )
+        if n_modes > 1:
+            raise ValueError(
+                "Only one of all files, changed files, changed since or state "
+                "can be specified"
+            )
+        if n_modes == 0:
             raise ValueError(
-                "Cannot process all files and changed files at the same time"
+                "Either all files, changed files, changed since or state "
+                "must be specified"
             )
-        if not all_files and not changed_files:
-            raise ValueError("Either all files or changed files must be specified")
+
+        if state:
+            logger.debug(f"Processing nodes modified compared to {state}")
+            dbt_projects = self._get_dbt_projects_state(pathlib.Path(state))
+
+        if changed_since is not None:
+            logger.debug(f"Processing files changed since {changed_since}")
+            git_changed_files = self._get_git_changed_files(changed_since)
+            if not git_changed_files:
+                logger.info(f"No files changed since {changed_since}")
+                return []
+            dbt_projects = self._get_dbt_projects_changed_files(git_changed_files)
 
         if all_files:
             logger.debug("Processing all files")
@@ -562,33 +1333,250 @@ class DbtProjectLoader:
             for file in changed_files:
                 path = pathlib.Path(file)
                 if path.is_dir():
-                    files.extend(path.rglob("*"))
+                    files.extend(self._get_dir_files(path))
                 else:
                     files.append(path)
             dbt_projects = self._get_dbt_projects_changed_files(files)
 
+        if with_children and not all_files:
+            for dbt_project in dbt_projects:
+                self._add_downstream_files(dbt_project)
+
         return dbt_projects
 
-    def _find_dbt_project_yml(self, file: pathlib.Path) -> Optional[pathlib.Path]:
+    def _get_dir_files(self, dir_path: pathlib.Path) -> list[pathlib.Path]:
+        """Get the supported files in a directory and its subdirectories.
+
+        The directories that are not part of the code of the dbt projects (target,
+        dbt deps, logs, .venv and .git) are pruned instead of walked. They are
+        those of the dbt project of the directory or, if the directory is not in
+        a dbt project, of the dbt projects of the git repository.
+
+        Args:
+            dir_path: The path to the directory.
+
+        Returns:
+            A list of file paths, sorted by path.
+        """
+        dbt_project_file_path = self._find_dbt_project_yml(dir_path, is_dir=True)
+        if dbt_project_file_path is not None:
+            dbt_project_file_paths = [dbt_project_file_path]
+        else:
+            dbt_project_file_paths = self._find_all_dbt_project_ymls() or []
+
+        # dbt_project.yml paths are resolved, and the walked paths are built from
+        # the directory path as passed, so the ignored paths are rebuilt from it
+        resolved_dir_path = dir_path.resolve()
+        ignored_dir_paths = {
+            os.path.normpath(dir_path / dir_name) for dir_name in (".venv", ".git")
+        }
+        for dbt_project_file_path in dbt_project_file_paths:
+            ignored_dir_paths |= {
+                os.path.normpath(
+                    dir_path / os.path.relpath(ignored_dir_path, resolved_dir_path)
+                )
+                for ignored_dir_path in DbtProject._get_ignored_dir_paths(
+                    dbt_project_file_path.parent,
+                    DbtProject._load_yaml_file(dbt_project_file_path) or {},
+                )
+            }
+        return list(DbtProject._walk_files(dir_path, ignored_dir_paths))
+
+    def _get_dbt_projects_state(self, state_path: pathlib.Path) -> list[DbtProject]:
+        """Initialize the dbt project with only the files of the nodes that are new
+        or modified compared to a previous manifest.
+
+        The dbt project is found without walking the repository (see
+        _find_state_dbt_project_yml), so neither git nor a file system walk is
+        needed.
+
+        Args:
+            state_path: The path to the previous manifest.json file.
+
+        Returns:
+            A list with the dbt project with the files of the modified nodes
+            loaded, or an empty list if the state manifest is of another project.
+        """
+        try:
+            state_manifest = manifest_reader.read_manifest_sections(
+                state_path, ["nodes"]
+            )
+        except (OSError, ValueError) as e:
+            logger.critical(f"Can't read the state manifest {state_path}: {e}")
+            sys.exit(1)
+        state_nodes = state_manifest.get("nodes", {})
+        state_project_name = state_manifest.get("metadata", {}).get("project_name")
+
+        dbt_project_file_path = self._find_state_dbt_project_yml(
+            state_path, state_project_name
+        )
+        if dbt_project_file_path is None:
+            return []
+
+        dbt_project = DbtProject(
+            dbt_project_file_path=dbt_project_file_path,
+            files=[],
+            all_files=False,
+            target=self._target,
+            force_compile=self._force_compile,
+            no_cache=self._no_cache,
+            manifest_sections=self._manifest_sections,
+        )
+        modified_nodes = dbt_project.dbt_manifest.get_modified_nodes(state_nodes)
+        n_added_files = dbt_project.add_nodes_files(modified_nodes)
+        logger.debug(
+            f"{len(modified_nodes)} modified nodes in {dbt_project.name}, "
+            f"{n_added_files} files to process"
+        )
+        return [dbt_project]
+
+    @staticmethod
+    def _find_state_dbt_project_yml(
+        state_path: pathlib.Path, state_project_name: Optional[str]
+    ) -> Optional[pathlib.Path]:
+        """Find the dbt_project.yml file of the dbt project to compare with a
+        previous manifest: the closest one to the current directory (in it or in
+        its parents), or the one next to the target directory of the manifest.
+        If the manifest has a project name in its metadata, the dbt project must
+        have that name.
+
+        Args:
+            state_path: The path to the previous manifest.json file.
+            state_project_name: The project name in the manifest metadata.
+
+        Returns:
+            The path to the dbt_project.yml file, or None if the dbt projects found
+            are not the project of the manifest.
+        """
+        candidate_paths = []
+        current_path = pathlib.Path(os.getcwd())
+        for dir_path in [current_path, *current_path.parents]:
+            if (dir_path / "dbt_project.yml").exists():
+                candidate_paths.append(dir_path / "dbt_project.yml")
+                break
+        state_dbt_project_yml = state_path.resolve().parent.parent / "dbt_project.yml"
+        if state_dbt_project_yml.exists():
+            candidate_paths.append(state_dbt_project_yml)
+
+        if not candidate_paths:
+            logger.critical(
+                "Can't find the dbt project to compare with the state manifest. "
+                "Run dbt-opiner from the dbt project directory."
+            )
+            sys.exit(1)
+
+        for dbt_project_file_path in candidate_paths:
+            dbt_project_name = (
+                DbtProject._load_yaml_file(dbt_project_file_path) or {}
+            ).get("name")
+            if not state_project_name or dbt_project_name == state_project_name:
+                return dbt_project_file_path
+            logger.debug(
+                f"Skipping dbt project {dbt_project_name}, the state manifest "
+                f"is of {state_project_name}"
+            )
+        return None
+
+    def _get_git_changed_files(self, ref: str) -> list[pathlib.Path]:
+        """List the files changed since the merge base of a git ref and the working
+        tree with a single git diff call. Deleted files are not listed.
+
+        Args:
+            ref: The git ref (e.g. origin/main).
+
+        Returns:
+            A list with the paths of the changed files.
+        """
+        git_root_path = self._find_git_root(pathlib.Path(os.getcwd()))
+        try:
+            output = subprocess.run(
+                [
+                    "git",
+                    "diff",
+                    "--name-only",
+                    "-z",
+                    "--diff-filter=d",
+                    "--merge-base",
+                    ref,
+                ],
+                cwd=git_root_path,
+                capture_output=True,
+                check=True,
+                text=True,
+            ).stdout
+        except (OSError, subprocess.CalledProcessError) as e:
+            stderr = getattr(e, "stderr", None) or e
+            logger.critical(f"Can't get the files changed since {ref}: {stderr}")
+            sys.exit(1)
+        changed_files = [
+            git_root_path / path  # type: ignore
+            for path in output.split("\0")
+            if path
+        ]
+        logger.debug(f"{len(changed_files)} files changed since {ref}")
+        return changed_files
+
+    @staticmethod
+    def _add_downstream_files(dbt_project: DbtProject) -> None:
+        """Add the files of the models downstream of the nodes of the dbt project
+        files: the sql file and the docs yaml file of each model.
+        Models of other packages are not added.
+
+        Args:
+            dbt_project: The dbt project with the changed files loaded.
+        """
+        changed_nodes: list[DbtBaseNode] = []
+        for file in dbt_project.files["sql"]:
+            changed_nodes.append(file.dbt_node)  # type: ignore
+        for file in dbt_project.files["yaml"]:
+            changed_nodes.extend(file.dbt_nodes)  # type: ignore
+        if not changed_nodes:
+            return
+
+        downstream_nodes = dbt_project.dbt_manifest.get_downstream_nodes(
+            changed_nodes, resource_type="model"
+        )
+        n_added_files = dbt_project.add_nodes_files(downstream_nodes)
+        logger.debug(f"Added {n_added_files} downstream files to {dbt_project.name}")
+
+    def _find_dbt_project_yml(
+        self, file: pathlib.Path, is_dir: bool = False
+    ) -> Optional[pathlib.Path]:
         """Given a file path, find the dbt_project.yml file in the directory tree.
         Only traverse up the directory tree until the git root directory.
 
         Args:
             file: The file path to start the search from.
+            is_dir: True if the file path is a directory.
 
         Returns: If found, the path to the dbt_project.yml file, otherwise None.
         """
-        git_root_path = self._find_git_root(file)
+        directory = self._resolve_dir(file if is_dir else file.parent)
+        git_root_path = self._find_git_root(directory)
         dbt_project_yml_path = None
         if git_root_path:
-            current_path = file.resolve()
-            while current_path != git_root_path:
-                if (current_path / "dbt_project.yml").exists():
-                    # Keep going up the directory tree to find the closest dbt_project.yml
-                    # to git root directory. This is to avoid finding nested dbt projects.
-                    # The nested file is filtered later in DbtProject._init_files method.
-                    dbt_project_yml_path = current_path / "dbt_project.yml"
+            # Walk up until the git root directory or a directory that was already
+            # looked up for another file
+            dirs_to_check = []
+            current_path = directory
+            while (
+                current_path != git_root_path
+                and current_path not in self._dbt_project_ymls
+            ):
+                dirs_to_check.append(current_path)
                 current_path = current_path.parent
+            dbt_project_yml_path = self._dbt_project_ymls.get(current_path)
+
+            # Keep the dbt_project.yml closest to git root directory. This is to avoid
+            # finding nested dbt projects. The nested file is filtered later in
+            # DbtProject._init_files method.
+            for current_path in reversed(dirs_to_check):
+                if (
+                    dbt_project_yml_path is None
+                    and (current_path / "dbt_project.yml").exists()
+                ):
+                    dbt_project_yml_path = current_path / "dbt_project.yml"
+                self._dbt_project_ymls[current_path] = dbt_project_yml_path
 
             if dbt_project_yml_path:
                 logger.debug(
@@ -623,8 +1611,99 @@ class DbtProjectLoader:
             return dbt_project_ymls
         return None
 
+    def _get_git_files_by_dbt_project(
+        self,
+    ) -> Optional[dict[pathlib.Path, list[pathlib.Path]]]:
+        """List the files of the git repository with git ls-files and partition them
+        by the dbt project they belong to, in a single pass over the paths.
+
+        As in _find_all_dbt_project_ymls, nested dbt projects belong to the dbt
+        project closest to the git root directory.
+
+        Returns:
+          A dictionary with the path to each dbt_project.yml file and the list of
+          supported files of the dbt project, or None if git can't list the files.
+        """
+        git_root_path = self._find_git_root(pathlib.Path(os.getcwd()))
+        if not git_root_path:
+            return None  # pragma: no cover
+
+        git_command = ["git", "ls-files", "-z", "--cached"]
+        if self._discovery == "git-untracked":
+            git_command.extend(["--others", "--exclude-standard"])
+        try:
+            listed_files = self._run_git_ls_files(git_command, git_root_path)
+            # Tracked files deleted from the working tree are listed as cached
+            deleted_files = self._run_git_ls_files(
+                ["git", "ls-files", "-z", "--deleted"], git_root_path
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning(f"Can't list files with git, walking directories: {e}")
+            return None
+        relative_paths = sorted(set(listed_files) - set(deleted_files))
+
+        candidate_dirs = [
+            posixpath.dirname(relative_path)
+            for relative_path in relative_paths
+            if posixpath.basename(relative_path) == "dbt_project.yml"
+        ]
+        dbt_project_dirs: set[str] = set()
+        # Shallower directories first, so outer dbt projects are found before
+        # the nested ones
+        for candidate_dir in sorted(candidate_dirs, key=self._path_depth):
+            if not any(
+                self._is_relative_to(candidate_dir, dbt_project_dir)
+                for dbt_project_dir in dbt_project_dirs
+            ):
+                dbt_project_dirs.add(candidate_dir)
+
+        files_by_dbt_project: dict[pathlib.Path, list[pathlib.Path]] = {
+            git_root_path / dbt_project_dir / "dbt_project.yml": []
+            for dbt_project_dir in sorted(dbt_project_dirs)
+        }
+        for relative_path in relative_paths:
+            if posixpath.splitext(relative_path)[1] not in SUPPORTED_FILE_SUFFIXES:
+                continue
+            directory = posixpath.dirname(relative_path)
+            while directory not in dbt_project_dirs and directory:
+                directory = posixpath.dirname(directory)
+            if directory in dbt_project_dirs:
+                files_by_dbt_project[
+                    git_root_path / directory / "dbt_project.yml"
+                ].append(git_root_path / relative_path)
+
+        logger.debug(
+            f"git listed {len(relative_paths)} files in "
+            f"{len(files_by_dbt_project)} dbt projects"
+        )
+        return files_by_dbt_project
+
+    @staticmethod
+    def _run_git_ls_files(
+        git_command: list[str], git_root_path: pathlib.Path
+    ) -> list[str]:
+        output = subprocess.run(
+            git_command, cwd=git_root_path, capture_output=True, check=True, text=True
+        ).stdout
+        return [path for path in output.split("\0") if path]
+
+    @staticmethod
+    def _path_depth(path: str) -> int:
+        return path.count("/") + 1 if path else 0
+
     @staticmethod
-    def _find_git_root(path: pathlib.Path) -> Optional[pathlib.Path]:
+    def _is_relative_to(path: str, other_path: str) -> bool:
+        """Check if a relative posix path is other_path or inside it."""
+        return (
+            other_path == "" or path == other_path or path.startswith(other_path + "/")
+        )
+
+    def _resolve_dir(self, path: pathlib.Path) -> pathlib.Path:
+        if path not in self._resolved_dirs:
+            self._resolved_dirs[path] = path.resolve()
+        return self._resolved_dirs[path]
+
+    def _find_git_root(self, path: pathlib.Path) -> Optional[pathlib.Path]:
         """Given a path to a file or directory, find the root of the git repository.
 
         Args:
@@ -632,15 +1711,26 @@ class DbtProjectLoader:
 
         Returns: The path to the git root directory, otherwise None.
         """
-        current_path = path.resolve()
+        visited_paths = []
+        git_root_path = None
+        current_path = self._resolve_dir(path)
         while current_path != current_path.parent:
+            if current_path in self._git_roots:
+                git_root_path = self._git_roots[current_path]
+                break
+            visited_paths.append(current_path)
             if (current_path / ".git").exists():
                 logger.debug(f"git root is: {current_path}")
-                return current_path
+                git_root_path = current_path
+                break
             current_path = current_path.parent
+        for visited_path in visited_paths:
+            self._git_roots[visited_path] = git_root_path
 
-        logger.error("Not a git repository")
-        raise FileNotFoundError("Not a git repository")
+        if git_root_path is None:
+            logger.error("Not a git repository")
+            raise FileNotFoundError("Not a git repository")
+        return git_root_path
 
 
 def run_dbt_command(
@@ -1,12 +1,19 @@
+import contextlib
 import pathlib
 import sys
 import time
+from typing import Iterator
 from typing import Optional
 
 from loguru import logger
 
+from dbt_opiner import cache
+from dbt_opiner import config_singleton
 from dbt_opiner import dbt
+from dbt_opiner import file_handlers
 from dbt_opiner import linter
+from dbt_opiner import sinks
+from dbt_opiner import timings
 from dbt_opiner.opinions import opinions_pack
 
 
@@ -17,6 +24,20 @@ def lint(
     force_compile: bool = False,
     no_ignore: bool = False,
     output_file: Optional[str] = None,
+    no_cache: bool = False,
+    jobs: int = 1,
+    discovery: str = "walk",
+    output_format: str = "md",
+    stream: bool = False,
+    stream_sort: bool = False,
+    changed_since: Optional[str] = None,
+    with_children: bool = False,
+    state: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+    show_timings: bool = False,
+    timings_file: Optional[str] = None,
+    profile_opinions: bool = False,
+    profile_opinions_file: Optional[str] = None,
 ) -> None:
     """Lint the dbt project using the dbt-opiner package.
 
@@ -25,30 +46,85 @@ def lint(
         all_files: Flag to lint all files. Defaults to False.
         target: Target to run the dbt project. Defaults to None.
         force_compile: Flag to force compile the dbt project. Defaults to False
+        no_ignore: Flag to ignore the no qa configurations. Defaults to False.
         output_file: Output file to save the linting results. Defaults to None.
+        no_cache: Flag to disable the configured caches. Defaults to False.
+        jobs: Number of processes used to parse the models sql code and to lint
+            the files. Defaults to 1.
+        discovery: How to find the files when processing all files: walk, git or
+            git-untracked. Defaults to walk.
+        output_format: Format of the output file: md or ndjson. Defaults to md.
+        stream: Flag to report the results as they are produced instead of
+            sorting them at the end. Defaults to False.
+        stream_sort: Flag to report the results as they are produced, sorted with
+            an external merge sort when linting finishes. Defaults to False.
+        changed_since: Git ref to lint the files changed since. Defaults to None.
+        with_children: Flag to also lint the models downstream of the changed
+            files. Defaults to False.
+        state: Path to a previous manifest.json to lint only the new or modified
+            nodes. Defaults to None.
+        cache_dir: Directory of the lint results cache. It enables the cache.
+            Defaults to None.
+        show_timings: Flag to log the wall clock and CPU time of each phase.
+            Defaults to False.
+        timings_file: JSON file to write the time of each phase to.
+            Defaults to None.
+        profile_opinions: Flag to log the number of checks, time and results of
+            each opinion. Defaults to False.
+        profile_opinions_file: JSON file to write the profile of the opinions to.
+            Defaults to None.
     """
-    logger.info("Linting dbt projects...")
-    loader = dbt.DbtProjectLoader(target, force_compile)
-
-    dbt_projects = loader.initialize_dbt_projects(
-        changed_files=changed_files, all_files=all_files
+    opinion_profile = (
+        timings.OpinionProfile() if profile_opinions or profile_opinions_file else None
     )
+    with _report_timings(
+        show_timings, timings_file, opinion_profile, profile_opinions_file
+    ):
+        logger.info("Linting dbt projects...")
+        # The models caches stats are reported per run
+        dbt.DbtModel.cache_stats.clear()
+        with timings.phase("load opinions"):
+            opinions_pack_inst = opinions_pack.OpinionsPack(no_ignore)
+        loader = dbt.DbtProjectLoader(
+            target,
+            force_compile,
+            no_cache,
+            manifest_sections=opinions_pack_inst.get_required_manifest_sections(),
+            discovery=discovery,
+        )
 
-    opinions_pack_inst = opinions_pack.OpinionsPack(no_ignore)
-    linter_inst = linter.Linter(opinions_pack_inst, no_ignore)
+        with timings.phase("load dbt projects"):
+            dbt_projects = loader.initialize_dbt_projects(
+                changed_files=changed_files,
+                all_files=all_files,
+                changed_since=changed_since,
+                with_children=with_children,
+                state=state,
+            )
 
-    # TODO: make it parallel?
-    start = time.process_time()
-    for dbt_project in dbt_projects:
-        merged_files = [
-            item for files_list in dbt_project.files.values() for item in files_list
-        ]
-        for file in merged_files:
-            linter_inst.lint_file(file)
-    end = time.process_time()
+        with timings.phase("preparse models"):
+            _preparse_models(dbt_projects, jobs)
+        result_stream = None
+        if stream or stream_sort:
+            result_stream = sinks.ResultStream(
+                sinks.get_lint_sinks(output_file, output_format), sort=stream_sort
+            )
+        linter_inst = linter.Linter(
+            opinions_pack_inst,
+            no_ignore,
+            _get_lint_result_cache(no_cache, cache_dir),
+            opinion_profile,
+            result_stream,
+        )
 
-    logger.info(f"Linting completed in {round(end - start, 3)} seconds")
-    linter_inst.log_results_and_exit(output_file)
+        start = time.perf_counter()
+        _lint_dbt_projects(linter_inst, dbt_projects, jobs)
+        end = time.perf_counter()
+
+        logger.info(f"Linting completed in {round(end - start, 3)} seconds")
+        logger.debug(f"Model caches:\n{dbt.DbtModel.get_cache_stats_summary()}")
+        with timings.phase("report"):
+            linter_inst.log_results_and_exit(output_file, output_format)
 
 
 def audit(
@@ -59,6 +135,16 @@ def audit(
     force_compile: bool = False,
     no_ignore: bool = False,
     output_file: Optional[str] = None,
+    no_cache: bool = False,
+    jobs: int = 1,
+    discovery: str = "walk",
+    stream: bool = False,
+    stream_sort: bool = False,
+    cache_dir: Optional[str] = None,
+    show_timings: bool = False,
+    timings_file: Optional[str] = None,
+    profile_opinions: bool = False,
+    profile_opinions_file: Optional[str] = None,
 ) -> None:
     """Audit the dbt project using the dbt-opiner package.
 
@@ -72,28 +158,162 @@ def audit(
         force_compile: Flag to force compile the dbt project. Defaults to False
         no_ignore: Flag to ignore the no qa configurations. Defaults to False.
         output_file: Output file to save the linting results. Defaults to None.
+        no_cache: Flag to disable the configured caches. Defaults to False.
+        jobs: Number of processes used to parse the models sql code and to lint
+            the files. Defaults to 1.
+        discovery: How to find the files when processing all files: walk, git or
+            git-untracked. Defaults to walk.
+        stream: Flag to aggregate the results as they are produced instead of
+            keeping them until the end. Defaults to False.
+        stream_sort: Flag to aggregate the results as they are produced, sorting
+            the detailed results with an external merge sort. Defaults to False.
+        cache_dir: Directory of the lint results cache. It enables the cache.
+            Defaults to None.
+        show_timings: Flag to log the wall clock and CPU time of each phase.
+            Defaults to False.
+        timings_file: JSON file to write the time of each phase to.
+            Defaults to None.
+        profile_opinions: Flag to log the number of checks, time and results of
+            each opinion. Defaults to False.
+        profile_opinions_file: JSON file to write the profile of the opinions to.
+            Defaults to None.
     """
-    logger.info("Auditing dbt projects...")
-    loader = dbt.DbtProjectLoader(target, force_compile)
+    opinion_profile = (
+        timings.OpinionProfile() if profile_opinions or profile_opinions_file else None
+    )
+    with _report_timings(
+        show_timings, timings_file, opinion_profile, profile_opinions_file
+    ):
+        logger.info("Auditing dbt projects...")
+        # The models caches stats are reported per run
+        dbt.DbtModel.cache_stats.clear()
+        with timings.phase("load opinions"):
+            opinions_pack_inst = opinions_pack.OpinionsPack(no_ignore)
+        loader = dbt.DbtProjectLoader(
+            target,
+            force_compile,
+            no_cache,
+            manifest_sections=opinions_pack_inst.get_required_manifest_sections(),
+            discovery=discovery,
+        )
 
-    if dbt_project_dir:
-        if (pathlib.Path(dbt_project_dir) / "dbt_project.yml").exists():
-            dbt_projects = loader.initialize_dbt_projects(
-                changed_files=[dbt_project_dir]
+        with timings.phase("load dbt projects"):
+            if dbt_project_dir:
+                if (pathlib.Path(dbt_project_dir) / "dbt_project.yml").exists():
+                    dbt_projects = loader.initialize_dbt_projects(
+                        changed_files=[dbt_project_dir]
+                    )
+                else:
+                    logger.critical(f"Directory {dbt_project_dir} is not a dbt project")
+                    sys.exit(1)
+            else:
+                dbt_projects = loader.initialize_dbt_projects(all_files=True)
+
+        with timings.phase("preparse models"):
+            _preparse_models(dbt_projects, jobs)
+        audit_sink = None
+        result_stream = None
+        if stream or stream_sort:
+            # The detailed results are only kept if they are logged
+            audit_sink = sinks.AuditSink(keep_detailed=type in ["all", "detailed"])
+            result_stream = sinks.ResultStream([audit_sink], sort=stream_sort)
+        linter_inst = linter.Linter(
+            opinions_pack_inst,
+            no_ignore,
+            _get_lint_result_cache(no_cache, cache_dir),
+            opinion_profile,
+            result_stream,
+        )
+        _lint_dbt_projects(linter_inst, dbt_projects, jobs)
+        logger.debug(f"Model caches:\n{dbt.DbtModel.get_cache_stats_summary()}")
+
+        with timings.phase("report"):
+            linter_inst.log_audit_and_exit(
+                type=type,
+                format=format,
+                output_file=output_file,
+                aggregator=audit_sink.aggregator if audit_sink else None,
             )
-        else:
-            logger.critical(f"Directory {dbt_project_dir} is not a dbt project")
-            sys.exit(1)
-    else:
-        dbt_projects = loader.initialize_dbt_projects(all_files=True)
-
-    opinions_pack_inst = opinions_pack.OpinionsPack(no_ignore)
-    linter_inst = linter.Linter(opinions_pack_inst, no_ignore)
+
+
+@contextlib.contextmanager
+def _report_timings(
+    show_timings: bool,
+    timings_file: Optional[str],
+    opinion_profile: Optional[timings.OpinionProfile] = None,
+    opinion_profile_file: Optional[str] = None,
+) -> Iterator[None]:
+    """Time the phases of the run and report them and the opinions profile when it
+    finishes, even if it exits with the lint results exit code."""
+    timings.get_timings().reset()
+    try:
+        yield
+    finally:
+        if show_timings:
+            logger.info(f"Timings:\n{timings.get_timings().get_summary()}")
+        if timings_file:
+            timings.get_timings().write_json(timings_file)
+            logger.info(f"Timings written to {timings_file}")
+        if opinion_profile is not None:
+            logger.info(f"Opinions profile:\n{opinion_profile.get_summary()}")
+            if opinion_profile_file:
+                opinion_profile.write_json(opinion_profile_file)
+                logger.info(f"Opinions profile written to {opinion_profile_file}")
+
+
+def _lint_dbt_projects(
+    linter_inst: linter.Linter, dbt_projects: list[dbt.DbtProject], jobs: int
+) -> None:
+    """Lint the files of the dbt projects, timing each dbt project."""
     for dbt_project in dbt_projects:
-        merged_files = [
-            item for files_list in dbt_project.files.values() for item in files_list
-        ]
-        for file in merged_files:
-            linter_inst.lint_file(file)
+        with timings.phase("lint", dbt_project.name):
+            linter_inst.lint_files(_get_files([dbt_project]), jobs)
+
+
+def _get_lint_result_cache(
+    no_cache: bool, cache_dir: Optional[str]
+) -> Optional[cache.LintResultCache]:
+    """Returns the lint results cache if it's enabled in the configuration or with
+    a cache directory, and caches are not disabled."""
+    config = config_singleton.ConfigSingleton().get_config()
+    cache_config = config.get("cache", {})
+    if no_cache or not (cache_dir or cache_config.get("lint_results", False)):
+        return None
+    cache_dir_path = (
+        pathlib.Path(cache_dir) if cache_dir else cache.get_user_cache_dir()
+    )
+    return cache.LintResultCache(
+        cache_dir_path / "lint_results.sqlite3",
+        max_size_bytes=cache_config.get("lint_results_max_size_mb", 100) * 1024 * 1024,
+        config=config,
+    )
+
 
-    linter_inst.log_audit_and_exit(type=type, format=format, output_file=output_file)
+def _get_files(dbt_projects: list[dbt.DbtProject]) -> list[file_handlers.FileHandler]:
+    """Returns the files of the dbt projects in the order they are linted."""
+    return [
+        file
+        for dbt_project in dbt_projects
+        for files_list in dbt_project.files.values()
+        for file in files_list
+    ]
+
+
+def _preparse_models(dbt_projects: list[dbt.DbtProject], jobs: int) -> None:
+    """Parse the sql code of the models of the files to lint in parallel."""
+    if jobs <= 1:
+        # Don't resolve the dbt nodes of the files if models are not preparsed
+        return
+    models = {}
+    for dbt_project in dbt_projects:
+        for files_list in dbt_project.files.values():
+            for file in files_list:
+                nodes = []
+                if isinstance(file, file_handlers.SqlFileHandler):
+                    nodes = [file.dbt_node]
+                elif isinstance(file, file_handlers.YamlFileHandler):
+                    nodes = file.dbt_nodes
+                for node in nodes:
+                    if isinstance(node, dbt.DbtModel):
+                        models[id(node)] = node
+    dbt.DbtModel.preparse(models.values(), jobs)
@@ -1,4 +1,5 @@
 import abc
+import os
 import pathlib
 import re
 import sys
@@ -14,9 +15,16 @@ if TYPE_CHECKING:
     from dbt_opiner.dbt import DbtMacro, DbtBaseNode, DbtModel
 
 
+_NO_QA_ALL_REGEX = re.compile(r"noqa: dbt-opiner all")
+_NO_QA_REGEX = re.compile(r"noqa: dbt-opiner ([\w\d, ]+)")
+
+
 class FileHandler(abc.ABC):
     """Abstract class for handling files.
 
+    The file content, its no_qa_opinions and dbt nodes are loaded the first time
+    they are accessed, so files that no opinion applies to are not read.
+
     Attributes:
         path: Path to the file.
         type: File extension.
@@ -40,8 +48,14 @@ class FileHandler(abc.ABC):
         self.path = file_path
         self.type = self.path.suffix
         self._content: Optional[str] = None
-        self.no_qa_opinions = self._get_no_qa_opinions(self.content)
+        self._no_qa_opinions: Optional[list[str]] = None
         self.parent_dbt_project = parent_dbt_project
+        # Handlers of a dbt project share its noqa index. Without one (e.g. a mock
+        # dbt project) the handler uses its own index.
+        no_qa_index = getattr(parent_dbt_project, "no_qa_index", None)
+        self._no_qa_index = (
+            no_qa_index if isinstance(no_qa_index, NoQaIndex) else NoQaIndex()
+        )
 
     @property
     def content(self) -> str:
@@ -50,6 +64,22 @@ class FileHandler(abc.ABC):
             self._content = self._read_content()
         return self._content
 
+    @property
+    def no_qa_opinions(self) -> list[str]:
+        """Gets the no_qa_opinions of the file content and its related files.
+        The file is read the first time they are accessed."""
+        if self._no_qa_opinions is None:
+            self._no_qa_opinions = self._get_no_qa_opinions(self.content)
+            # Share the directives of this file with the handlers of related files
+            self._no_qa_index.add(self.path, self._no_qa_opinions)
+            self._add_no_qa_opinions_from_related_files()
+        return self._no_qa_opinions
+
+    def _add_no_qa_opinions_from_related_files(self) -> None:
+        """Add the no_qa_opinions of the files related to this file.
+        Subclasses with related files (e.g. docs yaml files) override it."""
+        pass
+
     @staticmethod
     def _get_no_qa_opinions(content: str) -> list[str]:
         """Get the no_qa_opinions from a string.
@@ -58,33 +88,31 @@ class FileHandler(abc.ABC):
         Returns:
             List of no_qa_opinions.
         """
-        if re.search(r"noqa: dbt-opiner all", content):
+        if _NO_QA_ALL_REGEX.search(content):
             return ["all"]
-        matches: list[str] = re.findall(r"noqa: dbt-opiner ([\w\d, ]+)", content)
-        if matches:
-            return matches[0].split(", ")
+        match = _NO_QA_REGEX.search(content)
+        if match:
+            return match.group(1).split(", ")
         return []
 
     def _add_no_qa_opinions_from_other_file(self, other_file_path: str) -> None:
         """Add no_qa_opinions from another file to the current file.
 
         We use this to add the no_qa_opinions from SQL and YAML files that are related.
+        The directives are looked up in the noqa index of the dbt project, so each
+        related file is read only once.
 
         Args:
-            other_file_path: Str path to the file to get the no_qa_opinions from.
-                             It's a string because dbt provides incomplete paths and we need to reconstruct them.
+            other_file_path: Str path to the file to get the no_qa_opinions from,
+                             relative to the dbt project directory (from the manifest).
         """
-        current_file_parts = list(self.path.resolve().parent.parts)
-        other_file_parts = list(
-            pathlib.Path(other_file_path).parts
-        )  # Comes from manifest
-        index = current_file_parts.index(other_file_parts[0])
-        final_path = current_file_parts[:index] + other_file_parts
-        sql_file_path = pathlib.Path(*final_path)
-
-        with sql_file_path.open("r") as file:
-            content = file.read()
-        self.no_qa_opinions.extend(self._get_no_qa_opinions(content))
+        if "://" in other_file_path:
+            # patch_path is prefixed with the package name
+            other_file_path = other_file_path.split("://", 1)[1]
+        file_path = self.parent_dbt_project.dbt_project_dir_path / other_file_path
+        no_qa_opinions = self._no_qa_index.get(file_path)
+        assert self._no_qa_opinions is not None
+        self._no_qa_opinions.extend(no_qa_opinions)
 
     def _read_content(self) -> str:
         try:
@@ -129,9 +157,17 @@ class SqlFileHandler(FileHandler):
                 f"SqlFileHandler requires a .sql file, got {file_path.suffix}"
             )
         super().__init__(file_path, parent_dbt_project)
-        self._find_node_for_file()
+        self._dbt_node: Optional["DbtModel" | "DbtMacro" | "DbtBaseNode"] = None
 
-    def _find_node_for_file(self) -> None:
+    @property
+    def dbt_node(self) -> "DbtModel | DbtMacro | DbtBaseNode":
+        """Gets the dbt node of the file. It's searched in the manifest the first
+        time it's accessed."""
+        if self._dbt_node is None:
+            self._dbt_node = self._find_node_for_file()
+        return self._dbt_node
+
+    def _find_node_for_file(self) -> "DbtModel | DbtMacro | DbtBaseNode":
         """
         Find the dbt node associated with the file from the manifest.
         The node can be a model, macro or test (to be added) depending
@@ -156,39 +192,47 @@ class SqlFileHandler(FileHandler):
             )
             sys.exit(1)
 
-        self.dbt_node: "DbtModel" | "DbtMacro" | "DbtBaseNode" = node
+        return node
 
+    def _add_no_qa_opinions_from_related_files(self) -> None:
+        """Add the no_qa_opinions of the docs yaml file of the dbt node."""
         if self.dbt_node.docs_yml_file_path:
-            self._add_no_qa_opinions_from_other_file(self.dbt_node.docs_yml_file_path)
+            self._add_no_qa_opinions_from_other_file(self.dbt_node.get("patch_path"))
 
     def _find_macro_node(self, dbt_manifest: "DbtManifest") -> Optional["DbtMacro"]:
-        return next(
-            (
-                macro
-                for macro in dbt_manifest.macros.values()
-                if macro.original_file_path in str(self.path)
-            ),
-            None,
+        return self._first_node(
+            dbt_manifest.get_macros_by_file_path(
+                self.path, self.parent_dbt_project.dbt_project_dir_path
+            )
         )
 
     def _find_test_node(self, dbt_manifest: "DbtManifest") -> Optional["DbtBaseNode"]:
-        return next(
-            (
-                node
-                for node in dbt_manifest.nodes.values()
-                if node.original_file_path in str(self.path)
-            ),
-            None,
+        return self._first_node(
+            dbt_manifest.get_nodes_by_file_path(
+                self.path, self.parent_dbt_project.dbt_project_dir_path
+            )
         )
 
     def _find_model_node(self, dbt_manifest: "DbtManifest") -> Optional["DbtModel"]:
+        return self._first_node(
+            dbt_manifest.get_nodes_by_file_path(
+                self.path,
+                self.parent_dbt_project.dbt_project_dir_path,
+                resource_type="model",
+            )
+        )
+
+    def _first_node(self, nodes: list[Any]) -> Optional[Any]:
+        """Returns the first node, preferring nodes of the file's own dbt project
+        over nodes of installed packages that share the same relative path.
+        """
         return next(
             (
-                model
-                for model in dbt_manifest.model_nodes.values()
-                if model.original_file_path in str(self.path)
+                node
+                for node in nodes
+                if node.get("package_name") == self.parent_dbt_project.name
             ),
-            None,
+            next(iter(nodes), None),
         )
         # TODO: Add the raw yaml patch content as a property
         # TODO: Add catalog entry to the file handler
@@ -230,23 +274,32 @@ class YamlFileHandler(FileHandler):
         super().__init__(file_path, parent_dbt_project)
         self._dict: Optional[dict[str, Any]] = None
         self.type = ".yaml"
+        self._dbt_nodes: Optional[list["DbtBaseNode"]] = None
 
-        # Search for the node in the manifest by the file name in patch
-        # A yml file can have more than one dbt node
-        self.dbt_nodes = []
-        dbt_manifest = parent_dbt_project.dbt_manifest
-        if dbt_manifest:
-            self.dbt_nodes = [
-                node
-                for node in dbt_manifest.nodes.values()
-                if str(node.docs_yml_file_path) in str(file_path)
-            ]
+    @property
+    def dbt_nodes(self) -> list["DbtBaseNode"]:
+        """Gets the dbt nodes of the file. They are searched in the manifest the
+        first time they are accessed."""
+        if self._dbt_nodes is None:
+            # Search for the node in the manifest by the file name in patch
+            # A yml file can have more than one dbt node
+            self._dbt_nodes = []
+            dbt_manifest = self.parent_dbt_project.dbt_manifest
+            if dbt_manifest:
+                self._dbt_nodes = list(
+                    dbt_manifest.get_nodes_by_patch_path(
+                        self.path,
+                        self.parent_dbt_project.dbt_project_dir_path,
+                        package_name=self.parent_dbt_project.name,
+                    )
+                )
+        return self._dbt_nodes
 
-            # If we have a dbt node, get the no_qa_opinions from the sql file
-            # and append to the ignored opinions of the yaml file
-            if self.dbt_nodes:
-                for node in self.dbt_nodes:
-                    self._add_no_qa_opinions_from_other_file(node.original_file_path)
+    def _add_no_qa_opinions_from_related_files(self) -> None:
+        """Add the no_qa_opinions of the sql files of the dbt nodes, so they are
+        also ignored in the yaml file."""
+        for node in self.dbt_nodes:
+            self._add_no_qa_opinions_from_other_file(node.original_file_path)
 
     def to_dict(self) -> dict[str, Any]:
         """Returns the YAML file content as a dictionary."""
@@ -298,3 +351,47 @@ class MarkdownFileHandler(FileHandler):
                 f"MarkdownFileHandler requires a .md file, got {file_path.suffix}"
             )
         super().__init__(file_path, parent_dbt_project)
+
+
+class NoQaIndex:
+    """Index of the noqa directives of the files of a dbt project.
+
+    SQL and YAML files add the directives of their related files (the docs yaml of a
+    model and the sql files of the models documented in a yaml). The index keeps the
+    directives of every file by path, so each file is read at most once.
+
+    Methods:
+        add: Add the directives of a file that was already read.
+        get: Get the directives of a file, reading it if it's not indexed yet.
+    """
+
+    def __init__(self) -> None:
+        self._no_qa_opinions: dict[str, list[str]] = {}
+
+    @staticmethod
+    def _key(file_path: pathlib.Path) -> str:
+        return os.path.normpath(os.path.abspath(file_path))
+
+    def add(self, file_path: pathlib.Path, no_qa_opinions: list[str]) -> None:
+        """Add the directives of a file that was already read.
+
+        Args:
+            file_path: Path to the file.
+            no_qa_opinions: The noqa directives of the file.
+        """
+        self._no_qa_opinions[self._key(file_path)] = list(no_qa_opinions)
+
+    def get(self, file_path: pathlib.Path) -> list[str]:
+        """Get the directives of a file, reading it if it's not indexed yet.
+
+        Args:
+            file_path: Path to the file.
+
+        Returns:
+            A copy of the list of noqa directives of the file.
+        """
+        key = self._key(file_path)
+        if key not in self._no_qa_opinions:
+            with open(key, "r") as file:
+                self._no_qa_opinions[key] = FileHandler._get_no_qa_opinions(file.read())
+        return list(self._no_qa_opinions[key])
@@ -1,20 +1,28 @@
-import io
+import concurrent.futures
+import multiprocessing
+import pathlib
 import re
 import sys
-from collections import defaultdict
-from collections import OrderedDict
+import time
+from collections import Counter
 from dataclasses import dataclass
 from enum import Enum
+from typing import Any
 from typing import Optional
 from typing import TYPE_CHECKING
 
-import pandas as pd
 from loguru import logger
 
+from dbt_opiner import audit
+from dbt_opiner import cache
 from dbt_opiner import config_singleton
+from dbt_opiner import dbt
 from dbt_opiner import file_handlers
+from dbt_opiner import timings
 
 if TYPE_CHECKING:
+    from dbt_opiner import sinks  # pragma: no cover
+    from dbt_opiner.opinions.base_opinion import BaseOpinion  # pragma: no cover
     from dbt_opiner.opinions.opinions_pack import OpinionsPack  # pragma: no cover
 
 
@@ -71,26 +79,104 @@ class LintResult:
             return self.opinion_code > other.opinion_code
 
 
+# Fields of the parents of the dbt nodes of a file that are part of its cache key
+CACHED_PARENT_NODE_KEYS = ("resource_type", "database", "schema", "alias", "name")
+
+# Linter and files inherited by the forked processes of Linter.lint_files
+_worker_state: Optional[tuple["Linter", list[file_handlers.FileHandler]]] = None
+
+
+def _lint_file_in_worker(
+    file_index: int,
+) -> tuple[
+    list[tuple[Any, ...]], int, int, list[tuple[Any, ...]], Counter[str], Counter[str]
+]:
+    """Lint a file in a worker process and return the picklable fields of the
+    results (all but the file handler), the hits and misses of the result cache,
+    the samples of the opinions profile, the skipped checks and the hits and misses
+    of the models caches."""
+    linter_inst, files = _worker_state  # type: ignore
+    model_cache_stats = Counter(dbt.DbtModel.cache_stats)
+    linter_inst._lint_results = []
+    linter_inst._skipped_checks = Counter()
+    # Results are reported by the parent process
+    linter_inst._result_stream = None
+    result_cache = linter_inst._result_cache
+    hits, misses = (result_cache.hits, result_cache.misses) if result_cache else (0, 0)
+    opinion_profile = linter_inst._opinion_profile
+    n_samples = len(opinion_profile.samples) if opinion_profile else 0
+    linter_inst.lint_file(files[file_index])
+    if result_cache:
+        hits, misses = result_cache.hits - hits, result_cache.misses - misses
+    return (
+        [
+            (
+                result.opinion_code,
+                result.passed,
+                result.severity,
+                result.message,
+                result.tags,
+            )
+            for result in linter_inst._lint_results
+        ],
+        hits,
+        misses,
+        opinion_profile.samples[n_samples:] if opinion_profile else [],
+        linter_inst._skipped_checks,
+        dbt.DbtModel.cache_stats - model_cache_stats,
+    )
+
+
 class Linter:
     """Perform linting operations on dbt project files and log the results.
 
     Methods:
         lint_file: Lint a file with the loaded opinions.
+        lint_files: Lint a list of files, optionally in parallel.
         get_lint_results: Get the lint results sorted by severity and opinion code.
         log_results_and_exit: Log the lint results and exit with the appropriate code.
 
     """
 
-    def __init__(self, opinions_pack: "OpinionsPack", no_ignore: bool = False) -> None:
+    def __init__(
+        self,
+        opinions_pack: "OpinionsPack",
+        no_ignore: bool = False,
+        result_cache: Optional[cache.LintResultCache] = None,
+        opinion_profile: Optional[timings.OpinionProfile] = None,
+        result_stream: Optional["sinks.ResultStream"] = None,
+    ) -> None:
         """
         Args:
             opinions_pack: OpinionsPack object containing the opinions to be checked.
             no_ignore: If True, ignore all the no qa configs.
+            result_cache: Cache of the results of previous runs. Results of unchanged
+                files, nodes, opinions and configuration are reused from it.
+            opinion_profile: If provided, the time and results of each opinion check
+                are recorded in it.
+            result_stream: If provided, the results are reported to it as they are
+                produced instead of being kept until the end.
         """
         self._lint_results: list[LintResult] = []
+        self._result_stream = result_stream
+        # Position of the files in the order they were passed to lint_files,
+        # to sort the streamed results as if they were linted in that order
+        self._file_positions: dict[int, tuple[int, int]] = {}
+        self._lint_files_calls = 0
+        # Number of checks of each opinion skipped because it doesn't apply to
+        # the linted files
+        self._skipped_checks: Counter[str] = Counter()
         self._no_ignore = no_ignore
+        self._result_cache = result_cache
+        self._opinion_profile = opinion_profile
         self._config = config_singleton.ConfigSingleton().get_config()
         self.opinions = opinions_pack.get_opinions()
+        # Opinions that apply to a file handler class and resource types.
+        # Built lazily because there are only a few keys.
+        self._dispatch_table: dict[
+            type[file_handlers.FileHandler], list["BaseOpinion"]
+        ] = {}
+        self._file_names_regexes: dict[str, re.Pattern[str]] = {}
 
     def lint_file(
         self,
@@ -103,7 +189,15 @@ class Linter:
         """
         logger.debug(f"Linting file {file.path}")
 
+        # Opinions are filtered by file handler and file name before checking noqa,
+        # so the file is not read (nor its dbt node resolved) if none applies.
+        candidate_opinions = self._get_candidate_opinions(file)
         for opinion in self.opinions:
+            if opinion not in candidate_opinions:
+                self._skipped_checks[opinion.code] += 1
+        applicable_opinions: Optional[list["BaseOpinion"]] = None
+        file_key: Optional[str] = None
+        for opinion in candidate_opinions:
             if not self._no_ignore:
                 # Check file no_qa
                 if opinion.code in file.no_qa_opinions or "all" in file.no_qa_opinions:
@@ -120,9 +214,34 @@ class Linter:
                         logger.debug(f"Skipping opinion {opinion.code} because of noqa")
                         continue
 
+            if applicable_opinions is None:
+                applicable_opinions = self._filter_by_resource_types(
+                    file, candidate_opinions
+                )
+            if opinion not in applicable_opinions:
+                self._skipped_checks[opinion.code] += 1
+                continue
+
             logger.debug(f"Checking opinion {opinion.code}")
 
-            lint_result = opinion.check_opinion(file)
+            lint_result: Optional[LintResult | list[LintResult]]
+            if self._result_cache is not None and file_key is None:
+                file_key = self._get_file_key(self._result_cache, file)
+            start = time.perf_counter()
+            if self._result_cache is not None and file_key is not None:
+                lint_result = self._check_opinion_with_cache(
+                    self._result_cache, file_key, opinion, file
+                )
+            else:
+                lint_result = opinion.check_opinion(file)
+            if self._opinion_profile is not None:
+                self._profile_check(
+                    self._opinion_profile,
+                    opinion,
+                    file,
+                    time.perf_counter() - start,
+                    lint_result,
+                )
             if lint_result:
                 logger.debug(f"Lint Result: {lint_result}")
 
@@ -130,9 +249,262 @@ class Linter:
                 # so sometimes lint results are a list for the same yml file but different nodes
                 if isinstance(lint_result, list):
                     for result in lint_result:
-                        self._lint_results.append(result)
+                        self._add_result(result)
                 else:
-                    self._lint_results.append(lint_result)
+                    self._add_result(lint_result)
+
+    def _add_result(self, result: LintResult) -> None:
+        if self._result_stream is not None:
+            self._result_stream.add(
+                result, self._file_positions.get(id(result.file), (0, 0))
+            )
+        else:
+            self._lint_results.append(result)
+
+    @staticmethod
+    def _profile_check(
+        opinion_profile: timings.OpinionProfile,
+        opinion: "BaseOpinion",
+        file: file_handlers.FileHandler,
+        wall_time: float,
+        lint_result: Optional[LintResult | list[LintResult]],
+    ) -> None:
+        """Record the time and the results of an opinion check."""
+        lint_results = []
+        if lint_result:
+            lint_results = (
+                lint_result if isinstance(lint_result, list) else [lint_result]
+            )
+        passed = sum(1 for result in lint_results if result.passed)
+        opinion_profile.add(
+            opinion.code,
+            file.__class__.__name__,
+            wall_time,
+            passed,
+            len(lint_results) - passed,
+        )
+
+    @staticmethod
+    def _get_file_key(
+        result_cache: cache.LintResultCache, file: file_handlers.FileHandler
+    ) -> str:
+        """Returns the cache key of a file: its content, its linked dbt nodes, the
+        nodes they depend on and the dbt project files. Opinions can read the
+        parents of the nodes (e.g. L002) and the dbt project configuration
+        (e.g. P002), so a change in them must invalidate the cached results."""
+        nodes: list[Any] = []
+        if isinstance(file, file_handlers.SqlFileHandler):
+            nodes = [file.dbt_node]
+        elif isinstance(file, file_handlers.YamlFileHandler):
+            nodes = file.dbt_nodes
+
+        parent_nodes = []
+        dbt_manifest = file.parent_dbt_project.dbt_manifest
+        if dbt_manifest is not None:
+            for node in nodes:
+                for parent_id in node.get("depends_on", {}).get("nodes", []):
+                    parent = dbt_manifest.nodes.get(
+                        parent_id, dbt_manifest.sources.get(parent_id)
+                    )
+                    parent_fields = {"unique_id": parent_id}
+                    if parent is not None:
+                        for key in CACHED_PARENT_NODE_KEYS:
+                            parent_fields[key] = parent.get(key)
+                    parent_nodes.append(parent_fields)
+
+        project_files = [file.parent_dbt_project.dbt_project_file_path]
+        if file.parent_dbt_project.dbt_profile_path is not None:
+            project_files.append(file.parent_dbt_project.dbt_profile_path)
+        return result_cache.get_file_key(
+            file.path,
+            file.content,
+            [dict(node.items()) for node in nodes],
+            parent_nodes,
+            project_files,
+        )
+
+    @staticmethod
+    def _check_opinion_with_cache(
+        result_cache: cache.LintResultCache,
+        file_key: str,
+        opinion: "BaseOpinion",
+        file: file_handlers.FileHandler,
+    ) -> list[LintResult]:
+        """Check an opinion on a file, reusing the cached results if the file and
+        the opinion didn't change since they were cached."""
+        cached_results = result_cache.get_results(file_key, opinion)
+        if cached_results is not None:
+            logger.debug(f"Reusing cached results of opinion {opinion.code}")
+            return [
+                LintResult(file, code, passed, OpinionSeverity[severity], message, tags)
+                for code, passed, severity, message, tags in cached_results
+            ]
+
+        lint_result = opinion.check_opinion(file)
+        lint_results = []
+        if lint_result:
+            lint_results = (
+                lint_result if isinstance(lint_result, list) else [lint_result]
+            )
+        result_cache.set_results(
+            file_key,
+            opinion,
+            [
+                [
+                    result.opinion_code,
+                    result.passed,
+                    result.severity.name,
+                    result.message,
+                    result.tags,
+                ]
+                for result in lint_results
+            ],
+        )
+        return lint_results
+
+    def lint_files(self, files: list[file_handlers.FileHandler], jobs: int = 1) -> None:
+        """Lint files with the loaded opinions and add the results to the lint results,
+        or report them to the result stream.
+
+        With more than one job, files are linted in forked worker processes, which
+        inherit the loaded projects and opinions instead of pickling them.
+        Workers send back the results without the file handler and they are merged
+        in the order of the files, so the results are the same as linting serially.
+
+        Args:
+            files: The file handlers to be linted.
+            jobs: The number of processes. Files are linted serially if it's 1 or
+                less, or if processes can't be forked in this platform.
+        """
+        self._skipped_checks = Counter()
+        if self._result_stream is not None:
+            self._lint_files_calls += 1
+            self._file_positions = {
+                id(file): (self._lint_files_calls, i) for i, file in enumerate(files)
+            }
+            # The yaml results must be reported before the results of their sql
+            # files to deduplicate them
+            files = sorted(
+                files,
+                key=lambda file: not isinstance(file, file_handlers.YamlFileHandler),
+            )
+        if jobs > 1 and "fork" not in multiprocessing.get_all_start_methods():
+            logger.debug("Processes can't be forked. Linting files serially.")
+            jobs = 1
+        if jobs > 1 and len(files) > 1:
+            self._lint_files_in_processes(files, min(jobs, len(files)))
+        else:
+            for file in files:
+                self.lint_file(file)
+
+        logger.debug(
+            f"Skipped {sum(self._skipped_checks.values())} of "
+            f"{len(files) * len(self.opinions)} opinion checks not applicable to "
+            f"the files: {dict(sorted(self._skipped_checks.items()))}"
+        )
+        if self._result_cache is not None:
+            logger.debug(
+                f"Lint results cache: {self._result_cache.hits} hits, "
+                f"{self._result_cache.misses} misses"
+            )
+
+    def _get_applicable_opinions(
+        self, file: file_handlers.FileHandler
+    ) -> list["BaseOpinion"]:
+        """Returns the opinions that apply to a file.
+
+        Opinions are filtered by the file handler class and the file name, and then
+        by the resource types of the file dbt nodes.
+        """
+        return self._filter_by_resource_types(file, self._get_candidate_opinions(file))
+
+    def _get_candidate_opinions(
+        self, file: file_handlers.FileHandler
+    ) -> list["BaseOpinion"]:
+        """Returns the opinions that apply to the file handler class and the file
+        name. Neither the file content nor its dbt nodes are needed for it.
+
+        Opinions are looked up in the dispatch table by the file handler class.
+        """
+        if file.__class__ not in self._dispatch_table:
+            self._dispatch_table[file.__class__] = [
+                opinion
+                for opinion in self.opinions
+                if isinstance(file, tuple(opinion.applies_to_file_handlers))
+            ]
+
+        file_name = pathlib.Path(file.path).name
+        return [
+            opinion
+            for opinion in self._dispatch_table[file.__class__]
+            if self._get_file_names_regex(opinion.applies_to_file_names).fullmatch(
+                file_name
+            )
+        ]
+
+    @staticmethod
+    def _filter_by_resource_types(
+        file: file_handlers.FileHandler, opinions: list["BaseOpinion"]
+    ) -> list["BaseOpinion"]:
+        """Returns the opinions that apply to the resource types of the file dbt
+        nodes. The dbt nodes are only resolved if an opinion is restricted to some
+        resource types."""
+        if all(opinion.applies_to_resource_types is None for opinion in opinions):
+            return opinions
+
+        resource_types: frozenset[str] = frozenset()
+        if isinstance(file, file_handlers.SqlFileHandler):
+            resource_types = frozenset([file.dbt_node.type])
+        elif isinstance(file, file_handlers.YamlFileHandler):
+            resource_types = frozenset(node.type for node in file.dbt_nodes)
+
+        return [
+            opinion
+            for opinion in opinions
+            if opinion.applies_to_resource_types is None
+            or not resource_types.isdisjoint(opinion.applies_to_resource_types)
+        ]
+
+    def _get_file_names_regex(self, pattern: str) -> re.Pattern[str]:
+        if pattern not in self._file_names_regexes:
+            self._file_names_regexes[pattern] = re.compile(pattern)
+        return self._file_names_regexes[pattern]
+
+    def _lint_files_in_processes(
+        self, files: list[file_handlers.FileHandler], jobs: int
+    ) -> None:
+        global _worker_state
+        _worker_state = (self, files)
+        try:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=jobs, mp_context=multiprocessing.get_context("fork")
+            ) as executor:
+                for file, (
+                    results,
+                    hits,
+                    misses,
+                    samples,
+                    skipped,
+                    model_cache_stats,
+                ) in zip(
+                    files,
+                    executor.map(
+                        _lint_file_in_worker,
+                        range(len(files)),
+                        chunksize=max(1, len(files) // (jobs * 4)),
+                    ),
+                ):
+                    for result in results:
+                        self._add_result(LintResult(file, *result))
+                    if self._result_cache is not None:
+                        self._result_cache.hits += hits
+                        self._result_cache.misses += misses
+                    if self._opinion_profile is not None:
+                        self._opinion_profile.samples.extend(samples)
+                    self._skipped_checks.update(skipped)
+                    dbt.DbtModel.cache_stats.update(model_cache_stats)
+        finally:
+            _worker_state = None
 
     def get_lint_results(self, deduplicate: bool = False) -> list[LintResult]:
         """Returns list of lint results sorted by severity and
@@ -150,43 +522,42 @@ class Linter:
         return sorted(self._lint_results)
         # TODO: add option to organize results by opinion tags.
 
-    def log_results_and_exit(self, output_file: Optional[str] = None) -> None:
+    def log_results_and_exit(
+        self, output_file: Optional[str] = None, output_format: str = "md"
+    ) -> None:
         """Log the results of the linting and exit with the appropriate code.
+        With a result stream, the results were already reported while linting.
         Args:
           output_file: The file to write the lint results to.
+          output_format: The format of the output file: md or ndjson.
         """
+        # Imported here to avoid a circular import
+        from dbt_opiner import sinks
 
-        exit_code = 0
-        message_lines = ["# ✨ Dbt-opiner lint results\n"]
-        for result in self.get_lint_results(deduplicate=True):
-            message = f"{result.opinion_code} | `{result.file.path}` {result.message}\n"
-            if not result.passed:
-                if result.severity == OpinionSeverity.MUST:
-                    exit_code = 1
-                    logger.error(message)
-                    message_lines.append(f"- ❌ {message}")
-                if result.severity == OpinionSeverity.SHOULD:
-                    logger.warning(message)
-                    message_lines.append(f"- ⚠️ {message}")
-            if result.passed:
-                logger.debug(message)
-        if exit_code == 0:
-            logger.info("All opinions passed!")
-            message_lines.append("✅ All opinions passed!")
-
-        if output_file:
-            with open(output_file, "w") as f:
-                f.writelines(message_lines)
+        result_stream = self._result_stream
+        if result_stream is None:
+            result_stream = sinks.ResultStream(
+                sinks.get_lint_sinks(output_file, output_format), deduplicate=False
+            )
+            for result in self.get_lint_results(deduplicate=True):
+                result_stream.add(result)
+        exit_code = result_stream.close()
         logger.debug(f"Exit with code: {exit_code}")
         sys.exit(exit_code)
 
     def log_audit_and_exit(
-        self, type: str, format: str, output_file: Optional[str] = None
+        self,
+        type: str,
+        format: str,
+        output_file: Optional[str] = None,
+        aggregator: Optional[audit.AuditAggregator] = None,
     ) -> None:
         """Log the audit results and exit.
         Args:
             type: The type of audit to perform. Can be "all", "general", "by_tag", or "detailed".
             output_file: The file to write the audit results to.
+            aggregator: The aggregator the result stream reported the results to.
+                If None, the lint results are aggregated.
         """
         # Change logger setup to make messages more clear
         # Get exiting logger config
@@ -208,36 +579,18 @@ class Linter:
             format="{message}\n",
         )
 
-        audit_results = self._audit()
-
-        def dataframe_to_string(df: pd.DataFrame, format_type: str) -> str:
-            buffer = io.StringIO()
-            if format_type == "md":
-                markdown_str: str = df.to_markdown(index=False)
-                return markdown_str
-            elif format_type == "csv":
-                df.to_csv(buffer, index=False)
-                csv_str: str = buffer.getvalue().strip()
-                return csv_str
-            else:
-                raise ValueError(f"Unsupported format: {format_type}")
+        audit_results = self._audit(aggregator)
 
         if type == "all":
-            for name, df in audit_results.items():
+            for name, table in audit_results.items():
                 title = name.title().replace("_", " ")
-                logger.info(f"# {title}\n{dataframe_to_string(df, format)}\n\n")
+                logger.info(f"# {title}\n{table.render(format)}\n\n")
         if type == "general":
-            logger.info(
-                f"{dataframe_to_string(audit_results['general_statistics'], format)}"
-            )
+            logger.info(audit_results["general_statistics"].render(format))
         if type == "by_tag":
-            logger.info(
-                f"{dataframe_to_string(audit_results['statistics_by_tag'], format)}"
-            )
+            logger.info(audit_results["statistics_by_tag"].render(format))
         if type == "detailed":
-            logger.info(
-                f"{dataframe_to_string(audit_results['detailed_results'], format)}"
-            )
+            logger.info(audit_results["detailed_results"].render(format))
 
         logger.remove()
         logger.add(sys.stdout, level=original_logger_config._levelno)
@@ -249,65 +602,41 @@ class Linter:
         A duplicated result is result for the same opinion
         for a .yaml file that is also evaluated in a .sql file
         Keep only the .yaml file result since it's where the changes need to be made.
+        The .yaml results are indexed by path and opinion code, so it's a single pass.
         """
+        yaml_results = {
+            (str(result.file.path), result.opinion_code)
+            for result in self._lint_results
+            if result.file.type == ".yaml"
+        }
         deduplicated_results = []
         for result in self._lint_results:
-            if isinstance(result.file, file_handlers.SqlFileHandler):
-                node_yaml_file = result.file.dbt_node.docs_yml_file_path
-                opinion = result.opinion_code
-                if any(
-                    result.file.type == ".yaml"
-                    and str(result.file.path) == str(node_yaml_file)
-                    and result.opinion_code == opinion
-                    for result in self._lint_results
-                ):
-                    continue
+            if isinstance(result.file, file_handlers.SqlFileHandler) and (
+                (str(result.file.dbt_node.docs_yml_file_path), result.opinion_code)
+                in yaml_results
+            ):
+                continue
             deduplicated_results.append(result)
 
         return deduplicated_results
 
-    def _audit(self) -> dict[str, pd.DataFrame]:
-        """Create a series of dataframes with data about the linting results."""
-        audit_dict = defaultdict(list)
+    def _audit(
+        self, aggregator: Optional[audit.AuditAggregator] = None
+    ) -> dict[str, audit.AuditTable]:
+        """Aggregate the linting results in the tables of the audit."""
+        if aggregator is not None:
+            if self._result_stream is not None:
+                self._result_stream.close()
+            return aggregator.get_tables()
 
+        aggregator = audit.AuditAggregator()
         for result in self.get_lint_results(deduplicate=True):
-            audit_dict["dbt_project_name"].append(result.file.parent_dbt_project.name)
-            audit_dict["file_name"].append(str(result.file.path))
-            audit_dict["opinion_code"].append(result.opinion_code)
-            audit_dict["severity"].append(result.severity.value)
-            audit_dict["tags"].append(result.tags)
-            audit_dict["passed"].append(result.passed)
-
-        audit_df = pd.DataFrame(audit_dict)
-
-        general_statistics = audit_df.groupby(
-            ["dbt_project_name", "severity"], as_index=False
-        ).agg(
-            total_evaluated=("opinion_code", "count"),
-            passed=("passed", lambda x: x.sum()),
-            failed=("passed", lambda x: x.count() - x.sum()),
-        )
-        general_statistics["percentage_passed"] = (
-            general_statistics["passed"] / general_statistics["total_evaluated"]
-        ) * 100
-
-        statistics_by_tag = (
-            audit_df.explode("tags")
-            .groupby(["dbt_project_name", "severity", "tags"], as_index=False)
-            .agg(
-                total_evaluated=("opinion_code", "count"),
-                passed=("passed", lambda x: x.sum()),
-                failed=("passed", lambda x: x.count() - x.sum()),
+            aggregator.add(
+                result.file.parent_dbt_project.name or "",
+                str(result.file.path),
+                result.opinion_code,
+                result.severity.value,
+                result.tags,
+                result.passed,
             )
-        )
-        statistics_by_tag["percentage_passed"] = (
-            statistics_by_tag["passed"] / statistics_by_tag["total_evaluated"]
-        ) * 100
-
-        return OrderedDict(
-            [
-                ("general_statistics", general_statistics),
-                ("statistics_by_tag", statistics_by_tag),
-                ("detailed_results", audit_df),
-            ]
-        )
+        return aggregator.get_tables()
@@ -0,0 +1,179 @@
+import json
+import pathlib
+import re
+from typing import IO
+from typing import Any
+from typing import Collection
+from typing import Iterable
+from typing import Optional
+
+MANIFEST_SECTIONS = ["nodes", "macros", "sources", "exposures"]
+
+# Characters read from the manifest file at a time
+CHUNK_SIZE = 1024 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def read_manifest_sections(
+    manifest_path: pathlib.Path,
+    sections: Iterable[str],
+    node_ids: Optional[Collection[str]] = None,
+) -> dict[str, Any]:
+    """Read only some top level sections of a manifest.json file.
+
+    The file is read in chunks and the top level object, and the objects of the
+    requested sections, are walked one key at a time. Values that are not
+    requested (e.g. parent_map, child_map, docs, disabled, or nodes not in
+    node_ids) are decoded one entry at a time and dropped, and the requested
+    ones are decoded one entry at a time. So the peak memory is the
+    requested sections plus a chunk and the largest entry, not the file size.
+    The metadata section is always kept.
+
+    Args:
+        manifest_path: The path to the manifest.json file.
+        sections: The names of the sections to keep.
+        node_ids: If provided, only keep these unique ids of the nodes section.
+
+    Returns:
+        A dictionary with the requested sections.
+    """
+    wanted_sections = set(sections) | {"metadata"}
+    with open(manifest_path, "r") as f:
+        stream = _JsonStream(f)
+        manifest_dict: dict[str, Any] = {}
+        stream.expect("{")
+        if stream.peek() == "}":
+            return manifest_dict
+        while True:
+            key = stream.read_key()
+            if key not in wanted_sections:
+                stream.skip_value()
+            elif stream.peek() == "{":
+                manifest_dict[key] = stream.read_object(
+                    node_ids if key == "nodes" else None
+                )
+            else:
+                manifest_dict[key] = stream.read_value()
+            if not stream.next_item("}"):
+                return manifest_dict
+
+
+class _JsonStream:
+    """Read the JSON values of a file one at a time, keeping in memory only a
+    chunk of the file and the text of the value being read.
+
+    Values are decoded with the C decoder of the json module. When a value
+    continues after the text read so far, the next chunk is read and the value is
+    decoded again. Objects and arrays that are skipped are walked one entry at a
+    time, so they are never fully in memory.
+    """
+
+    def __init__(self, file: IO[str]) -> None:
+        self._file = file
+        self._buffer = ""
+        self._pos = 0
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        """Drop the text before the current position and read the next chunk.
+        The chunk is at least as long as the text left, so a value that spans
+        many chunks is decoded a logarithmic number of times.
+        Returns False at the end of the file."""
+        remaining = self._buffer[self._pos :]
+        chunk = self._file.read(max(CHUNK_SIZE, len(remaining)))
+        self._buffer = remaining + chunk
+        self._pos = 0
+        return bool(chunk)
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def peek(self) -> str:
+        """Skip the whitespace and return the next character ("" at the end)."""
+        while True:
+            match = _WHITESPACE.match(self._buffer, self._pos)
+            self._pos = match.end() if match else self._pos
+            if self._pos < len(self._buffer) or not self._fill():
+                return self._buffer[self._pos : self._pos + 1]
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self._error(f"Expecting '{char}'")
+        self._pos += 1
+
+    def next_item(self, closing_char: str) -> bool:
+        """Consume the separator after an item of an object or array. Returns
+        True if there is another item, or False if the closing char was found."""
+        if self.peek() == ",":
+            self._pos += 1
+            return True
+        self.expect(closing_char)
+        return False
+
+    def read_key(self) -> str:
+        """Read the key of an object entry and the colon after it."""
+        if self.peek() != '"':
+            raise self._error("Expecting property name enclosed in double quotes")
+        key: str = self.read_value()
+        self.expect(":")
+        return key
+
+    def read_value(self) -> Any:
+        """Decode the next value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # The value can continue in the next chunk
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the text read can continue too
+            if (
+                end == len(self._buffer)
+                and self._buffer[self._pos] not in '{["'
+                and self._fill()
+            ):
+                continue
+            self._pos = end
+            return value
+
+    def skip_value(self) -> None:
+        """Skip the next value. Objects and arrays are decoded one entry at a time
+        and the entries are dropped."""
+        char = self.peek()
+        if char == "{":
+            self.read_object(keys=())
+        elif char == "[":
+            self._pos += 1
+            if self.peek() == "]":
+                self._pos += 1
+                return
+            while True:
+                self.read_value()
+                if not self.next_item("]"):
+                    return
+        else:
+            self.read_value()
+
+    def read_object(self, keys: Optional[Collection[str]] = None) -> dict[str, Any]:
+        """Decode the next object one entry at a time.
+
+        Args:
+            keys: If provided, only keep the entries with these keys. The values
+                of the other entries are decoded and dropped.
+        """
+        self.expect("{")
+        obj: dict[str, Any] = {}
+        if self.peek() == "}":
+            self._pos += 1
+            return obj
+        while True:
+            key = self.read_key()
+            value = self.read_value()
+            if keys is None or key in keys:
+                obj[key] = value
+            if not self.next_item("}"):
+                return obj
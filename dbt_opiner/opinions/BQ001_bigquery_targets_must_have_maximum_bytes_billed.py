@@ -23,6 +23,10 @@ class BQ001(base_opinion.BaseOpinion):
       - maximum_bytes_billed: maximum bytes billed allowed (optional)
     """
 
+    required_manifest_sections = []
+    applies_to_file_handlers = [file_handlers.YamlFileHandler]
+    applies_to_file_names = r"profiles\.yml"
+
     def __init__(self, config: dict[str, Any] = {}, **kwargs: dict[str, Any]) -> None:
         super().__init__(
             code="BQ001",
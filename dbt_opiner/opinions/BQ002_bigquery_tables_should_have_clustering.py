@@ -18,6 +18,10 @@ class BQ002(base_opinion.BaseOpinion):
     This opinion checks if models materialized as tables in BigQuery have clustering defined.
     """
 
+    required_manifest_sections = ["nodes"]
+    applies_to_file_handlers = [file_handlers.SqlFileHandler]
+    applies_to_resource_types = ["model"]
+
     def __init__(self, config: dict[str, Any] = {}, **kwargs: dict[str, Any]) -> None:
         super().__init__(
             code="BQ002",
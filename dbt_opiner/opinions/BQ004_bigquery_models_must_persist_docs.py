@@ -23,6 +23,10 @@ class BQ004(base_opinion.BaseOpinion):
     To your dbt_project.yml file to enable this option.
     """
 
+    required_manifest_sections = []
+    applies_to_file_handlers = [file_handlers.YamlFileHandler]
+    applies_to_file_names = r"dbt_project\.yml"
+
     def __init__(self, config: dict[str, Any], **kwargs: dict[str, Any]) -> None:
         super().__init__(
             code="BQ004",
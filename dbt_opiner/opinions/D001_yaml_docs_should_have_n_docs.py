@@ -18,6 +18,9 @@ class D001(base_opinion.BaseOpinion):
         - max_n_allowed: number of docs allowed per yaml file
     """
 
+    required_manifest_sections = ["nodes"]
+    applies_to_file_handlers = [file_handlers.YamlFileHandler]
+
     def __init__(self, config: dict[str, Any] = {}, **kwargs: dict[str, Any]) -> None:
         super().__init__(
             code="D001",
@@ -24,6 +24,10 @@ class L001(base_opinion.BaseOpinion):
     - staging_prefix: prefix for staging tables (default: stg_)
     """
 
+    required_manifest_sections = ["nodes"]
+    applies_to_file_handlers = [file_handlers.SqlFileHandler]
+    applies_to_resource_types = ["model"]
+
     def __init__(self, config: dict[str, Any], **kwargs: dict[str, Any]) -> None:
         super().__init__(
             code="L001",
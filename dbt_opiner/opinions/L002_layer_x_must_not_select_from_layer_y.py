@@ -41,6 +41,10 @@ class L002(base_opinion.BaseOpinion):
     If no pairs are specified, the opinion will be skipped.
     """
 
+    required_manifest_sections = ["nodes"]
+    applies_to_file_handlers = [file_handlers.SqlFileHandler]
+    applies_to_resource_types = ["model"]
+
     def __init__(self, config: dict[str, Any], **kwargs: dict[str, Any]) -> None:
         super().__init__(
             code="L002",
@@ -16,6 +16,13 @@ class O001(base_opinion.BaseOpinion):
     Include a description for the model in a yaml file or config block.
     """
 
+    required_manifest_sections = ["nodes"]
+    applies_to_file_handlers = [
+        file_handlers.SqlFileHandler,
+        file_handlers.YamlFileHandler,
+    ]
+    applies_to_resource_types = ["model"]
+
     def __init__(self, **kwargs: dict[str, Any]) -> None:
         super().__init__(
             code="O001",
@@ -28,6 +28,13 @@ class O002(base_opinion.BaseOpinion):
     Keywords are case insensitive.
     """
 
+    required_manifest_sections = ["nodes"]
+    applies_to_file_handlers = [
+        file_handlers.SqlFileHandler,
+        file_handlers.YamlFileHandler,
+    ]
+    applies_to_resource_types = ["model"]
+
     def __init__(self, config: dict[str, Any] = {}, **kwargs: dict[str, Any]) -> None:
         super().__init__(
             code="O002",
@@ -61,6 +61,10 @@ class O004(base_opinion.BaseOpinion):
     select * from joined
     """
 
+    required_manifest_sections = ["nodes"]
+    applies_to_file_handlers = [file_handlers.SqlFileHandler]
+    applies_to_resource_types = ["model"]
+
     def __init__(self, **kwargs: dict[str, Any]) -> None:
         super().__init__(
             code="O004",
@@ -72,9 +76,7 @@ class O004(base_opinion.BaseOpinion):
     def _eval(self, file: file_handlers.FileHandler) -> Optional[linter.LintResult]:
         if isinstance(file, file_handlers.SqlFileHandler):
             if isinstance(file.dbt_node, DbtModel):
-                not_qualified_stars = [
-                    star for star in file.dbt_node.ast_extracted_columns if "*" in star
-                ]
+                not_qualified_stars = file.dbt_node.ast_star_columns
                 if not_qualified_stars:
                     return linter.LintResult(
                         file=file,
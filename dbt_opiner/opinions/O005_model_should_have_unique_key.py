@@ -13,6 +13,10 @@ class O005(base_opinion.BaseOpinion):
     to make the granularity of the model explicit.
     """
 
+    required_manifest_sections = ["nodes"]
+    applies_to_file_handlers = [file_handlers.SqlFileHandler]
+    applies_to_resource_types = ["model"]
+
     def __init__(self, **kwargs: dict[str, Any]) -> None:
         super().__init__(
             code="O005",
@@ -15,6 +15,13 @@ class O007(base_opinion.BaseOpinion):
     confusion and maintenance issues.
     """
 
+    required_manifest_sections = ["nodes"]
+    applies_to_file_handlers = [
+        file_handlers.SqlFileHandler,
+        file_handlers.YamlFileHandler,
+    ]
+    applies_to_resource_types = ["model"]
+
     def __init__(self, **kwargs: dict[str, Any]) -> None:
         super().__init__(
             code="O007",
@@ -19,6 +19,10 @@ class P002(base_opinion.BaseOpinion):
     This opinion will also check if it's present there.
     """
 
+    required_manifest_sections = []
+    applies_to_file_handlers = [file_handlers.YamlFileHandler]
+    applies_to_file_names = r"profiles\.yml|dbt_project\.yml"
+
     def __init__(self, config: dict[str, Any] = {}, **kwargs: dict[str, Any]) -> None:
         super().__init__(
             code="P002",
@@ -1,36 +1,46 @@
-from .BQ001_bigquery_targets_must_have_maximum_bytes_billed import BQ001
-from .BQ002_bigquery_tables_should_have_clustering import BQ002
-from .BQ003_bigquery_views_must_have_partition_and_cluster_description import BQ003
-from .BQ004_bigquery_models_must_persist_docs import BQ004
-from .D001_yaml_docs_should_have_n_docs import D001
-from .L001_sources_must_only_be_used_in_staging import L001
-from .L002_layer_x_must_not_select_from_layer_y import L002
-from .O001_model_must_have_description import O001
-from .O002_model_description_must_have_keywords import O002
-from .O003_all_columns_must_have_description import O003
-from .O004_final_columns_in_model_must_be_explicitly_named_at_least_once import O004
-from .O005_model_should_have_unique_key import O005
-from .O006_models_names_must_start_with_a_prefix import O006
-from .O007_yml_files_must_not_have_outdated_colums import O007
-from .P001_pii_columns_must_have_tags import P001
-from .P002_project_must_not_send_anon_stats import P002
+import importlib
+from typing import Any
 
+# Modules of the default opinions by opinion code. The modules are imported only
+# when the opinion class is requested, so ignored opinions are never imported.
+OPINION_MODULES = {
+    "BQ001": "BQ001_bigquery_targets_must_have_maximum_bytes_billed",
+    "BQ002": "BQ002_bigquery_tables_should_have_clustering",
+    "BQ003": "BQ003_bigquery_views_must_have_partition_and_cluster_description",
+    "BQ004": "BQ004_bigquery_models_must_persist_docs",
+    "D001": "D001_yaml_docs_should_have_n_docs",
+    "L001": "L001_sources_must_only_be_used_in_staging",
+    "L002": "L002_layer_x_must_not_select_from_layer_y",
+    "O001": "O001_model_must_have_description",
+    "O002": "O002_model_description_must_have_keywords",
+    "O003": "O003_all_columns_must_have_description",
+    "O004": "O004_final_columns_in_model_must_be_explicitly_named_at_least_once",
+    "O005": "O005_model_should_have_unique_key",
+    "O006": "O006_models_names_must_start_with_a_prefix",
+    "O007": "O007_yml_files_must_not_have_outdated_colums",
+    "P001": "P001_pii_columns_must_have_tags",
+    "P002": "P002_project_must_not_send_anon_stats",
+}
 
-opinion_classes = [
-    BQ001,
-    BQ002,
-    BQ003,
-    BQ004,
-    D001,
-    L001,
-    L002,
-    O001,
-    O002,
-    O003,
-    O004,
-    O005,
-    O006,
-    O007,
-    P001,
-    P002,
-]
+
+def get_opinion_class(code: str) -> Any:
+    """Import and return the class of a default opinion.
+
+    Args:
+        code: The code of the opinion (e.g. O001).
+
+    Returns:
+        The opinion class.
+    """
+    module = importlib.import_module(f"{__name__}.{OPINION_MODULES[code]}")
+    return getattr(module, code)
+
+
+def __getattr__(name: str) -> Any:
+    # Import the opinion classes on first access (e.g. `from dbt_opiner.opinions
+    # import O001`), see PEP 562.
+    if name in OPINION_MODULES:
+        return get_opinion_class(name)
+    if name == "opinion_classes":
+        return [get_opinion_class(code) for code in OPINION_MODULES]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
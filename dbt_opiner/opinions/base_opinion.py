@@ -4,6 +4,7 @@ from typing import Optional
 
 from dbt_opiner import file_handlers
 from dbt_opiner import linter
+from dbt_opiner import manifest_reader
 
 
 class BaseOpinion(abc.ABC):
@@ -25,6 +26,21 @@ class BaseOpinion(abc.ABC):
     #  - if an opinion is ignored and not loaded, we don't want to install the packages
     required_dependencies: list[str] = []
 
+    # Top level sections of the manifest (nodes, macros, sources, exposures) that the
+    # opinion reads. Only the sections required by the loaded opinions are loaded.
+    # Defaults to all of them so custom opinions keep working without changes.
+    required_manifest_sections: list[str] = list(manifest_reader.MANIFEST_SECTIONS)
+
+    # Files the opinion applies to. The linter only checks the opinion on files that
+    # are instances of one of the file handlers, have a dbt node of one of the
+    # resource types (None for any, or files without nodes) and whose name fully
+    # matches the regex. Defaults to all files so custom opinions keep working.
+    applies_to_file_handlers: list[type[file_handlers.FileHandler]] = [
+        file_handlers.FileHandler
+    ]
+    applies_to_resource_types: Optional[list[str]] = None
+    applies_to_file_names: str = r".*"
+
     def __init__(
         self,
         code: str,
@@ -30,12 +30,13 @@ class OpinionsPack:
         if no_ignore:
             self._ignored_opinions = []
 
-        # Load default opinions
-        from dbt_opiner.opinions import opinion_classes
+        # Load default opinions. Ignored opinions are not imported.
+        from dbt_opiner.opinions import OPINION_MODULES
+        from dbt_opiner.opinions import get_opinion_class
 
-        for opinion_class in opinion_classes:
-            if opinion_class.__name__ not in self._ignored_opinions:
-                self._opinions.append(opinion_class(config=self._config))
+        for code in OPINION_MODULES:
+            if code not in self._ignored_opinions:
+                self._opinions.append(get_opinion_class(code)(config=self._config))
 
         # Load custom opinions
         self._load_custom_opinions()
@@ -46,6 +47,16 @@ class OpinionsPack:
         """Returns all the loaded opinions."""
         return [opinion for opinion in self._opinions]
 
+    def get_required_manifest_sections(self) -> list[str]:
+        """Returns the manifest sections required by the loaded opinions."""
+        return sorted(
+            {
+                section
+                for opinion in self._opinions
+                for section in opinion.required_manifest_sections
+            }
+        )
+
     def _load_custom_opinions(self) -> None:
         source = (
             self._config.get("opinions_config", {})
@@ -1,11 +1,20 @@
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
 from importlib import metadata
 from typing import Optional
 
 import click
-import requests
 from packaging import version
 
 _PYPI_URL = "https://pypi.org/pypi/dbt-opiner/json"
+_VERSION_CHECK_FILE_NAME = "version_check.json"
+# Seconds the latest version fetched from PyPI is reused
+VERSION_CHECK_TTL = 24 * 60 * 60
 
 
 def get_package_version() -> str:
@@ -13,6 +22,9 @@ def get_package_version() -> str:
 
 
 def get_latest_package_version() -> Optional[str]:
+    # requests is slow to import, so it's only imported when PyPI is queried
+    import requests
+
     try:
         resp = requests.get(_PYPI_URL, timeout=5)
         resp.raise_for_status()
@@ -22,8 +34,80 @@ def get_latest_package_version() -> Optional[str]:
         return None
 
 
-def recommend_version_upgrade() -> None:
+def _version_check_path() -> pathlib.Path:
+    # Imported here to not load the cache module dependencies on startup
+    from dbt_opiner import cache
+
+    return cache.get_user_cache_dir() / _VERSION_CHECK_FILE_NAME
+
+
+def _read_version_check(
+    check_path: pathlib.Path,
+) -> tuple[Optional[str], Optional[float]]:
+    """Returns the latest version and when it was checked, or None if the version
+    was never checked or the file can't be read."""
+    try:
+        with check_path.open("r") as f:
+            version_check = json.load(f)
+        return version_check.get("latest_version"), float(version_check["checked_at"])
+    except Exception:
+        return None, None
+
+
+def _update_version_check(check_path: pathlib.Path) -> None:
+    """Fetch the latest version from PyPI and store it with the check time.
+    Failed checks are stored too, so they are not retried until the TTL expires."""
     latest_version = get_latest_package_version()
+    temp_path = None
+    try:
+        check_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file and rename it so concurrent runs
+        # never read a partially written file.
+        fd, temp_path = tempfile.mkstemp(dir=check_path.parent)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"latest_version": latest_version, "checked_at": time.time()}, f)
+        os.replace(temp_path, check_path)
+    except Exception:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def get_cached_latest_package_version(
+    ttl: int = VERSION_CHECK_TTL,
+) -> Optional[str]:
+    """Returns the latest version of dbt-opiner without waiting for PyPI.
+
+    The latest version is stored in the user cache directory. If it's older than
+    the TTL (or was never checked) it's refreshed in a detached process, so the
+    new version is used in the next runs. Unlike a thread, the process is not
+    inherited when the linter forks, nor killed when the run exits.
+
+    Args:
+        ttl: Seconds the stored latest version is valid.
+
+    Returns:
+        The stored latest version, or None if it's not known yet.
+    """
+    check_path = _version_check_path()
+    latest_version, checked_at = _read_version_check(check_path)
+    if checked_at is None or time.time() - checked_at > ttl:
+        try:
+            subprocess.Popen(
+                [sys.executable, "-m", "dbt_opiner.package", str(check_path)],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+        except OSError:
+            pass
+    return latest_version
+
+
+def recommend_version_upgrade() -> None:
+    if os.getenv("DBT_OPINER_NO_VERSION_CHECK"):
+        return
+    latest_version = get_cached_latest_package_version()
     current_version = get_package_version()
 
     if not latest_version:
@@ -42,3 +126,8 @@ def recommend_version_upgrade() -> None:
         click.secho(
             f"Using the latest version of dbt-opiner: {current_version}.", fg="green"
         )
+
+
+if __name__ == "__main__":
+    # Entry point of the detached process of get_cached_latest_package_version
+    _update_version_check(pathlib.Path(sys.argv[1]))
@@ -0,0 +1,337 @@
+import abc
+import heapq
+import json
+import tempfile
+from typing import IO
+from typing import Any
+from typing import Iterator
+from typing import NamedTuple
+from typing import Optional
+
+from loguru import logger
+
+from dbt_opiner import audit
+from dbt_opiner import file_handlers
+from dbt_opiner import linter
+
+# Results kept in memory before a sorted run is written to a temporary file
+SORT_BUFFER_SIZE = 100_000
+
+
+class ResultRecord(NamedTuple):
+    """The fields of a lint result that are reported. Unlike the lint result, it
+    doesn't hold a reference to the file handler (and its content).
+
+    Attributes:
+        dbt_project_name: The name of the dbt project of the linted file.
+        file_path: The path to the linted file.
+        opinion_code: The code of the opinion that was checked.
+        passed: True if the opinion passed, False otherwise.
+        severity: The severity of the opinion (must or should).
+        message: The message of the opinion check.
+        tags: The tags of the opinion.
+    """
+
+    dbt_project_name: Optional[str]
+    file_path: str
+    opinion_code: str
+    passed: bool
+    severity: str
+    message: str
+    tags: Optional[list[str]]
+
+    @classmethod
+    def from_lint_result(cls, result: "linter.LintResult") -> "ResultRecord":
+        return cls(
+            result.file.parent_dbt_project.name,
+            str(result.file.path),
+            result.opinion_code,
+            result.passed,
+            result.severity.value,
+            result.message,
+            result.tags,
+        )
+
+
+class ResultSink(abc.ABC):
+    """Base class of the destinations of the lint results.
+
+    Methods:
+        write: Write a lint result.
+        close: Finish writing once all the results were written.
+    """
+
+    @abc.abstractmethod
+    def write(self, record: ResultRecord) -> None:
+        """Write a lint result.
+        Should be implemented in the child class.
+
+        Args:
+            record: The reported fields of the lint result.
+        """
+
+    def close(self, exit_code: int) -> None:
+        """Finish writing once all the results were written.
+
+        Args:
+            exit_code: The exit code of the run.
+        """
+
+
+def _format_message(record: ResultRecord) -> str:
+    return f"{record.opinion_code} | `{record.file_path}` {record.message}\n"
+
+
+class TerminalSink(ResultSink):
+    """Log the failed results as errors (must) or warnings (should), and the
+    passed results as debug messages."""
+
+    def write(self, record: ResultRecord) -> None:
+        message = _format_message(record)
+        if record.passed:
+            logger.debug(message)
+        elif record.severity == linter.OpinionSeverity.MUST.value:
+            logger.error(message)
+        else:
+            logger.warning(message)
+
+    def close(self, exit_code: int) -> None:
+        if exit_code == 0:
+            logger.info("All opinions passed!")
+
+
+class MarkdownSink(ResultSink):
+    """Write the failed results to a markdown file."""
+
+    def __init__(self, file_path: str) -> None:
+        """
+        Args:
+            file_path: The path to the markdown file.
+        """
+        self._file = open(file_path, "w")
+        self._file.write("# ✨ Dbt-opiner lint results\n")
+
+    def write(self, record: ResultRecord) -> None:
+        if record.passed:
+            return
+        icon = "❌" if record.severity == linter.OpinionSeverity.MUST.value else "⚠️"
+        self._file.write(f"- {icon} {_format_message(record)}")
+
+    def close(self, exit_code: int) -> None:
+        if exit_code == 0:
+            self._file.write("✅ All opinions passed!")
+        self._file.close()
+
+
+class NdjsonSink(ResultSink):
+    """Write all the results to a newline delimited JSON file, one result per line."""
+
+    def __init__(self, file_path: str) -> None:
+        """
+        Args:
+            file_path: The path to the NDJSON file.
+        """
+        self._file = open(file_path, "w")
+
+    def write(self, record: ResultRecord) -> None:
+        self._file.write(json.dumps(record._asdict()) + "\n")
+
+    def close(self, exit_code: int) -> None:
+        self._file.close()
+
+
+class AuditSink(ResultSink):
+    """Add the results to an audit aggregator.
+
+    Attributes:
+        aggregator: The aggregator of the audit tables.
+    """
+
+    def __init__(self, keep_detailed: bool = True) -> None:
+        """
+        Args:
+            keep_detailed: If False, the results are only counted and the detailed
+                results table is empty.
+        """
+        self.aggregator = audit.AuditAggregator(keep_detailed)
+
+    def write(self, record: ResultRecord) -> None:
+        self.aggregator.add(
+            record.dbt_project_name or "",
+            record.file_path,
+            record.opinion_code,
+            record.severity,
+            record.tags,
+            record.passed,
+        )
+
+
+def get_lint_sinks(
+    output_file: Optional[str] = None, output_format: str = "md"
+) -> list[ResultSink]:
+    """Returns the sinks of the lint command: the terminal and, if specified,
+    the output file.
+
+    Args:
+        output_file: The file to write the lint results to.
+        output_format: The format of the output file: md or ndjson.
+    """
+    result_sinks: list[ResultSink] = [TerminalSink()]
+    if output_file:
+        if output_format == "md":
+            result_sinks.append(MarkdownSink(output_file))
+        elif output_format == "ndjson":
+            result_sinks.append(NdjsonSink(output_file))
+        else:
+            raise ValueError(f"Unsupported format: {output_format}")
+    return result_sinks
+
+
+class _ExternalSorter:
+    """Sort the records with an external merge sort.
+
+    Records are buffered and each time the buffer is full it's sorted and written
+    to a temporary file (a run). The runs are merged when the records are read, so
+    only the buffer and a record per run are in memory.
+    """
+
+    def __init__(self, buffer_size: int) -> None:
+        self._buffer_size = buffer_size
+        self._buffer: list[tuple[Any, ...]] = []
+        self._runs: list[IO[str]] = []
+
+    def add(self, key: tuple[Any, ...], record: ResultRecord) -> None:
+        self._buffer.append((*key, record))
+        if len(self._buffer) >= self._buffer_size:
+            self._write_run()
+
+    def _write_run(self) -> None:
+        run = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+        for entry in sorted(self._buffer):
+            run.write(json.dumps(entry) + "\n")
+        run.seek(0)
+        self._runs.append(run)
+        self._buffer = []
+
+    @staticmethod
+    def _read_run(run: IO[str]) -> Iterator[tuple[Any, ...]]:
+        for line in run:
+            *key, record = json.loads(line)
+            yield (*key, ResultRecord(*record))
+
+    def sorted_records(self) -> Iterator[ResultRecord]:
+        """Returns the records sorted by their keys and closes the runs."""
+        if not self._runs:
+            entries: Iterator[tuple[Any, ...]] = iter(sorted(self._buffer))
+        else:
+            if self._buffer:
+                self._write_run()
+            logger.debug(f"Merging {len(self._runs)} sorted runs of lint results")
+            entries = heapq.merge(*(self._read_run(run) for run in self._runs))
+        try:
+            for entry in entries:
+                yield entry[-1]
+        finally:
+            for run in self._runs:
+                run.close()
+            self._runs = []
+            self._buffer = []
+
+
+class ResultStream:
+    """Report the lint results to sinks as they are produced.
+
+    Only the counters of the results needed for the exit code are kept in memory,
+    and the keys of the yaml results to deduplicate the results of their sql files.
+    If sorted, the results are reported when the stream is closed, sorted by
+    severity and opinion code with an external merge sort.
+
+    Methods:
+        add: Report a lint result.
+        close: Report the sorted results, close the sinks and return the exit code.
+    """
+
+    def __init__(
+        self,
+        result_sinks: list[ResultSink],
+        sort: bool = False,
+        deduplicate: bool = True,
+        sort_buffer_size: int = SORT_BUFFER_SIZE,
+    ) -> None:
+        """
+        Args:
+            result_sinks: The sinks the results are written to.
+            sort: If True, sort the results by severity and opinion code.
+            deduplicate: If True, skip the results of sql files for opinions also
+                evaluated in their docs yaml file. The yaml files must be linted
+                before the sql files.
+            sort_buffer_size: The number of results sorted in memory.
+        """
+        self._sinks = result_sinks
+        self._sorter = _ExternalSorter(sort_buffer_size) if sort else None
+        self._deduplicate = deduplicate
+        self._yaml_results: set[tuple[str, str]] = set()
+        self._n_results = 0
+        # Number of results by (severity, passed)
+        self.counts: dict[tuple[str, bool], int] = {}
+
+    def add(self, result: "linter.LintResult", position: tuple[int, ...] = ()) -> None:
+        """Report a lint result.
+
+        Args:
+            result: The lint result.
+            position: The position of the file in the lint order. When sorted, the
+                results with the same severity and opinion code are kept in this
+                order, and then in the order they were added.
+        """
+        if self._deduplicate and self._is_duplicated(result):
+            return
+        record = ResultRecord.from_lint_result(result)
+        key = (record.severity, record.passed)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self._n_results += 1
+        if self._sorter is not None:
+            self._sorter.add(
+                (result.severity.num, result.opinion_code, *position, self._n_results),
+                record,
+            )
+        else:
+            self._write(record)
+
+    def _is_duplicated(self, result: "linter.LintResult") -> bool:
+        """Same deduplication as Linter._deduplicate_results, in a single pass."""
+        if result.file.type == ".yaml":
+            self._yaml_results.add((str(result.file.path), result.opinion_code))
+        elif isinstance(result.file, file_handlers.SqlFileHandler):
+            return (
+                str(result.file.dbt_node.docs_yml_file_path),
+                result.opinion_code,
+            ) in self._yaml_results
+        return False
+
+    def _write(self, record: ResultRecord) -> None:
+        for sink in self._sinks:
+            sink.write(record)
+
+    def get_exit_code(self) -> int:
+        """Returns 1 if an opinion with must severity failed, 0 otherwise."""
+        return 1 if self.counts.get((linter.OpinionSeverity.MUST.value, False)) else 0
+
+    def close(self) -> int:
+        """Report the sorted results if the stream is sorted and close the sinks.
+
+        Returns:
+            The exit code of the run.
+        """
+        if self._sorter is not None:
+            for record in self._sorter.sorted_records():
+                self._write(record)
+        exit_code = self.get_exit_code()
+        for sink in self._sinks:
+            sink.close(exit_code)
+        logger.debug(
+            f"Reported {self._n_results} lint results: "
+            f"{sum(n for (_, passed), n in self.counts.items() if passed)} passed, "
+            f"{sum(n for (_, passed), n in self.counts.items() if not passed)} failed"
+        )
+        return exit_code
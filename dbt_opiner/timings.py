@@ -0,0 +1,274 @@
+import contextlib
+import json
+import os
+import time
+from dataclasses import asdict
+from dataclasses import dataclass
+from typing import ContextManager
+from typing import Iterator
+from typing import Optional
+
+
+def _cpu_time() -> float:
+    """Returns the CPU time of the process and its finished children (e.g. dbt
+    compile and the worker processes)."""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _format_table(header: tuple[str, ...], rows: list[tuple[str, ...]]) -> str:
+    """Format rows as a plain text table. The first two columns are names and
+    are aligned to the left, the rest are numbers aligned to the right."""
+    widths = [max(len(row[i]) for row in rows + [header]) for i in range(len(header))]
+    return "\n".join(
+        "  ".join(
+            value.ljust(width) if i < 2 else value.rjust(width)
+            for i, (value, width) in enumerate(zip(row, widths))
+        ).rstrip()
+        for row in [header] + rows
+    )
+
+
+@dataclass
+class PhaseTiming:
+    """Dataclass to hold the time spent in a phase of a run.
+
+    Attributes:
+        phase: The name of the phase.
+        dbt_project: The name of the dbt project, or None for phases of the whole run.
+        wall_time: Wall clock time in seconds.
+        cpu_time: CPU time in seconds, including the finished child processes.
+    """
+
+    phase: str
+    dbt_project: Optional[str]
+    wall_time: float
+    cpu_time: float
+
+
+class Timings:
+    """Record the wall clock and CPU time of the phases of a run.
+
+    Methods:
+        phase: Context manager to time a phase.
+        reset: Discard the recorded phases and restart the total time.
+        get_summary: Get a table with the recorded phases.
+        to_dict: Get the recorded phases as a dictionary.
+        write_json: Write the recorded phases to a JSON file.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard the recorded phases and restart the total time."""
+        self.phases: list[PhaseTiming] = []
+        self._start_wall_time = time.perf_counter()
+        self._start_cpu_time = _cpu_time()
+
+    @contextlib.contextmanager
+    def phase(self, name: str, dbt_project: Optional[str] = None) -> Iterator[None]:
+        """Time a phase. It's recorded even if the phase raises an exception
+        (e.g. SystemExit when reporting the results).
+
+        Args:
+            name: The name of the phase.
+            dbt_project: The name of the dbt project the phase belongs to.
+        """
+        start_wall_time = time.perf_counter()
+        start_cpu_time = _cpu_time()
+        try:
+            yield
+        finally:
+            self.phases.append(
+                PhaseTiming(
+                    name,
+                    dbt_project,
+                    time.perf_counter() - start_wall_time,
+                    _cpu_time() - start_cpu_time,
+                )
+            )
+
+    def _get_total(self) -> PhaseTiming:
+        return PhaseTiming(
+            "total",
+            None,
+            time.perf_counter() - self._start_wall_time,
+            _cpu_time() - self._start_cpu_time,
+        )
+
+    def get_summary(self) -> str:
+        """Get a table with the wall clock and CPU time of the recorded phases in the
+        order they were run, and the total time of the run."""
+        rows: list[tuple[str, ...]] = [
+            (
+                timing.phase,
+                timing.dbt_project or "",
+                f"{timing.wall_time:.3f}",
+                f"{timing.cpu_time:.3f}",
+            )
+            for timing in self.phases + [self._get_total()]
+        ]
+        return _format_table(("phase", "dbt_project", "wall_s", "cpu_s"), rows)
+
+    def to_dict(self) -> dict[str, object]:
+        """Get the recorded phases and the total time of the run as a dictionary."""
+        return {
+            "phases": [asdict(timing) for timing in self.phases],
+            "total": asdict(self._get_total()),
+        }
+
+    def write_json(self, file_path: str) -> None:
+        """Write the recorded phases and the total time of the run to a JSON file.
+
+        Args:
+            file_path: The path to the JSON file.
+        """
+        with open(file_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+# Timings of the current run, recorded by the entrypoint, the loader and the projects
+_timings = Timings()
+
+
+def get_timings() -> Timings:
+    """Returns the timings of the current run."""
+    return _timings
+
+
+def phase(name: str, dbt_project: Optional[str] = None) -> ContextManager[None]:
+    """Time a phase of the current run. See Timings.phase."""
+    return _timings.phase(name, dbt_project)
+
+
+@dataclass
+class OpinionStats:
+    """Dataclass to hold the cost of checking an opinion on a type of file.
+
+    Attributes:
+        opinion_code: The code of the opinion.
+        file_handler: The name of the file handler class.
+        calls: Number of checks.
+        total_time: Total wall clock time in seconds.
+        mean_time: Mean wall clock time of a check in seconds.
+        p95_time: 95th percentile of the wall clock time of a check in seconds.
+        passed: Number of passed results.
+        failed: Number of failed results.
+    """
+
+    opinion_code: str
+    file_handler: str
+    calls: int
+    total_time: float
+    mean_time: float
+    p95_time: float
+    passed: int
+    failed: int
+
+
+class OpinionProfile:
+    """Record the wall clock time and the results of each opinion check.
+
+    Methods:
+        add: Record an opinion check.
+        get_stats: Get the stats per opinion and file handler.
+        get_summary: Get a table with the stats sorted by total time.
+        to_dict: Get the stats as a dictionary.
+        write_json: Write the stats to a JSON file.
+    """
+
+    def __init__(self) -> None:
+        # (opinion code, file handler, wall time, passed results, failed results)
+        self.samples: list[tuple[str, str, float, int, int]] = []
+
+    def add(
+        self,
+        opinion_code: str,
+        file_handler: str,
+        wall_time: float,
+        passed: int,
+        failed: int,
+    ) -> None:
+        """Record an opinion check.
+
+        Args:
+            opinion_code: The code of the opinion.
+            file_handler: The name of the file handler class of the checked file.
+            wall_time: Wall clock time of the check in seconds.
+            passed: Number of passed results of the check.
+            failed: Number of failed results of the check.
+        """
+        self.samples.append((opinion_code, file_handler, wall_time, passed, failed))
+
+    def get_stats(self) -> list[OpinionStats]:
+        """Get the stats per opinion and file handler, sorted by total time."""
+        grouped: dict[tuple[str, str], list[tuple[float, int, int]]] = {}
+        for opinion_code, file_handler, wall_time, passed, failed in self.samples:
+            grouped.setdefault((opinion_code, file_handler), []).append(
+                (wall_time, passed, failed)
+            )
+
+        stats = []
+        for (opinion_code, file_handler), checks in grouped.items():
+            wall_times = sorted(check[0] for check in checks)
+            total_time = sum(wall_times)
+            # Nearest rank percentile
+            p95_index = max(0, -(-95 * len(wall_times) // 100) - 1)
+            stats.append(
+                OpinionStats(
+                    opinion_code,
+                    file_handler,
+                    len(checks),
+                    total_time,
+                    total_time / len(checks),
+                    wall_times[p95_index],
+                    sum(check[1] for check in checks),
+                    sum(check[2] for check in checks),
+                )
+            )
+        return sorted(
+            stats,
+            key=lambda stat: (-stat.total_time, stat.opinion_code, stat.file_handler),
+        )
+
+    def get_summary(self) -> str:
+        """Get a table with the stats per opinion and file handler, sorted by total
+        time."""
+        header = (
+            "opinion",
+            "file_handler",
+            "calls",
+            "total_s",
+            "mean_ms",
+            "p95_ms",
+            "passed",
+            "failed",
+        )
+        rows: list[tuple[str, ...]] = [
+            (
+                stat.opinion_code,
+                stat.file_handler,
+                str(stat.calls),
+                f"{stat.total_time:.3f}",
+                f"{stat.mean_time * 1000:.3f}",
+                f"{stat.p95_time * 1000:.3f}",
+                str(stat.passed),
+                str(stat.failed),
+            )
+            for stat in self.get_stats()
+        ]
+        return _format_table(header, rows)
+
+    def to_dict(self) -> dict[str, object]:
+        """Get the stats per opinion and file handler as a dictionary."""
+        return {"opinions": [asdict(stat) for stat in self.get_stats()]}
+
+    def write_json(self, file_path: str) -> None:
+        """Write the stats per opinion and file handler to a JSON file.
+
+        Args:
+            file_path: The path to the JSON file.
+        """
+        with open(file_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
@@ -47,6 +47,12 @@ def reset_singletons():
     config_singleton.ConfigSingleton._instance = None
 
 
+@pytest.fixture(autouse=True)
+def no_version_check(monkeypatch):
+    # Don't query PyPI when running commands
+    monkeypatch.setenv("DBT_OPINER_NO_VERSION_CHECK", "1")
+
+
 @pytest.fixture
 def temp_empty_git_repo(tmp_path):
     git_file = tmp_path / ".git"
@@ -184,7 +190,7 @@ def temp_complete_git_repo(temp_empty_git_repo):
                         "name": "model",
                         "alias": "fct_model",
                         "compiled_code": "select id, value from table",
-                        "original_file_path": "test/model/model.sql",
+                        "original_file_path": "models/test/model/model.sql",
                         "patch_path": "dbt_project://models/test/model/_model__models.yaml",
                         "config": {"unique_key": "pk"},
                         "columns": {
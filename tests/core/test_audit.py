@@ -0,0 +1,71 @@
+import pytest
+
+from dbt_opiner import audit
+
+
+@pytest.fixture
+def aggregator():
+    aggregator = audit.AuditAggregator()
+    aggregator.add("project_b", "a.sql", "O001", "must", ["tag1", "tag2"], True)
+    aggregator.add("project_b", "a.sql", "O002", "must", ["tag1"], False)
+    aggregator.add("project_b", "b.sql", "O002", "should", None, False)
+    aggregator.add("project_a", "c.yaml", "O001", "must", [], True)
+    return aggregator
+
+
+def test_audit_aggregator(aggregator):
+    tables = aggregator.get_tables()
+    assert list(tables) == [
+        "general_statistics",
+        "statistics_by_tag",
+        "detailed_results",
+    ]
+    # Groups are sorted
+    assert tables["general_statistics"].rows == [
+        ("project_a", "must", 1, 1, 0, 100.0),
+        ("project_b", "must", 2, 1, 1, 50.0),
+        ("project_b", "should", 1, 0, 1, 0.0),
+    ]
+    # Results without tags are not counted by tag
+    assert tables["statistics_by_tag"].rows == [
+        ("project_b", "must", "tag1", 2, 1, 1, 50.0),
+        ("project_b", "must", "tag2", 1, 1, 0, 100.0),
+    ]
+    # Detailed results keep the order they were added in
+    assert [row[2] for row in tables["detailed_results"].rows] == [
+        "O001",
+        "O002",
+        "O002",
+        "O001",
+    ]
+
+
+def test_audit_table_render(aggregator):
+    tables = aggregator.get_tables()
+    assert tables["general_statistics"].render("csv") == (
+        "dbt_project_name,severity,total_evaluated,passed,failed,percentage_passed\n"
+        "project_a,must,1,1,0,100.0\n"
+        "project_b,must,2,1,1,50.0\n"
+        "project_b,should,1,0,1,0.0"
+    )
+    assert tables["detailed_results"].render("csv").splitlines()[1:3] == [
+        "project_b,a.sql,O001,must,\"['tag1', 'tag2']\",True",
+        "project_b,a.sql,O002,must,['tag1'],False",
+    ]
+    assert tables["general_statistics"].render("md").splitlines() == [
+        "| dbt_project_name   | severity   |   total_evaluated |   passed |   failed |   percentage_passed |",
+        "|:-------------------|:-----------|------------------:|---------:|---------:|--------------------:|",
+        "| project_a          | must       |                 1 |        1 |        0 |                 100 |",
+        "| project_b          | must       |                 2 |        1 |        1 |                  50 |",
+        "| project_b          | should     |                 1 |        0 |        1 |                   0 |",
+    ]
+    with pytest.raises(ValueError, match="Unsupported format: json"):
+        tables["general_statistics"].render("json")
+
+
+def test_audit_aggregator_empty():
+    tables = audit.AuditAggregator().get_tables()
+    assert all(table.rows == [] for table in tables.values())
+    assert tables["general_statistics"].render("csv") == (
+        "dbt_project_name,severity,total_evaluated,passed,failed,percentage_passed"
+    )
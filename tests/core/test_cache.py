@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import pathlib
+from unittest import mock
+
+from dbt_opiner import cache
+from dbt_opiner import dbt
+from dbt_opiner import opinions
+
+
+def test_manifest_snapshot(temp_complete_git_repo, caplog):
+    os.chdir(temp_complete_git_repo)
+    manifest_path = temp_complete_git_repo / "dbt_project" / "target" / "manifest.json"
+    snapshot_path = manifest_path.parent / cache.CACHE_DIR_NAME / "manifest.pickle"
+
+    with caplog.at_level(logging.DEBUG):
+        # First run writes the snapshot
+        manifest = dbt.DbtManifest(str(manifest_path), use_cache=True)
+        assert "Manifest cache miss: no snapshot found" in caplog.text
+        assert snapshot_path.exists()
+
+        # Second run reads it
+        cached_manifest = dbt.DbtManifest(str(manifest_path), use_cache=True)
+        assert "Manifest cache hit" in caplog.text
+        assert cached_manifest.manifest_dict == manifest.manifest_dict
+        assert len(cached_manifest.model_nodes) == 1
+
+
+def test_manifest_snapshot_invalidation(temp_complete_git_repo, caplog):
+    os.chdir(temp_complete_git_repo)
+    manifest_path = temp_complete_git_repo / "dbt_project" / "target" / "manifest.json"
+    dbt.DbtManifest(str(manifest_path), use_cache=True)
+
+    # Change the manifest content
+    with open(manifest_path, "r") as f:
+        manifest_dict = json.load(f)
+    manifest_dict["nodes"] = {}
+    with open(manifest_path, "w") as f:
+        json.dump(manifest_dict, f)
+
+    with caplog.at_level(logging.DEBUG):
+        manifest = dbt.DbtManifest(str(manifest_path), use_cache=True)
+        assert "Manifest cache miss: manifest size changed" in caplog.text
+        assert manifest.nodes == {}
+
+
+def test_manifest_snapshot_disabled(temp_complete_git_repo):
+    os.chdir(temp_complete_git_repo)
+    manifest_path = temp_complete_git_repo / "dbt_project" / "target" / "manifest.json"
+    dbt.DbtManifest(str(manifest_path))
+    assert not (manifest_path.parent / cache.CACHE_DIR_NAME).exists()
+
+
+def test_manifest_snapshot_sections(temp_complete_git_repo, caplog):
+    os.chdir(temp_complete_git_repo)
+    manifest_path = temp_complete_git_repo / "dbt_project" / "target" / "manifest.json"
+    dbt.DbtManifest(str(manifest_path), use_cache=True, sections=["macros", "nodes"])
+
+    with caplog.at_level(logging.DEBUG):
+        # A snapshot with more sections than requested can be used
+        manifest = dbt.DbtManifest(
+            str(manifest_path), use_cache=True, sections=["nodes"]
+        )
+        assert "Manifest cache hit" in caplog.text
+        assert manifest.macros == {}
+        # A snapshot with less sections than requested can't be used
+        manifest = dbt.DbtManifest(str(manifest_path), use_cache=True)
+        assert "Manifest cache miss: snapshot is missing sections" in caplog.text
+        assert len(manifest.sources) == 1
+
+
+def test_sql_ast_cache(tmp_path):
+    sql_ast_cache = cache.SqlAstCache(tmp_path / "sql_ast.sqlite3", 1024 * 1024)
+    assert sql_ast_cache.get_columns("select id from t", "duckdb") is None
+    sql_ast_cache.set_columns("select id from t", "duckdb", ["id"])
+    assert sql_ast_cache.get_columns("select id from t", "duckdb") == ["id"]
+    # The dialect is part of the key
+    assert sql_ast_cache.get_columns("select id from t", "bigquery") is None
+
+    # Entries persist between instances
+    sql_ast_cache = cache.SqlAstCache(tmp_path / "sql_ast.sqlite3", 1024 * 1024)
+    assert sql_ast_cache.get_columns("select id from t", "duckdb") == ["id"]
+
+
+def test_sql_ast_cache_eviction(tmp_path):
+    # Each entry is a bit more than 64 bytes (the key), so only a few fit
+    sql_ast_cache = cache.SqlAstCache(tmp_path / "sql_ast.sqlite3", 300)
+    for i in range(10):
+        sql_ast_cache.set_columns(f"select c{i} from t", None, [f"c{i}"])
+    # Least recently used entries are evicted first
+    assert sql_ast_cache.get_columns("select c0 from t", None) is None
+    assert sql_ast_cache.get_columns("select c9 from t", None) == ["c9"]
+
+
+def test_sql_ast_cache_replaced_entries_size(tmp_path, caplog):
+    sql_ast_cache = cache.SqlAstCache(tmp_path / "sql_ast.sqlite3", 300)
+    with caplog.at_level(logging.DEBUG):
+        for _ in range(10):
+            sql_ast_cache.set_columns("select c0 from t", None, ["c0"])
+    # The size of a replaced entry is not counted twice
+    assert (
+        sql_ast_cache._size_bytes
+        == sql_ast_cache._execute("SELECT SUM(size) FROM sql_ast").fetchone()[0]
+    )
+    assert "Evicted" not in caplog.text
+
+
+def test_sql_ast_cache_eviction_reconnects(tmp_path):
+    sql_ast_cache = cache.SqlAstCache(tmp_path / "sql_ast.sqlite3", 300)
+    sql_ast_cache.set_columns("select c0 from t", None, ["c0"])
+    # Like in a forked process, the connection of the parent process is not used
+    sql_ast_cache._pid = -1
+    with mock.patch.object(
+        sql_ast_cache, "_connect", wraps=sql_ast_cache._connect
+    ) as mock_connect:
+        for i in range(1, 10):
+            sql_ast_cache.set_columns(f"select c{i} from t", None, [f"c{i}"])
+    mock_connect.assert_called_once()
+    assert sql_ast_cache.get_columns("select c0 from t", None) is None
+    assert sql_ast_cache._size_bytes <= 300
+
+
+def test_dbt_model_uses_sql_ast_cache(tmp_path):
+    sql_ast_cache = cache.SqlAstCache(tmp_path / "sql_ast.sqlite3", 1024 * 1024)
+    compiled_code = "select id, name from dim_customers"
+    model = dbt.DbtModel({"compiled_code": compiled_code}, "duckdb", sql_ast_cache)
+    assert model.ast_extracted_columns == ["id", "name"]
+
+    # A new model with the same compiled code is not parsed
+    model = dbt.DbtModel({"compiled_code": compiled_code}, "duckdb", sql_ast_cache)
+    with mock.patch("sqlglot.parse_one") as mock_parse_one:
+        assert model.ast_extracted_columns == ["id", "name"]
+        mock_parse_one.assert_not_called()
+
+
+def test_lint_result_cache(tmp_path):
+    opinion = opinions.O001()
+    cache_path = tmp_path / "lint_results.sqlite3"
+    lint_result_cache = cache.LintResultCache(cache_path, 1024 * 1024, {})
+    file_key = lint_result_cache.get_file_key(
+        pathlib.Path("model.sql"), "select 1", [{"name": "model"}]
+    )
+    assert lint_result_cache.get_results(file_key, opinion) is None
+    lint_result_cache.set_results(
+        file_key, opinion, [["O001", False, "MUST", "message", None]]
+    )
+    assert lint_result_cache.get_results(file_key, opinion) == [
+        ["O001", False, "MUST", "message", None]
+    ]
+    assert (lint_result_cache.hits, lint_result_cache.misses) == (1, 1)
+
+    # The content and the nodes of the file are part of the key
+    for content, nodes in [
+        ("select 2", [{"name": "model"}]),
+        ("select 1", [{"name": "model", "description": "changed"}]),
+    ]:
+        other_file_key = lint_result_cache.get_file_key(
+            pathlib.Path("model.sql"), content, nodes
+        )
+        assert lint_result_cache.get_results(other_file_key, opinion) is None
+
+    # So are the parents of the nodes and the dbt project files
+    project_file = tmp_path / "dbt_project.yml"
+    project_file.write_text("name: project")
+    file_keys = set()
+    for parent_nodes, project_content in [
+        ([{"unique_id": "model.project.parent", "schema": "staging"}], "name: project"),
+        ([{"unique_id": "model.project.parent", "schema": "marts"}], "name: project"),
+        ([{"unique_id": "model.project.parent", "schema": "marts"}], "name: other"),
+    ]:
+        project_file.write_text(project_content)
+        file_keys.add(
+            cache.LintResultCache(cache_path, 1024 * 1024, {}).get_file_key(
+                pathlib.Path("model.sql"),
+                "select 1",
+                [{"name": "model"}],
+                parent_nodes,
+                [project_file],
+            )
+        )
+    assert len(file_keys | {file_key}) == 4
+
+    # Entries persist between instances with the same configuration
+    lint_result_cache = cache.LintResultCache(cache_path, 1024 * 1024, {})
+    assert lint_result_cache.get_results(file_key, opinion) is not None
+    lint_result_cache = cache.LintResultCache(
+        cache_path, 1024 * 1024, {"opinions_config": {"ignore_opinions": "O002"}}
+    )
+    assert lint_result_cache.get_results(file_key, opinion) is None
+
+    # Changing the opinion source invalidates its results
+    lint_result_cache = cache.LintResultCache(cache_path, 1024 * 1024, {})
+    with mock.patch.object(cache, "file_sha256", return_value="changed"):
+        assert lint_result_cache.get_results(file_key, opinion) is None
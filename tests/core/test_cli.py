@@ -1,9 +1,12 @@
+import json
 import os
+from unittest import mock
 
 import pytest
 from click import testing
 
 from dbt_opiner import cli
+from dbt_opiner import dbt
 
 
 @pytest.fixture
@@ -18,6 +21,24 @@ def test_help_option(runner):
     assert "lint" in result.output
 
 
+def test_help_option_startup(runner):
+    # The banner and the version check are not run for --help
+    with (
+        mock.patch("dbt_opiner.cli._print_banner") as mock_print_banner,
+        mock.patch(
+            "dbt_opiner.package.recommend_version_upgrade"
+        ) as mock_recommend_version_upgrade,
+    ):
+        runner.invoke(cli.main, ["--help"])
+        runner.invoke(cli.main, ["lint", "--help"])
+        mock_print_banner.assert_not_called()
+        mock_recommend_version_upgrade.assert_not_called()
+
+        runner.invoke(cli.main, ["lint"])
+        mock_print_banner.assert_called_once()
+        mock_recommend_version_upgrade.assert_called_once()
+
+
 def test_lint_option(runner):
     result = runner.invoke(cli.main, ["lint", "--help"])
     assert result.exit_code == 0
@@ -26,13 +47,30 @@ def test_lint_option(runner):
     assert "--target" in result.output
     assert "--force-compile" in result.output
     assert "--no-ignore" in result.output
+    assert "--no-cache" in result.output
+    assert "--cache-dir" in result.output
+    assert "--timings" in result.output
+    assert "--timings-file" in result.output
+    assert "--profile-opinions" in result.output
+    assert "--profile-opinions-file" in result.output
+    assert "-j, --jobs" in result.output
+    assert "--discovery" in result.output
+    assert "--changed-since" in result.output
+    assert "--with-children" in result.output
+    assert "--state" in result.output
+    assert "--stream" in result.output
+    assert "--stream-sort" in result.output
     assert "-o, --output-file" in result.output
+    assert "--output-format" in result.output
 
 
 def test_missing_options(runner):
     result = runner.invoke(cli.main, ["lint"])
     assert result.exit_code == 2
-    assert "Either --files or --all_files options must be provided" in result.output
+    assert (
+        "Either --files, --all_files, --changed-since or --state options must be "
+        "provided" in result.output
+    )
 
 
 def test_linter_run_all_files(runner, temp_complete_git_repo):
@@ -44,6 +82,80 @@ def test_linter_run_all_files(runner, temp_complete_git_repo):
     assert "Linting file" in result.output
 
 
+def test_linter_run_jobs(runner, temp_complete_git_repo):
+    os.chdir(temp_complete_git_repo / "dbt_project")
+    result = runner.invoke(cli.main, ["lint", "-a", "-j", "2", "--log-level", "DEBUG"])
+    assert result.exit_code == 0
+    assert "Linting completed in" in result.output
+
+
+def test_linter_run_cache_stats(runner, temp_complete_git_repo):
+    os.chdir(temp_complete_git_repo / "dbt_project")
+    for args in [["lint", "-a"], ["audit"]]:
+        dbt.DbtModel.cache_stats["ast_extracted_columns.hits"] = 100
+        result = runner.invoke(cli.main, [*args, "--log-level", "DEBUG"])
+        assert result.exit_code == 0
+        # The stats of previous runs are not reported
+        assert "Model caches:" in result.output
+        assert "100 hits" not in result.output
+
+
+def test_linter_run_timings(runner, temp_complete_git_repo):
+    os.chdir(temp_complete_git_repo / "dbt_project")
+    result = runner.invoke(
+        cli.main, ["lint", "-a", "--timings", "--timings-file", "timings.json"]
+    )
+    assert result.exit_code == 0
+    assert "Timings:" in result.output
+    for phase in ["load opinions", "load manifest", "load files", "lint", "report"]:
+        assert phase in result.output
+    with open("timings.json") as f:
+        timings = json.load(f)
+    assert ("lint", "project") in [
+        (timing["phase"], timing["dbt_project"]) for timing in timings["phases"]
+    ]
+
+
+def test_linter_run_profile_opinions(runner, temp_complete_git_repo):
+    os.chdir(temp_complete_git_repo / "dbt_project")
+    result = runner.invoke(
+        cli.main, ["lint", "-a", "--profile-opinions-file", "profile.json"]
+    )
+    assert result.exit_code == 0
+    assert "Opinions profile:" in result.output
+    with open("profile.json") as f:
+        profile = json.load(f)
+    assert "O001" in [stat["opinion_code"] for stat in profile["opinions"]]
+
+
+@pytest.mark.parametrize(
+    "stream_args",
+    [
+        pytest.param(["--stream"], id="stream"),
+        pytest.param(["--stream-sort"], id="stream sort"),
+        pytest.param(["--stream", "-j", "2"], id="stream with jobs"),
+    ],
+)
+def test_linter_run_stream(runner, temp_complete_git_repo, stream_args):
+    os.chdir(temp_complete_git_repo / "dbt_project")
+    lint_args = ["lint", "-a", "--output-format", "ndjson", "-o"]
+    result = runner.invoke(cli.main, lint_args + ["results.ndjson"])
+    stream_result = runner.invoke(
+        cli.main, lint_args + ["stream_results.ndjson"] + stream_args
+    )
+    assert stream_result.exit_code == result.exit_code
+    with open("results.ndjson") as f:
+        results = [json.loads(line) for line in f]
+    with open("stream_results.ndjson") as f:
+        stream_results = [json.loads(line) for line in f]
+    assert "O001" in [result["opinion_code"] for result in results]
+    # The same results are reported, deduplicated
+    assert sorted(map(str, stream_results)) == sorted(map(str, results))
+    if "--stream-sort" in stream_args:
+        # And in the same order
+        assert stream_results == results
+
+
 def test_linter_run_changed_files(runner, temp_complete_git_repo):
     os.chdir(temp_complete_git_repo)
     result = runner.invoke(
@@ -127,3 +239,18 @@ def test_audit_project(runner, temp_complete_git_repo, format, expected):
     )
     assert result.exit_code == 0
     assert expected in result.output.replace(" ", "")
+
+
+@pytest.mark.parametrize(
+    "audit_type", [pytest.param("general", id="general"), pytest.param("all", id="all")]
+)
+def test_audit_stream(runner, temp_complete_git_repo, audit_type):
+    os.chdir(temp_complete_git_repo)
+    audit_args = ["audit", "-t", audit_type, "--format", "csv", "-o"]
+    result = runner.invoke(cli.main, audit_args + ["audit.csv"])
+    stream_result = runner.invoke(
+        cli.main, audit_args + ["stream_audit.csv", "--stream-sort"]
+    )
+    assert result.exit_code == stream_result.exit_code == 0
+    with open("audit.csv") as f, open("stream_audit.csv") as stream_f:
+        assert stream_f.read() == f.read()
@@ -1,4 +1,7 @@
+import json
 import os
+import pathlib
+from unittest import mock
 
 from dbt_opiner import dbt
 
@@ -13,3 +16,245 @@ def test_dbt_manifest(temp_complete_git_repo):
     assert len(manifest.macros.values()) == 1
     assert len(manifest.sources.values()) == 1
     assert len(manifest.exposures.values()) == 1
+
+
+def test_dbt_manifest_path_indexes(temp_complete_git_repo):
+    os.chdir(temp_complete_git_repo)
+    dbt_project_dir = temp_complete_git_repo / "dbt_project"
+    manifest = dbt.DbtManifest(dbt_project_dir / "target" / "manifest.json")
+
+    model_file = dbt_project_dir / "models" / "test" / "model" / "model.sql"
+    nodes = manifest.get_nodes_by_file_path(model_file, dbt_project_dir, "model")
+    assert len(nodes) == 1
+    assert isinstance(nodes[0], dbt.DbtModel)
+    assert manifest.get_nodes_by_file_path(model_file, dbt_project_dir, "test") == []
+
+    macro_file = dbt_project_dir / "macros" / "my_macro.sql"
+    assert len(manifest.get_macros_by_file_path(macro_file, dbt_project_dir)) == 1
+
+    yaml_file = dbt_project_dir / "models" / "test" / "model" / "_model__models.yaml"
+    assert len(manifest.get_nodes_by_patch_path(yaml_file, dbt_project_dir)) == 1
+
+
+def test_dbt_manifest_path_indexes_exact_match(temp_complete_git_repo):
+    os.chdir(temp_complete_git_repo)
+    dbt_project_dir = temp_complete_git_repo / "dbt_project"
+    manifest = dbt.DbtManifest(dbt_project_dir / "target" / "manifest.json")
+
+    # A path that contains the original_file_path as a substring must not match
+    other_file = dbt_project_dir / "other" / "models" / "test" / "model" / "model.sql"
+    assert manifest.get_nodes_by_file_path(other_file, dbt_project_dir) == []
+    # Files outside the dbt project directory never match
+    outside_file = temp_complete_git_repo / "models" / "test" / "model" / "model.sql"
+    assert manifest.get_nodes_by_file_path(outside_file, dbt_project_dir) == []
+
+
+def test_dbt_manifest_path_indexes_symlink(temp_complete_git_repo, tmp_path):
+    dbt_project_dir = temp_complete_git_repo / "dbt_project"
+    manifest = dbt.DbtManifest(dbt_project_dir / "target" / "manifest.json")
+    link_dir = tmp_path / "link"
+    link_dir.symlink_to(dbt_project_dir)
+    model_file = pathlib.Path("models") / "test" / "model" / "model.sql"
+
+    original_resolve = pathlib.Path.resolve
+    with mock.patch.object(
+        pathlib.Path, "resolve", autospec=True, side_effect=original_resolve
+    ) as mock_resolve:
+        for _ in range(3):
+            # The file through the symlink, or the real file
+            assert len(manifest.get_nodes_by_file_path(link_dir / model_file, link_dir))
+            assert len(
+                manifest.get_nodes_by_file_path(dbt_project_dir / model_file, link_dir)
+            )
+    # The dbt project directory is resolved only once
+    assert mock_resolve.call_count == 1
+
+
+def test_dbt_manifest_patch_path_package(tmp_path):
+    # An installed package can document its nodes in a yaml file with the same
+    # path, relative to the package, as a yaml file of the project
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(
+        json.dumps(
+            {
+                "nodes": {
+                    "model.project.model": {
+                        "resource_type": "model",
+                        "package_name": "project",
+                        "patch_path": "project://models/schema.yml",
+                    },
+                    "model.package.model": {
+                        "resource_type": "model",
+                        "package_name": "package",
+                        "patch_path": "package://models/schema.yml",
+                    },
+                }
+            }
+        )
+    )
+    manifest = dbt.DbtManifest(manifest_path)
+    yaml_file = tmp_path / "models" / "schema.yml"
+
+    assert manifest.get_nodes_by_patch_path(yaml_file, tmp_path, "project") == [
+        manifest.nodes["model.project.model"]
+    ]
+    assert manifest.get_nodes_by_patch_path(yaml_file, tmp_path, "package") == [
+        manifest.nodes["model.package.model"]
+    ]
+    assert len(manifest.get_nodes_by_patch_path(yaml_file, tmp_path)) == 2
+
+
+def test_dbt_manifest_sections(temp_complete_git_repo):
+    os.chdir(temp_complete_git_repo)
+    manifest = dbt.DbtManifest(
+        temp_complete_git_repo / "dbt_project" / "target" / "manifest.json",
+        sections=["nodes"],
+    )
+    assert len(manifest.nodes.values()) == 2
+    assert len(manifest.model_nodes.values()) == 1
+    assert manifest.macros == {}
+    assert manifest.sources == {}
+    assert manifest.exposures == {}
+
+
+def test_dbt_manifest_shared_nodes(temp_complete_git_repo):
+    os.chdir(temp_complete_git_repo)
+    manifest = dbt.DbtManifest(
+        temp_complete_git_repo / "dbt_project" / "target" / "manifest.json"
+    )
+    # Typed views hold the same objects as nodes
+    model_key = "model.project.model"
+    assert manifest.nodes[model_key] is manifest.model_nodes[model_key]
+    assert isinstance(manifest.nodes[model_key], dbt.DbtModel)
+    test_key = "test.project.unique_table_test.c5cd5696d4"
+    assert manifest.nodes[test_key] is manifest.test_nodes[test_key]
+    assert isinstance(manifest.nodes[test_key], dbt.DbtTest)
+    assert manifest.seed_nodes == {}
+    assert manifest.snapshot_nodes == {}
+
+
+def test_dbt_manifest_downstream_nodes(tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(
+        json.dumps(
+            {
+                "nodes": {
+                    "model.project.a": {"resource_type": "model"},
+                    "model.project.b": {
+                        "resource_type": "model",
+                        "depends_on": {"nodes": ["model.project.a"]},
+                    },
+                    "test.project.b_unique": {
+                        "resource_type": "test",
+                        "depends_on": {"nodes": ["model.project.b"]},
+                    },
+                    "model.project.c": {
+                        "resource_type": "model",
+                        "depends_on": {"nodes": ["model.project.a", "model.project.b"]},
+                    },
+                    "model.project.d": {"resource_type": "model"},
+                }
+            }
+        )
+    )
+    manifest = dbt.DbtManifest(manifest_path)
+    nodes = manifest.nodes
+
+    assert manifest.get_downstream_nodes([nodes["model.project.a"]]) == [
+        nodes["model.project.b"],
+        nodes["model.project.c"],
+        nodes["test.project.b_unique"],
+    ]
+    assert manifest.get_downstream_nodes(
+        [nodes["model.project.a"]], resource_type="model"
+    ) == [nodes["model.project.b"], nodes["model.project.c"]]
+    assert manifest.get_downstream_nodes([nodes["model.project.d"]]) == []
+
+
+def test_dbt_manifest_downstream_nodes_of_macros(tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(
+        json.dumps(
+            {
+                "nodes": {
+                    "model.project.a": {
+                        "resource_type": "model",
+                        "depends_on": {"macros": ["macro.project.outer"]},
+                    },
+                    "model.project.b": {
+                        "resource_type": "model",
+                        "depends_on": {"nodes": ["model.project.a"]},
+                    },
+                    "model.project.c": {"resource_type": "model"},
+                },
+                "macros": {
+                    "macro.project.inner": {"resource_type": "macro"},
+                    "macro.project.outer": {
+                        "resource_type": "macro",
+                        "depends_on": {"macros": ["macro.project.inner"]},
+                    },
+                },
+            }
+        )
+    )
+    manifest = dbt.DbtManifest(manifest_path)
+
+    # Models that use a changed macro, directly or through other macros
+    assert manifest.get_downstream_nodes(
+        [manifest.macros["macro.project.inner"]], resource_type="model"
+    ) == [manifest.nodes["model.project.a"], manifest.nodes["model.project.b"]]
+    assert manifest.get_downstream_nodes([manifest.macros["macro.project.inner"]]) == [
+        manifest.macros["macro.project.outer"],
+        manifest.nodes["model.project.a"],
+        manifest.nodes["model.project.b"],
+    ]
+
+
+def test_dbt_manifest_modified_nodes(tmp_path):
+    nodes = {
+        "model.project.unchanged": {
+            "resource_type": "model",
+            "checksum": {"name": "sha256", "checksum": "a"},
+            "config": {"materialized": "view"},
+            "columns": {"id": {"name": "id", "description": "Id"}},
+        },
+        "model.project.code": {
+            "resource_type": "model",
+            "checksum": {"name": "sha256", "checksum": "b"},
+        },
+        "model.project.config": {
+            "resource_type": "model",
+            "config": {"materialized": "table"},
+        },
+        "model.project.column_docs": {
+            "resource_type": "model",
+            "columns": {"id": {"name": "id", "description": "New docs"}},
+        },
+        "model.project.new": {"resource_type": "model"},
+    }
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(json.dumps({"nodes": nodes}))
+    manifest = dbt.DbtManifest(manifest_path)
+
+    state_nodes = {
+        "model.project.unchanged": nodes["model.project.unchanged"],
+        "model.project.code": {
+            "resource_type": "model",
+            "checksum": {"name": "sha256", "checksum": "a"},
+        },
+        "model.project.config": {
+            "resource_type": "model",
+            "config": {"materialized": "view"},
+        },
+        "model.project.column_docs": {
+            "resource_type": "model",
+            "columns": {"id": {"name": "id", "description": "Id"}},
+        },
+        "model.project.deleted": {"resource_type": "model"},
+    }
+    assert manifest.get_modified_nodes(state_nodes) == [
+        manifest.nodes["model.project.code"],
+        manifest.nodes["model.project.config"],
+        manifest.nodes["model.project.column_docs"],
+        manifest.nodes["model.project.new"],
+    ]
@@ -1,4 +1,7 @@
+from unittest import mock
+
 import pytest
+import sqlglot
 
 from dbt_opiner import dbt
 
@@ -187,7 +190,7 @@ from dbt_opiner import dbt
 )
 def test_ast_extracted_columns(node_dict, expected_columns):
     node = dbt.DbtModel(node_dict, "duckdb")
-    node.ast_extracted_columns == expected_columns
+    assert node.ast_extracted_columns == expected_columns
 
 
 # test logic in docs_yml_file_path property
@@ -210,3 +213,105 @@ def test_ast_extracted_columns(node_dict, expected_columns):
 def test_docs_yml_file_path(node_dict, expected_path):
     node = dbt.DbtModel(node_dict)
     assert node.docs_yml_file_path == expected_path
+
+
+def test_ast_caches():
+    dbt.DbtModel.cache_stats.clear()
+    node = dbt.DbtModel(
+        {
+            "compiled_code": """
+            with customers as (select * from dim_customers)
+            select customers.*, 1 as one from customers"""
+        },
+        "duckdb",
+    )
+    columns = node.ast_extracted_columns
+    assert node.ast_extracted_columns is columns
+    assert node.ast_star_columns == ["* from customers"]
+    # The AST is qualified only once
+    with mock.patch("sqlglot.optimizer.qualify.qualify") as mock_qualify:
+        node.ast_extracted_columns
+        node.ast_star_columns
+        node.qualified_sql_code_ast
+        mock_qualify.assert_not_called()
+
+    assert dbt.DbtModel.cache_stats["qualified_sql_code_ast.misses"] == 1
+    assert dbt.DbtModel.cache_stats["ast_extracted_columns.misses"] == 1
+    assert dbt.DbtModel.cache_stats["ast_extracted_columns.hits"] == 3
+    assert "ast_extracted_columns: 3 hits, 1 misses (75.0% hit rate)" in (
+        dbt.DbtModel.get_cache_stats_summary()
+    )
+
+
+def test_sql_code_ast_parsed_once(caplog):
+    node = dbt.DbtModel({"compiled_code": "select id from dim_customers"}, "duckdb")
+    with mock.patch("sqlglot.parse_one", wraps=sqlglot.parse_one) as mock_parse_one:
+        assert node.sql_code_ast is node.sql_code_ast
+        mock_parse_one.assert_called_once()
+
+
+def test_sql_code_ast_malformed(caplog):
+    node = dbt.DbtModel({"compiled_code": "select id from from"}, "duckdb")
+    assert node.sql_code_ast is None
+    assert node.ast_extracted_columns == []
+    # The error is logged only once
+    assert caplog.text.count("Malformed SQL code") == 1
+
+
+def test_preparse():
+    nodes = [
+        dbt.DbtModel({"compiled_code": "select id, name from dim_customers"}, "duckdb"),
+        dbt.DbtModel({"compiled_code": "select id, name from dim_customers"}, "duckdb"),
+        dbt.DbtModel({"compiled_code": "select * from dim_customers"}, "duckdb"),
+        dbt.DbtModel({"compiled_code": "select id from from"}, "duckdb"),
+        dbt.DbtModel({}, "duckdb"),
+    ]
+    dbt.DbtModel.cache_stats.clear()
+    dbt.DbtModel.preparse(nodes, jobs=2)
+
+    # Columns were extracted in the worker processes, and their cache misses are
+    # counted in the parent process
+    assert not any(node._sql_code_ast_parsed for node in nodes)
+    assert dbt.DbtModel.cache_stats["ast_extracted_columns.misses"] == 3
+    assert dbt.DbtModel.cache_stats["sql_code_ast.misses"] == 3
+    assert nodes[0].ast_extracted_columns == ["id", "name"]
+    assert nodes[1].ast_extracted_columns == ["id", "name"]
+    assert nodes[2].ast_star_columns == ["* from dim_customers"]
+    assert nodes[3].ast_extracted_columns == []
+    assert nodes[4].ast_extracted_columns == []
+
+
+def test_preparse_serial():
+    node = dbt.DbtModel({"compiled_code": "select id from dim_customers"}, "duckdb")
+    other_node = dbt.DbtModel({"compiled_code": "select 1 as one"}, "duckdb")
+    dbt.DbtModel.preparse([node, other_node], jobs=1)
+    assert node._ast_extracted_columns is None
+    assert other_node._ast_extracted_columns is None
+
+
+def test_preparse_without_fork():
+    nodes = [
+        dbt.DbtModel({"compiled_code": "select id from dim_customers"}, "duckdb"),
+        dbt.DbtModel({"compiled_code": "select 1 as one"}, "duckdb"),
+    ]
+    with (
+        mock.patch("multiprocessing.get_all_start_methods", return_value=["spawn"]),
+        mock.patch("concurrent.futures.ProcessPoolExecutor") as mock_executor,
+    ):
+        dbt.DbtModel.preparse(nodes, jobs=2)
+    # Models are parsed when their columns are accessed
+    mock_executor.assert_not_called()
+    assert nodes[0]._ast_extracted_columns is None
+    assert nodes[0].ast_extracted_columns == ["id"]
+
+
+def test_preparse_worker_exception():
+    nodes = [
+        dbt.DbtModel({"compiled_code": "select id from dim_customers"}, "duckdb"),
+        dbt.DbtModel({"compiled_code": "select 1 as one"}, "duckdb"),
+    ]
+    with mock.patch.object(
+        dbt.DbtModel, "_extract_columns_from_ast", side_effect=ValueError("error")
+    ):
+        with pytest.raises(ValueError, match="error"):
+            dbt.DbtModel.preparse(nodes, jobs=2)
@@ -1,7 +1,9 @@
 import os
+import pathlib
 from unittest import mock
 
 from dbt_opiner import dbt
+from dbt_opiner import timings
 
 
 def test_dbt_project(temp_complete_git_repo):
@@ -34,3 +36,51 @@ def test_dbt_project_filter_files(temp_complete_git_repo):
         dbt_project_all_files = dbt.DbtProject(dbt_project_path, all_files=True)
         # Check that the file was filtered
         assert dbt_project_all_files.files["sql"] == []
+
+
+def test_dbt_project_ignored_dirs(temp_complete_git_repo):
+    os.chdir(temp_complete_git_repo / "dbt_project")
+    for dir_name in ["target", "dbt_packages", "logs", ".venv"]:
+        (pathlib.Path(dir_name) / "models").mkdir(parents=True, exist_ok=True)
+        (pathlib.Path(dir_name) / "models" / "ignored.sql").write_text("select 1")
+        (pathlib.Path(dir_name) / "models" / "ignored.yml").write_text("version: 2")
+    dbt_project_path = pathlib.Path("dbt_project.yml")
+
+    dbt_project_all_files = dbt.DbtProject(dbt_project_path, all_files=True)
+    assert [str(file.path) for file in dbt_project_all_files.files["sql"]] == [
+        "macros/my_macro.sql",
+        "models/test/model/model.sql",
+    ]
+    assert len(dbt_project_all_files.files["yaml"]) == 3
+
+    dbt_project_files = dbt.DbtProject(
+        dbt_project_path,
+        files=[
+            pathlib.Path("target/models/ignored.sql"),
+            pathlib.Path("dbt_packages/models/ignored.sql"),
+            pathlib.Path.cwd().resolve() / "logs" / "models" / "ignored.sql",
+            pathlib.Path("models/test/model/model.sql"),
+        ],
+    )
+    assert [str(file.path) for file in dbt_project_files.files["sql"]] == [
+        "models/test/model/model.sql"
+    ]
+
+
+def test_dbt_project_compile_manifest_phase(temp_complete_git_repo):
+    os.chdir(temp_complete_git_repo)
+    run_timings = timings.get_timings()
+    run_timings.reset()
+    with mock.patch.object(dbt, "compile_dbt_manifest") as mock_compile:
+        dbt.DbtProject(
+            temp_complete_git_repo / "dbt_project" / "dbt_project.yml",
+            force_compile=True,
+        )
+    mock_compile.assert_called_once()
+    # Compiling the manifest is not timed as part of loading it
+    assert [timing.phase for timing in run_timings.phases] == [
+        "compile manifest",
+        "load manifest",
+        "load files",
+    ]
+    run_timings.reset()
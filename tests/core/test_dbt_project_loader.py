@@ -1,5 +1,8 @@
+import json
 import os
 import pathlib
+import subprocess
+from unittest import mock
 
 import pytest
 
@@ -68,6 +71,35 @@ def test_dbt_project_loader(
     assert len(project_loaded_files.get("markdown", [])) == expected_md_files
 
 
+@pytest.mark.parametrize(
+    "dir_parts",
+    [
+        pytest.param(["dbt_project"], id="dbt project directory"),
+        pytest.param([], id="Directory above the dbt project"),
+    ],
+)
+@pytest.mark.parametrize("relative", [True, False])
+def test_dbt_project_loader_dir_is_pruned(temp_complete_git_repo, dir_parts, relative):
+    os.chdir(temp_complete_git_repo)
+    dir_path = pathlib.Path(*dir_parts) if dir_parts else pathlib.Path(".")
+    if not relative:
+        dir_path = temp_complete_git_repo / dir_path
+    loader = dbt.DbtProjectLoader()
+    with mock.patch("os.scandir", wraps=os.scandir) as mock_scandir:
+        files = loader._get_dir_files(dir_path)
+    scanned_dirs = {
+        pathlib.Path(call.args[0]).name for call in mock_scandir.call_args_list
+    }
+    # Directories that are not part of the project code are not walked
+    assert scanned_dirs.isdisjoint({"target", "dbt_packages", ".venv", "logs"})
+    assert "models" in scanned_dirs
+    assert sorted(
+        file.resolve().relative_to(temp_complete_git_repo / "dbt_project").as_posix()
+        for file in files
+        if file.suffix == ".sql"
+    ) == ["macros/my_macro.sql", "models/test/model/model.sql"]
+
+
 # Test value error for all_files and changed_files
 @pytest.mark.parametrize(
     "all_files, changed_files",
@@ -94,3 +126,249 @@ def test_not_git_repo(tmpdir):
     loader = dbt.DbtProjectLoader()
     with pytest.raises(FileNotFoundError):
         loader.initialize_dbt_projects(all_files=True)
+
+
+@pytest.mark.parametrize(
+    "discovery, expected_md_files",
+    [
+        pytest.param("git", ["models/test/model/model.md"], id="Tracked files"),
+        pytest.param(
+            "git-untracked",
+            ["models/test/model/model.md", "models/test/model_2/untracked.md"],
+            id="Tracked and untracked files",
+        ),
+    ],
+)
+def test_dbt_project_loader_git_discovery(
+    temp_complete_git_repo, discovery, expected_md_files
+):
+    os.chdir(temp_complete_git_repo)
+    (temp_complete_git_repo / ".git").unlink()
+    subprocess.run(["git", "init", "-q"], check=True)
+    subprocess.run(["git", "add", "-A"], check=True)
+
+    dbt_project_dir = temp_complete_git_repo / "dbt_project"
+    model_2_dir = dbt_project_dir / "models" / "test" / "model_2"
+    # Untracked, ignored and deleted files
+    (model_2_dir / "untracked.md").touch()
+    (dbt_project_dir / ".gitignore").write_text("ignored.md\n")
+    (model_2_dir / "ignored.md").touch()
+    (model_2_dir / "deleted.md").touch()
+    subprocess.run(
+        ["git", "add", "dbt_project/.gitignore", str(model_2_dir / "deleted.md")],
+        check=True,
+    )
+    (model_2_dir / "deleted.md").unlink()
+
+    loader = dbt.DbtProjectLoader(discovery=discovery)
+    projects = loader.initialize_dbt_projects(all_files=True)
+
+    # The nested dbt projects in dbt_packages and .venv belong to the outer one
+    assert len(projects) == 1
+    assert projects[0].dbt_project_file_path == dbt_project_dir / "dbt_project.yml"
+    assert [
+        file.path.relative_to(dbt_project_dir).as_posix()
+        for file in projects[0].files["sql"]
+    ] == ["macros/my_macro.sql", "models/test/model/model.sql"]
+    assert len(projects[0].files["yaml"]) == 3
+    assert [
+        file.path.relative_to(dbt_project_dir).as_posix()
+        for file in projects[0].files["markdown"]
+    ] == expected_md_files
+
+
+def test_dbt_project_loader_git_discovery_fallback(temp_complete_git_repo, caplog):
+    # .git is not a real git repository, so git can't list the files
+    os.chdir(temp_complete_git_repo)
+    loader = dbt.DbtProjectLoader(discovery="git")
+    projects = loader.initialize_dbt_projects(all_files=True)
+    assert "Can't list files with git, walking directories" in caplog.text
+    assert len(projects[0].files["sql"]) == 2
+
+
+def test_dbt_project_loader_unknown_discovery():
+    with pytest.raises(ValueError):
+        dbt.DbtProjectLoader(discovery="find")
+
+
+def test_dbt_project_loader_memoized_lookups(temp_complete_git_repo):
+    os.chdir(temp_complete_git_repo)
+    model_dir = temp_complete_git_repo / "dbt_project" / "models" / "test" / "model"
+    files = [model_dir / f"model_{i}.sql" for i in range(20)]
+    loader = dbt.DbtProjectLoader()
+
+    checked_paths = []
+    original_exists = pathlib.Path.exists
+
+    def exists(path):
+        checked_paths.append(path)
+        return original_exists(path)
+
+    with mock.patch.object(pathlib.Path, "exists", exists):
+        dbt_project_yml_paths = {loader._find_dbt_project_yml(file) for file in files}
+
+    assert dbt_project_yml_paths == {
+        temp_complete_git_repo / "dbt_project" / "dbt_project.yml"
+    }
+    # Each directory is checked at most once for .git and dbt_project.yml
+    assert len(checked_paths) == len(set(checked_paths))
+    # Directories under the dbt project aren't checked once it's found
+    assert model_dir / "dbt_project.yml" not in checked_paths
+
+
+@pytest.mark.parametrize(
+    "with_children, expected_sql_files, expected_yaml_files",
+    [
+        pytest.param(False, ["models/test/model/model.sql"], [], id="Changed files"),
+        pytest.param(
+            True,
+            ["models/test/model/model.sql", "models/test/child/child.sql"],
+            ["models/test/child/_child__models.yaml"],
+            id="Changed files and downstream models",
+        ),
+    ],
+)
+def test_dbt_project_loader_changed_since(
+    temp_complete_git_repo, with_children, expected_sql_files, expected_yaml_files
+):
+    os.chdir(temp_complete_git_repo)
+    dbt_project_dir = temp_complete_git_repo / "dbt_project"
+    child_dir = dbt_project_dir / "models" / "test" / "child"
+    child_dir.mkdir()
+    (child_dir / "child.sql").write_text("select id from {{ ref('model') }}")
+    (child_dir / "_child__models.yaml").write_text("version: 2\n")
+    manifest_path = dbt_project_dir / "target" / "manifest.json"
+    manifest = json.loads(manifest_path.read_text())
+    manifest["nodes"]["model.project.child"] = {
+        "resource_type": "model",
+        "package_name": "project",
+        "name": "child",
+        "alias": "child",
+        "original_file_path": "models/test/child/child.sql",
+        "patch_path": "dbt_project://models/test/child/_child__models.yaml",
+        "depends_on": {"nodes": ["model.project.model"]},
+    }
+    manifest_path.write_text(json.dumps(manifest))
+
+    (temp_complete_git_repo / ".git").unlink()
+    git = ["git", "-c", "user.name=test", "-c", "user.email=test@test.com"]
+    subprocess.run(git + ["init", "-q"], check=True)
+    subprocess.run(git + ["add", "-A"], check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "init"], check=True)
+    (dbt_project_dir / "models" / "test" / "model" / "model.sql").write_text(
+        "select id from table"
+    )
+
+    loader = dbt.DbtProjectLoader()
+    projects = loader.initialize_dbt_projects(
+        changed_since="HEAD", with_children=with_children
+    )
+
+    assert len(projects) == 1
+    assert [
+        file.path.relative_to(dbt_project_dir).as_posix()
+        for file in projects[0].files["sql"]
+    ] == expected_sql_files
+    assert [
+        file.path.relative_to(dbt_project_dir).as_posix()
+        for file in projects[0].files["yaml"]
+    ] == expected_yaml_files
+
+
+def test_dbt_project_loader_changed_since_errors(temp_complete_git_repo, caplog):
+    os.chdir(temp_complete_git_repo)
+    (temp_complete_git_repo / ".git").unlink()
+    subprocess.run(["git", "init", "-q"], check=True)
+    loader = dbt.DbtProjectLoader()
+    with pytest.raises(SystemExit):
+        loader.initialize_dbt_projects(changed_since="unknown_ref")
+    assert "Can't get the files changed since unknown_ref" in caplog.text
+    with pytest.raises(ValueError):
+        loader.initialize_dbt_projects(changed_since="HEAD", all_files=True)
+
+
+@pytest.mark.parametrize(
+    "state_changes, expected_sql_files, expected_yaml_files",
+    [
+        pytest.param({}, [], [], id="No modified nodes"),
+        pytest.param(
+            {"description": "old description"},
+            ["models/test/model/model.sql"],
+            ["models/test/model/_model__models.yaml"],
+            id="Modified model",
+        ),
+        pytest.param(
+            {"metadata": {"project_name": "other_project"}},
+            None,
+            None,
+            id="State manifest of another project",
+        ),
+    ],
+)
+def test_dbt_project_loader_state(
+    temp_complete_git_repo, state_changes, expected_sql_files, expected_yaml_files
+):
+    dbt_project_dir = temp_complete_git_repo / "dbt_project"
+    os.chdir(dbt_project_dir / "models")
+    manifest_path = dbt_project_dir / "target" / "manifest.json"
+    manifest = json.loads(manifest_path.read_text())
+    # Nodes must belong to the project to be linted
+    for node in manifest["nodes"].values():
+        node["package_name"] = "project"
+    manifest_path.write_text(json.dumps(manifest))
+
+    state_manifest = json.loads(manifest_path.read_text())
+    state_manifest["metadata"] = state_changes.pop("metadata", {})
+    state_manifest["nodes"]["model.project.model"].update(state_changes)
+    state_path = temp_complete_git_repo / "prod_manifest.json"
+    state_path.write_text(json.dumps(state_manifest))
+
+    loader = dbt.DbtProjectLoader()
+    # The dbt project is found from the current directory, without walking the
+    # repository nor using git
+    with (
+        mock.patch.object(loader, "_find_all_dbt_project_ymls") as mock_find_all,
+        mock.patch.object(loader, "_find_git_root") as mock_find_git_root,
+    ):
+        projects = loader.initialize_dbt_projects(state=str(state_path))
+    mock_find_all.assert_not_called()
+    mock_find_git_root.assert_not_called()
+
+    if expected_sql_files is None:
+        assert projects == []
+        return
+    assert len(projects) == 1
+    assert [
+        file.path.relative_to(dbt_project_dir).as_posix()
+        for file in projects[0].files["sql"]
+    ] == expected_sql_files
+    assert [
+        file.path.relative_to(dbt_project_dir).as_posix()
+        for file in projects[0].files["yaml"]
+    ] == expected_yaml_files
+
+
+def test_dbt_project_loader_state_project_dir(temp_complete_git_repo, tmp_path):
+    # Outside of the dbt project, the dbt project of the target directory of the
+    # state manifest is used
+    state_path = temp_complete_git_repo / "dbt_project" / "target" / "manifest.json"
+    os.chdir(tmp_path)
+    loader = dbt.DbtProjectLoader()
+    projects = loader.initialize_dbt_projects(state=str(state_path))
+    assert [project.dbt_project_file_path for project in projects] == [
+        temp_complete_git_repo / "dbt_project" / "dbt_project.yml"
+    ]
+
+    # Without a dbt project, the run exits
+    state_path = temp_complete_git_repo / "prod_manifest.json"
+    state_path.write_text("{}")
+    with pytest.raises(SystemExit):
+        loader.initialize_dbt_projects(state=str(state_path))
+
+
+def test_dbt_project_loader_state_not_found(temp_complete_git_repo, caplog):
+    os.chdir(temp_complete_git_repo)
+    loader = dbt.DbtProjectLoader()
+    with pytest.raises(SystemExit):
+        loader.initialize_dbt_projects(state="missing_manifest.json")
+    assert "Can't read the state manifest missing_manifest.json" in caplog.text
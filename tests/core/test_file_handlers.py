@@ -1,8 +1,11 @@
+import json
+import pathlib
 from unittest import mock
 
 import pytest
 import yaml
 
+from dbt_opiner import dbt
 from dbt_opiner import file_handlers
 
 
@@ -42,13 +45,53 @@ def test_get_no_qa_opinion(dbt_project, no_qa_opinions):
     assert handler.no_qa_opinions == [no_qa_opinions]
 
 
+def test_no_qa_index(dbt_project):
+    model_dir = dbt_project.dbt_project_dir_path / "models" / "test" / "model"
+    yaml_path = model_dir / "_model__models.yaml"
+    with open(yaml_path, "a") as file:
+        file.write("# noqa: dbt-opiner O001\n")
+    dbt_project.no_qa_index = file_handlers.NoQaIndex()
+
+    opened_paths = []
+    original_open = open
+
+    def tracked_open(path, *args, **kwargs):
+        opened_paths.append(str(path))
+        return original_open(path, *args, **kwargs)
+
+    with mock.patch("builtins.open", tracked_open):
+        handlers = [
+            file_handlers.SqlFileHandler(model_dir / "model.sql", dbt_project)
+            for _ in range(3)
+        ]
+        # The directives of the docs yaml are added to the sql file
+        assert all(handler.no_qa_opinions == ["O001"] for handler in handlers)
+
+    # The docs yaml is read only once
+    assert opened_paths.count(str(yaml_path)) == 1
+
+    # The directives of the yaml file are indexed when they are loaded
+    file_handlers.YamlFileHandler(yaml_path, dbt_project).no_qa_opinions
+    assert dbt_project.no_qa_index.get(yaml_path) == ["O001"]
+
+
+def test_no_qa_index_fallback(tmpdir):
+    # A dbt project without a noqa index (e.g. a mock) gets a private one
+    file_path = pathlib.Path(tmpdir) / "file.yml"
+    file_path.write_text("# noqa: dbt-opiner O001\n")
+    handler = file_handlers.YamlFileHandler(file_path, mock.MagicMock())
+    assert handler.no_qa_opinions == ["O001"]
+    assert handler._no_qa_index.get(file_path) == ["O001"]
+
+
 def test_not_found_in_manifest(dbt_project):
     file = (
         dbt_project.dbt_project_dir_path / "models" / "test" / "model_2" / "model_2.sql"
     )
     file.touch()
+    handler = file_handlers.SqlFileHandler(file, dbt_project)
     with pytest.raises(SystemExit) as excinfo:
-        file_handlers.SqlFileHandler(file, dbt_project)
+        handler.dbt_node
     assert excinfo.value.code == 1
 
 
@@ -66,10 +109,11 @@ def test_wrong_extension_sql(dbt_project):
 
 def test_runtime_open(dbt_project):
     file = dbt_project.dbt_project_dir_path / "models" / "test" / "model" / "model.sql"
+    handler = file_handlers.SqlFileHandler(file, dbt_project)
     with mock.patch("pathlib.Path.open") as mock_open:
         mock_open.side_effect = Exception("Mocked exception")
         with pytest.raises(RuntimeError, match="Error reading file: Mocked exception"):
-            file_handlers.SqlFileHandler(file, dbt_project)
+            handler.content
 
 
 # Test file_handlers.YamlFileHandler
@@ -83,6 +127,12 @@ def test_yaml_file_handler(dbt_project):
     )
     handler = file_handlers.YamlFileHandler(file, dbt_project)
     assert handler.dbt_nodes[0].type == "model"
+    # The yaml file and the sql file share the same node object
+    sql_file = (
+        dbt_project.dbt_project_dir_path / "models" / "test" / "model" / "model.sql"
+    )
+    sql_handler = file_handlers.SqlFileHandler(sql_file, dbt_project)
+    assert handler.dbt_nodes[0] is sql_handler.dbt_node
     assert handler.to_dict() == {
         "version": 2,
         "models": [
@@ -99,6 +149,33 @@ def test_yaml_file_handler(dbt_project):
     assert handler.get("version") == 2
 
 
+def test_yaml_file_handler_package_node(dbt_project):
+    # A package node with the same patch_path is not a node of the project file
+    manifest_path = dbt_project.dbt_project_dir_path / "target" / "manifest.json"
+    manifest_dict = json.loads(manifest_path.read_text())
+    manifest_dict["nodes"]["model.package.model"] = {
+        "resource_type": "model",
+        "name": "model",
+        "package_name": "package",
+        "original_file_path": "models/package_model.sql",
+        "patch_path": "package://models/test/model/_model__models.yaml",
+    }
+    manifest_path.write_text(json.dumps(manifest_dict))
+    dbt_project.dbt_manifest = dbt.DbtManifest(manifest_path)
+
+    file = (
+        dbt_project.dbt_project_dir_path
+        / "models"
+        / "test"
+        / "model"
+        / "_model__models.yaml"
+    )
+    handler = file_handlers.YamlFileHandler(file, dbt_project)
+    assert handler.dbt_nodes == [dbt_project.dbt_manifest.nodes["model.project.model"]]
+    # The package sql file, missing in the project, is not read for no qa opinions
+    assert handler.no_qa_opinions == []
+
+
 def test_wrong_extension_yaml(dbt_project):
     file = dbt_project.dbt_project_dir_path / "models" / "test" / "model" / "model.md"
     with pytest.raises(ValueError):
@@ -0,0 +1,69 @@
+import subprocess
+import sys
+
+import pytest
+
+# Dependencies that are slow to import and must only be imported when needed
+LAZY_MODULES = ["pandas", "tabulate", "sqlglot", "pyfiglet", "requests"]
+
+
+def _imported_modules(code: str) -> set[str]:
+    """Run code in a new interpreter with -X importtime and return the names of
+    the imported modules. The modules in sys.modules at the end are added too,
+    since importlib.import_module is not reported by -X importtime."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"{code}\nimport sys\nprint('\\n'.join(sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        line.rsplit("|", 1)[1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and "|" in line
+    } | set(result.stdout.splitlines())
+
+
+def test_cli_import_is_lazy():
+    modules = _imported_modules("import dbt_opiner.cli")
+    assert "dbt_opiner.cli" in modules
+    for lazy_module in LAZY_MODULES:
+        assert lazy_module not in modules
+    # Opinion modules are imported when the opinions pack is loaded
+    assert not any(module.startswith("dbt_opiner.opinions.O0") for module in modules)
+
+
+def test_ignored_opinions_are_not_imported():
+    modules = _imported_modules(
+        "from unittest import mock\n"
+        "from dbt_opiner.opinions import opinions_pack\n"
+        "config = {'opinions_config': {'ignore_opinions': ['O001', 'P002']}}\n"
+        "with mock.patch('dbt_opiner.config_singleton.ConfigSingleton') as singleton:\n"
+        "    singleton.return_value.get_config.return_value = config\n"
+        "    opinions_pack.OpinionsPack()\n"
+    )
+    assert "dbt_opiner.opinions.O002_model_description_must_have_keywords" in modules
+    assert "dbt_opiner.opinions.O001_model_must_have_description" not in modules
+    assert "dbt_opiner.opinions.P002_project_must_not_send_anon_stats" not in modules
+
+
+@pytest.mark.parametrize(
+    "code, expected_sqlglot",
+    [
+        pytest.param("model.compiled_code", False, id="Model without AST access"),
+        pytest.param("model.sql_code_ast", True, id="Model AST access"),
+    ],
+)
+def test_sqlglot_imported_on_ast_access(code, expected_sqlglot):
+    modules = _imported_modules(
+        "from dbt_opiner import dbt\n"
+        "model = dbt.DbtModel({'compiled_code': 'select 1 as id'}, 'duckdb')\n"
+        f"{code}\n"
+    )
+    assert ("sqlglot" in modules) == expected_sqlglot
@@ -1,13 +1,18 @@
 import logging
 import os
+import pathlib
 from unittest import mock
 
 import pytest
 from loguru import logger
 
+from dbt_opiner import cache
 from dbt_opiner import dbt
+from dbt_opiner import file_handlers
 from dbt_opiner import linter
 from dbt_opiner import opinions
+from dbt_opiner import sinks
+from dbt_opiner import timings
 from dbt_opiner.opinions import opinions_pack
 
 
@@ -99,6 +104,29 @@ def test_get_lint_results(base_linter, mock_sqlfilehandler, mock_yamlfilehandler
     assert base_linter.get_lint_results(True) == [lint_result_1]
 
 
+def test_deduplicate_results_by_opinion(
+    base_linter, mock_sqlfilehandler, mock_yamlfilehandler
+):
+    yaml_file = mock_yamlfilehandler
+    yaml_file.path = "test.yaml"
+    sql_file = mock_sqlfilehandler
+    sql_file.dbt_node = dbt.DbtBaseNode({"patch_path": "test.yaml"})
+
+    yaml_result = linter.LintResult(
+        yaml_file, "C001", False, linter.OpinionSeverity.SHOULD, "message"
+    )
+    sql_result = linter.LintResult(
+        sql_file, "C001", False, linter.OpinionSeverity.SHOULD, "message"
+    )
+    other_sql_result = linter.LintResult(
+        sql_file, "C002", False, linter.OpinionSeverity.SHOULD, "message"
+    )
+
+    base_linter._lint_results = [sql_result, other_sql_result, yaml_result]
+    # Only the sql result of the opinion also evaluated in the yaml file is removed
+    assert base_linter._deduplicate_results() == [other_sql_result, yaml_result]
+
+
 @pytest.mark.parametrize(
     "result_type, expected",
     [
@@ -178,3 +206,245 @@ def test_log_results_and_exit(linter_with_results, caplog):
             )
         # Check that sys.exit was called with 1 because there are failed results
         mock_exit.assert_called_once_with(1)
+
+
+def test_lint_files_in_processes(dbt_project):
+    files = [file for files_list in dbt_project.files.values() for file in files_list]
+
+    # The models parsed in the worker processes are not parsed in this process,
+    # so the serial run after the parallel one parses them again
+    dbt.DbtModel.cache_stats.clear()
+    parallel_linter = linter.Linter(opinions_pack.OpinionsPack())
+    parallel_linter.lint_files(files, jobs=2)
+    parallel_cache_stats = dbt.DbtModel.cache_stats.copy()
+    dbt.DbtModel.cache_stats.clear()
+    serial_linter = linter.Linter(opinions_pack.OpinionsPack())
+    serial_linter.lint_files(files, jobs=1)
+
+    assert serial_linter._lint_results
+    # Results reference the same file handlers and are merged in the same order
+    # as in the serial run
+    assert parallel_linter._lint_results == serial_linter._lint_results
+    # The models caches hits and misses of the workers are counted. A model can
+    # be parsed in more than one worker, so there can be more misses.
+    serial_cache_stats = dbt.DbtModel.cache_stats
+    assert serial_cache_stats["ast_extracted_columns.misses"] > 0
+    assert (
+        parallel_cache_stats["ast_extracted_columns.misses"]
+        >= serial_cache_stats["ast_extracted_columns.misses"]
+    )
+    assert (
+        parallel_cache_stats["ast_extracted_columns.hits"]
+        + parallel_cache_stats["ast_extracted_columns.misses"]
+        == serial_cache_stats["ast_extracted_columns.hits"]
+        + serial_cache_stats["ast_extracted_columns.misses"]
+    )
+
+
+def test_lint_files_without_fork(dbt_project):
+    files = [file for files_list in dbt_project.files.values() for file in files_list]
+    linter_inst = linter.Linter(opinions_pack.OpinionsPack())
+    with (
+        mock.patch("multiprocessing.get_all_start_methods", return_value=["spawn"]),
+        mock.patch("concurrent.futures.ProcessPoolExecutor") as mock_executor,
+    ):
+        linter_inst.lint_files(files, jobs=2)
+    # Files are linted serially
+    mock_executor.assert_not_called()
+    assert linter_inst._lint_results
+
+
+def test_lint_files_worker_exception(dbt_project):
+    files = [file for files_list in dbt_project.files.values() for file in files_list]
+    linter_inst = linter.Linter(opinions_pack.OpinionsPack())
+    with mock.patch.object(
+        linter_inst, "lint_file", side_effect=ValueError("error")
+    ) as mock_lint_file:
+        # The exception of a worker process is raised in this process
+        with pytest.raises(ValueError, match="error"):
+            linter_inst.lint_files(files, jobs=2)
+    mock_lint_file.assert_not_called()
+    assert linter._worker_state is None
+
+
+def test_lint_files_with_result_cache(dbt_project, tmp_path):
+    files = [file for files_list in dbt_project.files.values() for file in files_list]
+    linter_inst = linter.Linter(
+        opinions_pack.OpinionsPack(),
+        result_cache=cache.LintResultCache(tmp_path / "lint.sqlite3", 1024 * 1024, {}),
+    )
+    linter_inst.lint_files(files)
+    assert linter_inst._lint_results
+
+    # Results of the unchanged files are reused without checking the opinions
+    cached_linter = linter.Linter(
+        opinions_pack.OpinionsPack(),
+        result_cache=cache.LintResultCache(tmp_path / "lint.sqlite3", 1024 * 1024, {}),
+    )
+    with mock.patch.object(opinions.O001, "check_opinion") as mock_check_opinion:
+        cached_linter.lint_files(files)
+        mock_check_opinion.assert_not_called()
+    assert cached_linter._lint_results == linter_inst._lint_results
+    assert cached_linter._result_cache.misses == 0
+
+
+def test_result_cache_key_inputs(dbt_project, tmp_path):
+    sql_file = file_handlers.SqlFileHandler(
+        dbt_project.dbt_project_dir_path / "models" / "test" / "model" / "model.sql",
+        dbt_project,
+    )
+    result_cache = cache.LintResultCache(tmp_path / "lint.sqlite3", 1024 * 1024, {})
+    file_key = linter.Linter._get_file_key(result_cache, sql_file)
+    assert linter.Linter._get_file_key(result_cache, sql_file) == file_key
+
+    # Changing the schema of a parent node changes the key (e.g. for L002)
+    parent_dict = {"resource_type": "model", "schema": "staging", "alias": "stg"}
+    dbt_project.dbt_manifest.nodes["model.project.parent"] = dbt.DbtModel(parent_dict)
+    model = dbt.DbtModel(
+        dict(sql_file.dbt_node.items())
+        | {"depends_on": {"nodes": ["model.project.parent"]}}
+    )
+    with mock.patch.object(
+        file_handlers.SqlFileHandler,
+        "dbt_node",
+        new_callable=mock.PropertyMock,
+        return_value=model,
+    ):
+        parent_key = linter.Linter._get_file_key(result_cache, sql_file)
+        assert parent_key != file_key
+        parent_dict["schema"] = "marts"
+        assert linter.Linter._get_file_key(result_cache, sql_file) != parent_key
+
+    # Changing dbt_project.yml changes the key (e.g. for P002 on profiles.yml)
+    dbt_project.dbt_project_file_path.write_text("name: project\nflags: {}\n")
+    result_cache = cache.LintResultCache(tmp_path / "lint.sqlite3", 1024 * 1024, {})
+    assert linter.Linter._get_file_key(result_cache, sql_file) != file_key
+
+
+def test_lint_files_with_opinion_profile(dbt_project):
+    files = [file for files_list in dbt_project.files.values() for file in files_list]
+    profiles = []
+    for jobs in [1, 2]:
+        opinion_profile = timings.OpinionProfile()
+        linter_inst = linter.Linter(
+            opinions_pack.OpinionsPack(), opinion_profile=opinion_profile
+        )
+        linter_inst.lint_files(files, jobs=jobs)
+        profiles.append(
+            [
+                (stat.opinion_code, stat.file_handler, stat.calls, stat.failed)
+                for stat in sorted(
+                    opinion_profile.get_stats(),
+                    key=lambda stat: (stat.opinion_code, stat.file_handler),
+                )
+            ]
+        )
+        failed = sum(not result.passed for result in linter_inst._lint_results)
+        assert sum(stat.failed for stat in opinion_profile.get_stats()) == failed
+
+    assert ("O001", "SqlFileHandler", 1, 0) in profiles[0]
+    # Checks in worker processes are recorded too
+    assert profiles[1] == profiles[0]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_lint_files_with_result_stream(dbt_project, jobs):
+    files = [file for files_list in dbt_project.files.values() for file in files_list]
+    serial_linter = linter.Linter(opinions_pack.OpinionsPack())
+    serial_linter.lint_files(files)
+
+    result_sink = mock.Mock(spec=sinks.ResultSink)
+    result_stream = sinks.ResultStream([result_sink])
+    linter_inst = linter.Linter(
+        opinions_pack.OpinionsPack(), result_stream=result_stream
+    )
+    linter_inst.lint_files(files, jobs=jobs)
+    # Results are reported as they are produced instead of being kept
+    assert linter_inst._lint_results == []
+    assert sorted(
+        tuple(call.args[0]) for call in result_sink.write.call_args_list
+    ) == sorted(
+        tuple(sinks.ResultRecord.from_lint_result(result))
+        for result in serial_linter.get_lint_results(deduplicate=True)
+    )
+
+    with mock.patch("sys.exit") as mock_exit:
+        linter_inst.log_results_and_exit()
+    result_sink.close.assert_called_once()
+    mock_exit.assert_called_once_with(result_stream.get_exit_code())
+
+
+def test_lint_files_reads_applicable_files(dbt_project):
+    files = [file for files_list in dbt_project.files.values() for file in files_list]
+    linter_inst = linter.Linter(opinions_pack.OpinionsPack())
+    linter_inst.opinions = [opinions.P002()]
+    linter_inst.lint_files(files)
+
+    # Only the files P002 applies to are read and no dbt node is resolved
+    assert sorted(file.path.name for file in files if file._content is not None) == [
+        "dbt_project.yml",
+        "profiles.yml",
+    ]
+    assert all(
+        file._dbt_node is None
+        for file in files
+        if isinstance(file, file_handlers.SqlFileHandler)
+    )
+
+
+def test_opinions_dispatch(base_linter, mock_sqlfilehandler, mock_yamlfilehandler):
+    base_linter.opinions = [opinions.O001(), opinions.D001(), opinions.P002()]
+    mock_sqlfilehandler.path = "model.sql"
+    mock_sqlfilehandler.no_qa_opinions = []
+    mock_sqlfilehandler.dbt_node = dbt.DbtModel({"resource_type": "model"})
+    mock_yamlfilehandler.path = pathlib.Path("profiles.yml")
+    mock_yamlfilehandler.no_qa_opinions = []
+    mock_yamlfilehandler.dbt_nodes = []
+
+    assert [
+        opinion.code
+        for opinion in base_linter._get_applicable_opinions(mock_sqlfilehandler)
+    ] == ["O001"]
+    assert [
+        opinion.code
+        for opinion in base_linter._get_applicable_opinions(mock_yamlfilehandler)
+    ] == ["D001", "P002"]
+
+    mock_sqlfilehandler.dbt_node = dbt.DbtMacro({"resource_type": "macro"})
+    assert base_linter._get_applicable_opinions(mock_sqlfilehandler) == []
+
+    with mock.patch.object(opinions.O001, "check_opinion") as mock_check_opinion:
+        base_linter.lint_file(mock_yamlfilehandler)
+        mock_check_opinion.assert_not_called()
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_skipped_checks_logged(
+    base_linter, mock_sqlfilehandler, mock_yamlfilehandler, caplog, jobs
+):
+    base_linter.opinions = [opinions.O001(), opinions.D001()]
+    mock_sqlfilehandler.path = "model.sql"
+    mock_sqlfilehandler.no_qa_opinions = []
+    mock_sqlfilehandler.dbt_node = dbt.DbtModel({"resource_type": "model"})
+    mock_yamlfilehandler.path = "docs.yml"
+    mock_yamlfilehandler.no_qa_opinions = []
+    mock_yamlfilehandler.dbt_nodes = []
+
+    base_linter.lint_files([mock_sqlfilehandler, mock_yamlfilehandler], jobs=jobs)
+    assert (
+        "Skipped 2 of 4 opinion checks not applicable to the files: "
+        "{'D001': 1, 'O001': 1}" in caplog.text
+    )
+
+
+def test_skipped_checks_do_not_resolve_nodes(base_linter, mock_sqlfilehandler):
+    # Skipped checks are counted while linting, so the dbt node of a file is not
+    # resolved before linting it (nor at all if no opinion needs it)
+    base_linter.opinions = [opinions.O001(), opinions.P002()]
+    mock_sqlfilehandler.path = "model.sql"
+    mock_sqlfilehandler.no_qa_opinions = ["all"]
+    type(mock_sqlfilehandler).dbt_node = mock.PropertyMock(
+        side_effect=AssertionError("dbt node resolved")
+    )
+    base_linter.lint_files([mock_sqlfilehandler])
+    assert base_linter._skipped_checks == {"P002": 1}
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from dbt_opiner import manifest_reader
+
+
+@pytest.mark.parametrize(
+    "sections, expected_keys",
+    [
+        pytest.param(["nodes"], {"metadata", "nodes"}, id="nodes"),
+        pytest.param(
+            ["nodes", "macros"], {"metadata", "nodes", "macros"}, id="nodes and macros"
+        ),
+        pytest.param([], {"metadata"}, id="only metadata"),
+    ],
+)
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024 * 1024])
+def test_read_manifest_sections(
+    tmp_path, monkeypatch, sections, expected_keys, chunk_size
+):
+    # Small chunks split the values, strings and escapes between reads
+    monkeypatch.setattr(manifest_reader, "CHUNK_SIZE", chunk_size)
+    manifest = {
+        "metadata": {"dbt_version": "1.8.0", "send_anonymous_usage_stats": False},
+        "nodes": {
+            "model.p.m": {"raw_code": 'select "{[" from {{ ref("x") }}\\', "n": 1.5}
+        },
+        "macros": {"macro.p.m": {"macro_sql": '{% macro m() %}"}{% endmacro %}'}},
+        "parent_map": {"model.p.m": ["model.p.x", '"]}']},
+        "child_map": {},
+        "semantic_models": [],
+        "disabled": None,
+        "docs": -1e3,
+    }
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+
+    manifest_dict = manifest_reader.read_manifest_sections(manifest_path, sections)
+    assert set(manifest_dict.keys()) == expected_keys
+    for key in expected_keys:
+        assert manifest_dict[key] == manifest[key]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        pytest.param("[]", id="not an object"),
+        pytest.param('{"nodes": {} "macros": {}}', id="missing comma"),
+        pytest.param('{"nodes": {}', id="unterminated"),
+    ],
+)
+def test_read_manifest_sections_invalid(tmp_path, content):
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(content)
+    with pytest.raises(json.JSONDecodeError):
+        manifest_reader.read_manifest_sections(manifest_path, ["nodes"])
+
+
+def test_read_manifest_sections_node_ids(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest_reader, "CHUNK_SIZE", 16)
+    nodes = {
+        f"model.p.m{i}": {"raw_code": "select '}' as x" * i, "resource_type": "model"}
+        for i in range(10)
+    }
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(json.dumps({"nodes": nodes, "macros": {"m": {}}}))
+
+    manifest_dict = manifest_reader.read_manifest_sections(
+        manifest_path, ["nodes"], node_ids={"model.p.m3", "model.p.m7", "unknown"}
+    )
+    assert manifest_dict == {
+        "nodes": {"model.p.m3": nodes["model.p.m3"], "model.p.m7": nodes["model.p.m7"]}
+    }
+
+
+def test_read_manifest_sections_is_streamed(tmp_path, monkeypatch):
+    # Skipped sections are not kept in memory while they are scanned
+    monkeypatch.setattr(manifest_reader, "CHUNK_SIZE", 1024)
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(
+        json.dumps({"child_map": {str(i): ["x" * 100] for i in range(1000)}})
+    )
+    max_buffer_size = 0
+    original_fill = manifest_reader._JsonStream._fill
+
+    def tracked_fill(self):
+        nonlocal max_buffer_size
+        has_chunk = original_fill(self)
+        max_buffer_size = max(max_buffer_size, len(self._buffer))
+        return has_chunk
+
+    monkeypatch.setattr(manifest_reader._JsonStream, "_fill", tracked_fill)
+    assert manifest_reader.read_manifest_sections(manifest_path, ["nodes"]) == {}
+    assert max_buffer_size <= 2 * 1024
@@ -142,3 +142,27 @@ def test_opinions_pack_exit_one(caplog, repository, revision, expected):
         assert excinfo.value.code == 1
         with caplog.at_level(logging.DEBUG):
             assert expected in caplog.text
+
+
+def test_required_manifest_sections(temp_complete_git_repo):
+    os.chdir(temp_complete_git_repo)
+    with mock.patch(
+        "dbt_opiner.opinions.opinions_pack.config_singleton.ConfigSingleton.get_config"
+    ) as mock_get_config:
+        # Default opinions only read the nodes section
+        mock_get_config.return_value = {}
+        opinions_pack_inst = opinions_pack.OpinionsPack()
+        assert opinions_pack_inst.get_required_manifest_sections() == ["nodes"]
+
+        # Custom opinions require all the sections unless they declare them
+        mock_get_config.return_value = {
+            "opinions_config": {"custom_opinions": {"source": "local"}}
+        }
+        with mock.patch("subprocess.run"):
+            opinions_pack_inst = opinions_pack.OpinionsPack()
+        assert opinions_pack_inst.get_required_manifest_sections() == [
+            "exposures",
+            "macros",
+            "nodes",
+            "sources",
+        ]
@@ -1,3 +1,4 @@
+import pathlib
 from unittest import mock
 
 import requests
@@ -32,11 +33,17 @@ def test_get_latest_package_version_failure(mock_get):
 
 
 @mock.patch("click.secho")
-@mock.patch("dbt_opiner.package.get_latest_package_version", return_value="2.0.0")
+@mock.patch(
+    "dbt_opiner.package.get_cached_latest_package_version", return_value="2.0.0"
+)
 @mock.patch("dbt_opiner.package.get_package_version", return_value="1.0.0")
 def test_recommend_version_upgrade_recommends_upgrade(
-    mock_get_package_version, mock_get_latest_package_version, mock_click_secho
+    mock_get_package_version,
+    mock_get_latest_package_version,
+    mock_click_secho,
+    monkeypatch,
 ):
+    monkeypatch.delenv("DBT_OPINER_NO_VERSION_CHECK")
     package.recommend_version_upgrade()
 
     mock_click_secho.assert_called_once_with(
@@ -47,11 +54,17 @@ def test_recommend_version_upgrade_recommends_upgrade(
 
 
 @mock.patch("click.secho")
-@mock.patch("dbt_opiner.package.get_latest_package_version", return_value="1.0.0")
+@mock.patch(
+    "dbt_opiner.package.get_cached_latest_package_version", return_value="1.0.0"
+)
 @mock.patch("dbt_opiner.package.get_package_version", return_value="1.0.0")
 def test_recommend_version_upgrade_no_upgrade(
-    mock_get_package_version, mock_get_latest_package_version, mock_click_secho
+    mock_get_package_version,
+    mock_get_latest_package_version,
+    mock_click_secho,
+    monkeypatch,
 ):
+    monkeypatch.delenv("DBT_OPINER_NO_VERSION_CHECK")
     package.recommend_version_upgrade()
     mock_click_secho.assert_called_once_with(
         "Using the latest version of dbt-opiner: 1.0.0.", fg="green"
@@ -59,10 +72,52 @@ def test_recommend_version_upgrade_no_upgrade(
 
 
 @mock.patch("click.secho")
-@mock.patch("dbt_opiner.package.get_latest_package_version", return_value=None)
+@mock.patch("dbt_opiner.package.get_cached_latest_package_version", return_value=None)
 @mock.patch("dbt_opiner.package.get_package_version", return_value="1.0.0")
 def test_recommend_version_upgrade_no_latest_version(
-    mock_get_package_version, mock_get_latest_package_version, mock_click_secho
+    mock_get_package_version,
+    mock_get_latest_package_version,
+    mock_click_secho,
+    monkeypatch,
 ):
+    monkeypatch.delenv("DBT_OPINER_NO_VERSION_CHECK")
     package.recommend_version_upgrade()
     mock_click_secho.assert_not_called()
+
+
+@mock.patch("click.secho")
+@mock.patch("dbt_opiner.package.get_cached_latest_package_version")
+def test_recommend_version_upgrade_disabled(
+    mock_get_cached_latest_package_version, mock_click_secho
+):
+    # DBT_OPINER_NO_VERSION_CHECK is set for the tests
+    package.recommend_version_upgrade()
+    mock_get_cached_latest_package_version.assert_not_called()
+    mock_click_secho.assert_not_called()
+
+
+def test_get_cached_latest_package_version(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+    def run_in_foreground(args, start_new_session, **kwargs):
+        # The check runs in a detached process of the package module
+        assert start_new_session
+        assert args[1:3] == ["-m", "dbt_opiner.package"]
+        package._update_version_check(pathlib.Path(args[3]))
+
+    with (
+        mock.patch("dbt_opiner.package.subprocess.Popen", run_in_foreground),
+        mock.patch(
+            "dbt_opiner.package.get_latest_package_version", return_value="2.0.0"
+        ) as mock_get_latest_package_version,
+    ):
+        # The first run doesn't know the latest version and checks it
+        assert package.get_cached_latest_package_version() is None
+        assert mock_get_latest_package_version.call_count == 1
+        assert (tmp_path / "dbt-opiner" / "version_check.json").exists()
+
+        # Next runs reuse it until the TTL expires
+        assert package.get_cached_latest_package_version() == "2.0.0"
+        assert mock_get_latest_package_version.call_count == 1
+        assert package.get_cached_latest_package_version(ttl=-1) == "2.0.0"
+        assert mock_get_latest_package_version.call_count == 2
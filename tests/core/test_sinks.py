@@ -0,0 +1,185 @@
+import json
+import logging
+from unittest import mock
+
+import pytest
+
+from dbt_opiner import dbt
+from dbt_opiner import linter
+from dbt_opiner import sinks
+
+
+@pytest.fixture
+def lint_results(mock_sqlfilehandler, mock_yamlfilehandler):
+    mock_dbt_project = mock.Mock(spec=dbt.DbtProject)
+    mock_dbt_project.name = "test_project"
+    yaml_file = mock_yamlfilehandler
+    yaml_file.path = "test.yaml"
+    yaml_file.parent_dbt_project = mock_dbt_project
+    sql_file = mock_sqlfilehandler
+    sql_file.path = "test.sql"
+    sql_file.parent_dbt_project = mock_dbt_project
+    sql_file.dbt_node = dbt.DbtBaseNode({"patch_path": "test.yaml"})
+
+    return [
+        linter.LintResult(
+            yaml_file, "C002", False, linter.OpinionSeverity.MUST, "message", ["tag"]
+        ),
+        linter.LintResult(
+            yaml_file, "C001", False, linter.OpinionSeverity.SHOULD, "message"
+        ),
+        # Duplicated by the yaml result
+        linter.LintResult(
+            sql_file, "C001", False, linter.OpinionSeverity.SHOULD, "message"
+        ),
+        linter.LintResult(sql_file, "C003", True, linter.OpinionSeverity.MUST, "ok"),
+    ]
+
+
+def test_result_sink_write_is_abstract():
+    class IncompleteSink(sinks.ResultSink):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteSink()
+
+    class CompleteSink(sinks.ResultSink):
+        def write(self, record):
+            pass
+
+    # close is optional
+    CompleteSink().close(0)
+
+
+def test_result_stream(lint_results):
+    result_sink = mock.Mock(spec=sinks.ResultSink)
+    result_stream = sinks.ResultStream([result_sink])
+    for result in lint_results:
+        result_stream.add(result)
+    # Results are written as they are added, without the duplicated one
+    assert [call.args[0].opinion_code for call in result_sink.write.call_args_list] == [
+        "C002",
+        "C001",
+        "C003",
+    ]
+    assert result_sink.write.call_args_list[0].args[0] == sinks.ResultRecord(
+        "test_project", "test.yaml", "C002", False, "must", "message", ["tag"]
+    )
+    assert result_stream.close() == 1
+    result_sink.close.assert_called_once_with(1)
+    assert result_stream.counts == {
+        ("must", False): 1,
+        ("should", False): 1,
+        ("must", True): 1,
+    }
+
+
+@pytest.mark.parametrize("sort_buffer_size", [1, 2, 100])
+def test_result_stream_sort(lint_results, caplog, sort_buffer_size):
+    result_sink = mock.Mock(spec=sinks.ResultSink)
+    result_stream = sinks.ResultStream(
+        [result_sink], sort=True, deduplicate=False, sort_buffer_size=sort_buffer_size
+    )
+    for result in lint_results:
+        result_stream.add(result)
+    result_sink.write.assert_not_called()
+
+    with caplog.at_level(logging.DEBUG):
+        result_stream.close()
+    # Same order as sorting the lint results in memory
+    assert [
+        (call.args[0].opinion_code, call.args[0].file_path)
+        for call in result_sink.write.call_args_list
+    ] == [(result.opinion_code, result.file.path) for result in sorted(lint_results)]
+    assert ("Merging" in caplog.text) == (sort_buffer_size < len(lint_results))
+
+
+@pytest.mark.parametrize(
+    "output_format, expected",
+    [
+        pytest.param(
+            "md",
+            "# ✨ Dbt-opiner lint results\n"
+            "- ❌ C002 | `test.yaml` message\n"
+            "- ⚠️ C001 | `test.yaml` message\n",
+            id="md",
+        ),
+        pytest.param(
+            "ndjson",
+            "\n".join(
+                json.dumps(record)
+                for record in [
+                    {
+                        "dbt_project_name": "test_project",
+                        "file_path": "test.yaml",
+                        "opinion_code": "C002",
+                        "passed": False,
+                        "severity": "must",
+                        "message": "message",
+                        "tags": ["tag"],
+                    },
+                    {
+                        "dbt_project_name": "test_project",
+                        "file_path": "test.yaml",
+                        "opinion_code": "C001",
+                        "passed": False,
+                        "severity": "should",
+                        "message": "message",
+                        "tags": None,
+                    },
+                    {
+                        "dbt_project_name": "test_project",
+                        "file_path": "test.sql",
+                        "opinion_code": "C003",
+                        "passed": True,
+                        "severity": "must",
+                        "message": "ok",
+                        "tags": None,
+                    },
+                ]
+            )
+            + "\n",
+            id="ndjson",
+        ),
+    ],
+)
+def test_lint_sinks(lint_results, tmp_path, caplog, output_format, expected):
+    output_file = tmp_path / "results"
+    result_stream = sinks.ResultStream(
+        sinks.get_lint_sinks(str(output_file), output_format)
+    )
+    for result in lint_results:
+        result_stream.add(result)
+    assert "C002 | `test.yaml` message" in caplog.text
+    assert result_stream.close() == 1
+    assert output_file.read_text() == expected
+
+
+def test_lint_sinks_all_passed(tmp_path, caplog):
+    output_file = tmp_path / "results.md"
+    result_stream = sinks.ResultStream(sinks.get_lint_sinks(str(output_file), "md"))
+    assert result_stream.close() == 0
+    assert "All opinions passed!" in caplog.text
+    assert output_file.read_text() == (
+        "# ✨ Dbt-opiner lint results\n✅ All opinions passed!"
+    )
+
+
+def test_lint_sinks_unsupported_format():
+    with pytest.raises(ValueError, match="Unsupported format: json"):
+        sinks.get_lint_sinks("results.json", "json")
+
+
+@pytest.mark.parametrize("keep_detailed", [True, False])
+def test_audit_sink(lint_results, keep_detailed):
+    audit_sink = sinks.AuditSink(keep_detailed)
+    result_stream = sinks.ResultStream([audit_sink])
+    for result in lint_results:
+        result_stream.add(result)
+    result_stream.close()
+    tables = audit_sink.aggregator.get_tables()
+    assert tables["general_statistics"].rows == [
+        ("test_project", "must", 2, 1, 1, 50.0),
+        ("test_project", "should", 1, 0, 1, 0.0),
+    ]
+    assert len(tables["detailed_results"].rows) == (3 if keep_detailed else 0)
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from dbt_opiner import timings
+
+
+def test_timings_phases(tmp_path):
+    timings_inst = timings.Timings()
+    with timings_inst.phase("load manifest", "project"):
+        pass
+    with pytest.raises(SystemExit):
+        with timings_inst.phase("report"):
+            raise SystemExit(1)
+
+    # Phases are recorded in order, even if they exit
+    assert [(timing.phase, timing.dbt_project) for timing in timings_inst.phases] == [
+        ("load manifest", "project"),
+        ("report", None),
+    ]
+    assert all(
+        timing.wall_time >= 0 and timing.cpu_time >= 0 for timing in timings_inst.phases
+    )
+
+    summary = timings_inst.get_summary().splitlines()
+    assert summary[0].split() == ["phase", "dbt_project", "wall_s", "cpu_s"]
+    assert summary[1].startswith("load manifest  project")
+    assert summary[-1].startswith("total")
+
+    timings_file = tmp_path / "timings.json"
+    timings_inst.write_json(str(timings_file))
+    timings_dict = json.loads(timings_file.read_text())
+    assert [timing["phase"] for timing in timings_dict["phases"]] == [
+        "load manifest",
+        "report",
+    ]
+    assert set(timings_dict["total"]) == {
+        "phase",
+        "dbt_project",
+        "wall_time",
+        "cpu_time",
+    }
+
+    timings_inst.reset()
+    assert timings_inst.phases == []
+
+
+def test_opinion_profile(tmp_path):
+    opinion_profile = timings.OpinionProfile()
+    for i in range(1, 21):
+        opinion_profile.add("O001", "SqlFileHandler", i / 1000, 1, 0)
+    opinion_profile.add("O001", "YamlFileHandler", 0.001, 0, 2)
+    opinion_profile.add("D001", "YamlFileHandler", 0.5, 1, 0)
+
+    stats = opinion_profile.get_stats()
+    # Sorted by total time
+    assert [(stat.opinion_code, stat.file_handler) for stat in stats] == [
+        ("D001", "YamlFileHandler"),
+        ("O001", "SqlFileHandler"),
+        ("O001", "YamlFileHandler"),
+    ]
+    assert stats[1].calls == 20
+    assert stats[1].total_time == pytest.approx(0.21)
+    assert stats[1].mean_time == pytest.approx(0.0105)
+    assert stats[1].p95_time == pytest.approx(0.019)
+    assert (stats[1].passed, stats[1].failed) == (20, 0)
+    assert (stats[2].passed, stats[2].failed) == (0, 2)
+
+    summary = opinion_profile.get_summary().splitlines()
+    assert summary[0].split()[:3] == ["opinion", "file_handler", "calls"]
+    assert summary[1].startswith("D001")
+
+    profile_file = tmp_path / "profile.json"
+    opinion_profile.write_json(str(profile_file))
+    assert json.loads(profile_file.read_text())["opinions"][1]["calls"] == 20